@@ -0,0 +1,238 @@
+# compressed, content addressed archive for the acbl raw html/json cache. replaces millions of small files under acblPath.
+
+# entries are appended to segment files (segment-00000.pack, ...) as compressed frames. an sqlite index maps each key (the
+# acblPath relative posix path the file would have had e.g. 'club-results/108571/details/280270.data.json') to the sha256
+# digest of its content, and each digest to its (segment, offset, length). identical content is stored once.
+# listing keys is an index query instead of a directory walk. reads memory-map the segments.
+
+# zstd is used if the zstandard package is installed, otherwise zlib. the codec is recorded per entry so archives written
+# with either remain readable.
+
+# migrate an existing tree with:
+#   python -m acbllib.acblPackLib <acblPath> <pack dir>
+
+import hashlib
+import mmap
+import pathlib
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Iterator, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+DEFAULT_CODEC = CODEC_ZLIB if zstandard is None else CODEC_ZSTD
+SEGMENT_MAX_BYTES = 256*1024*1024
+COMMIT_EVERY = 1000 # puts and deletes per index transaction
+
+# frame header: magic, codec, sha256 digest, compressed length. lets a segment be verified or re-indexed without the index.
+FRAME_MAGIC = b'APK1'
+FRAME_HEADER = struct.Struct('<4sB32sI')
+
+
+def compress(data: bytes, codec: int = DEFAULT_CODEC) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(data: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("pack entry is zstd compressed but the zstandard package isn't installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown pack codec: {codec}")
+
+
+class PackStore:
+    def __init__(self, path: Union[str, pathlib.Path], codec: int = DEFAULT_CODEC, readonly: bool = False):
+        """
+        Args:
+            path: Directory holding index.sqlite and the segment files. Created if missing (unless readonly).
+            codec: Codec for new entries. CODEC_ZSTD needs the zstandard package.
+            readonly: Open the index read-only e.g. in worker processes while another process writes.
+        """
+        self.path = pathlib.Path(path)
+        self.codec = codec
+        self.readonly = readonly
+        if not readonly:
+            self.path.mkdir(parents=True, exist_ok=True)
+        index_path = self.path.joinpath('index.sqlite')
+        if readonly:
+            self._index = sqlite3.connect(f'file:{index_path.as_posix()}?mode=ro', uri=True, check_same_thread=False)
+        else:
+            self._index = sqlite3.connect(index_path, check_same_thread=False)
+            self._index.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS blobs (digest BLOB PRIMARY KEY, segment INT NOT NULL, offset INT NOT NULL, length INT NOT NULL, codec INT NOT NULL, size INT NOT NULL);
+                CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY, digest BLOB NOT NULL);
+            """)
+        self._lock = threading.RLock()
+        self._maps = {}
+        self._writer = None
+        self._writer_segment = None
+        self._uncommitted = 0
+
+    def __enter__(self) -> 'PackStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _segment_path(self, segment: int) -> pathlib.Path:
+        return self.path.joinpath(f'segment-{segment:05}.pack')
+
+    def _open_writer(self, length: int) -> None:
+        # append to the last segment until it would exceed SEGMENT_MAX_BYTES.
+        if self._writer is None:
+            segment = self._index.execute('SELECT max(segment) FROM blobs').fetchone()[0] or 0
+            self._writer_segment = segment
+            self._writer = open(self._segment_path(segment), 'ab')
+        if self._writer.tell() > 0 and self._writer.tell()+length > SEGMENT_MAX_BYTES:
+            self._writer.close()
+            self._writer_segment += 1
+            self._writer = open(self._segment_path(self._writer_segment), 'ab')
+
+    def put(self, key: str, data: bytes) -> bool:
+        """Store data under key. Returns False if the content was already stored (only the key is added)."""
+        digest = hashlib.sha256(data).digest()
+        with self._lock:
+            stored = self._index.execute('SELECT 1 FROM blobs WHERE digest=?', (digest,)).fetchone() is not None
+            if not stored:
+                payload = compress(data, self.codec)
+                self._open_writer(FRAME_HEADER.size+len(payload))
+                offset = self._writer.tell()+FRAME_HEADER.size
+                self._writer.write(FRAME_HEADER.pack(FRAME_MAGIC, self.codec, digest, len(payload)))
+                self._writer.write(payload)
+                self._writer.flush() # readers (mmap) must see the bytes before the index row is committed
+                self._index.execute('INSERT INTO blobs VALUES (?,?,?,?,?,?)', (digest, self._writer_segment, offset, len(payload), self.codec, len(data)))
+            self._index.execute('INSERT OR REPLACE INTO keys VALUES (?,?)', (key, digest))
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self.commit()
+            return not stored
+
+    def put_text(self, key: str, text: str) -> bool:
+        return self.put(key, text.encode('utf-8'))
+
+    def _view(self, segment: int, end: int) -> mmap.mmap:
+        # mmap of a segment. remapped when the segment has grown past the mapped length.
+        view = self._maps.get(segment)
+        if view is None or len(view) < end:
+            if view is not None:
+                view.close()
+            with open(self._segment_path(segment), 'rb') as f:
+                view = self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return view
+
+    def _locate(self, key: str) -> Optional[Tuple[int, int, int, int, int]]:
+        return self._index.execute('SELECT segment, offset, length, codec, size FROM keys JOIN blobs USING (digest) WHERE key=?', (key,)).fetchone()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            location = self._locate(key)
+            if location is None:
+                return None
+            segment, offset, length, codec, size = location
+            payload = self._view(segment, offset+length)[offset:offset+length]
+        return decompress(payload, codec)
+
+    def get_text(self, key: str) -> Optional[str]:
+        data = self.get(key)
+        return None if data is None else data.decode('utf-8')
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            return self._index.execute('SELECT 1 FROM keys WHERE key=?', (key,)).fetchone() is not None
+
+    def size(self, key: str) -> Optional[int]:
+        # uncompressed size, as path.stat().st_size would have been.
+        with self._lock:
+            location = self._locate(key)
+        return None if location is None else location[4]
+
+    def delete(self, key: str) -> None:
+        # removes the key. the content stays in its segment.
+        with self._lock:
+            self._index.execute('DELETE FROM keys WHERE key=?', (key,))
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self.commit()
+
+    def keys(self, prefix: str = '', suffix: str = '') -> list:
+        # sorted keys with prefix and suffix. replaces acblPath.rglob().
+        keys = []
+        with self._lock:
+            for (key,) in self._index.execute('SELECT key FROM keys WHERE key >= ? ORDER BY key', (prefix,)):
+                if not key.startswith(prefix):
+                    break
+                if key.endswith(suffix):
+                    keys.append(key)
+        return keys
+
+    def items(self, prefix: str = '', suffix: str = '') -> Iterator[Tuple[str, bytes]]:
+        # (key, data) in segment order so a full scan reads each segment sequentially.
+        with self._lock:
+            rows = self._index.execute('SELECT key, segment, offset, length, codec FROM keys JOIN blobs USING (digest) ORDER BY segment, offset').fetchall()
+        for key, segment, offset, length, codec in rows:
+            if key.startswith(prefix) and key.endswith(suffix):
+                with self._lock:
+                    payload = self._view(segment, offset+length)[offset:offset+length]
+                yield key, decompress(payload, codec)
+
+    def commit(self) -> None:
+        with self._lock:
+            if not self.readonly:
+                self._index.commit()
+            self._uncommitted = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            keys, = self._index.execute('SELECT count(*) FROM keys').fetchone()
+            blobs, size, length = self._index.execute('SELECT count(*), coalesce(sum(size),0), coalesce(sum(length),0) FROM blobs').fetchone()
+        return {'keys': keys, 'blobs': blobs, 'size': size, 'compressed': length, 'segments': len(list(self.path.glob('segment-*.pack')))}
+
+    def close(self) -> None:
+        with self._lock:
+            self.commit()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            for view in self._maps.values():
+                view.close()
+            self._maps.clear()
+            self._index.close()
+
+
+def import_tree(root: Union[str, pathlib.Path], store: PackStore, patterns: Tuple[str, ...] = ('*.html', '*.data.json')) -> dict:
+    """Copy a directory tree of cached files into store. Keys are root relative posix paths."""
+    root = pathlib.Path(root)
+    start_time = time.time()
+    files = 0
+    new_blobs = 0
+    for pattern in patterns:
+        for file in root.rglob(pattern):
+            new_blobs += store.put(file.relative_to(root).as_posix(), file.read_bytes())
+            files += 1
+            if files % 10000 == 0:
+                print(f"imported files:{files} time:{round(time.time()-start_time,2)} seconds")
+    store.commit()
+    stats = store.stats()
+    print(f"imported files:{files} new blobs:{new_blobs} {stats} time:{round(time.time()-start_time,2)} seconds")
+    return stats
+
+
+if __name__ == '__main__':
+    with PackStore(sys.argv[2]) as store:
+        import_tree(sys.argv[1], store)
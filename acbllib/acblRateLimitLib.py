@@ -0,0 +1,184 @@
+# per host rate limiting for acbl scraping. replaces the hard-coded time.sleep(2) per request and time.sleep(60) on errors.
+
+# each host gets a token bucket (requests per second with a burst allowance) and a cap on requests in flight.
+# the rate adapts (AIMD): every successful response raises it by rate_increase up to max_rate. a 403 or 429 halves it,
+# down to min_rate, and pauses the host for Retry-After seconds or an exponential backoff.
+# a crawl then runs as fast as the upstream allows and no faster.
+
+# limits are per process. both blocking (requests, threads) and asyncio callers share the same buckets.
+
+import asyncio
+import os
+import random
+import threading
+import time
+import urllib.parse
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+
+
+THROTTLE_STATUS_CODES = (403, 429) # acbl returns 403 "forbidden" when it thinks it is being scraped.
+
+ACBL_RATE = float(os.getenv('ACBL_RATE', 0.5)) # initial requests per second. 0.5 is the old time.sleep(2).
+ACBL_MIN_RATE = float(os.getenv('ACBL_MIN_RATE', 0.05))
+ACBL_MAX_RATE = float(os.getenv('ACBL_MAX_RATE', 4))
+ACBL_BURST = float(os.getenv('ACBL_BURST', 1))
+ACBL_MAX_IN_FLIGHT = int(os.getenv('ACBL_MAX_IN_FLIGHT', 4))
+ACBL_MAX_BACKOFF = float(os.getenv('ACBL_MAX_BACKOFF', 60)) # the old time.sleep(60).
+ACBL_MAX_RETRIES = int(os.getenv('ACBL_MAX_RETRIES', 5))
+
+_IN_FLIGHT_POLL = 0.01 # seconds between checks while a host is at max_in_flight.
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After is either seconds or an http date.
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp()-time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimiter:
+    def __init__(self, host: str, rate: float = ACBL_RATE, burst: float = ACBL_BURST, max_in_flight: int = ACBL_MAX_IN_FLIGHT,
+                 min_rate: float = ACBL_MIN_RATE, max_rate: float = ACBL_MAX_RATE, rate_increase: Optional[float] = None,
+                 backoff: float = 2.0, max_backoff: float = ACBL_MAX_BACKOFF):
+        """
+        Args:
+            host: Host name, for logging.
+            rate: Initial requests per second.
+            burst: Maximum tokens. 1 spaces requests evenly.
+            max_in_flight: Maximum concurrent requests.
+            min_rate, max_rate: Bounds of the adaptive rate.
+            rate_increase: Rate added per successful response. Default is min_rate.
+            backoff: First pause in seconds after a throttled response. Doubles for each consecutive throttle.
+            max_backoff: Maximum pause in seconds.
+        """
+        self.host = host
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_increase = min_rate if rate_increase is None else rate_increase
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.tokens = burst
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.consecutive_throttles = 0
+        self.requests = 0
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> float:
+        # takes a token and an in flight slot and returns 0, or returns how long to wait before trying again.
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens+(now-self._updated)*self.rate)
+            self._updated = now
+            if now < self.paused_until:
+                return self.paused_until-now
+            if self.in_flight >= self.max_in_flight:
+                return _IN_FLIGHT_POLL
+            if self.tokens < 1:
+                return (1-self.tokens)/self.rate
+            self.tokens -= 1
+            self.in_flight += 1
+            self.requests += 1
+            return 0.0
+
+    def acquire(self) -> None:
+        while (wait := self._try_acquire()) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        while (wait := self._try_acquire()) > 0:
+            await asyncio.sleep(wait)
+
+    def release(self, status_code: Optional[int] = None, retry_after: Optional[float] = None) -> float:
+        """Return the in flight slot and adapt the rate to the response. None status_code is a connection error.
+
+        Returns:
+            Seconds the host is paused for. 0 unless the response was throttled.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if status_code in THROTTLE_STATUS_CODES:
+                self.throttled += 1
+                self.consecutive_throttles += 1
+                self.rate = max(self.min_rate, self.rate/2)
+                self.tokens = min(self.tokens, 0)
+                pause = retry_after
+                if pause is None:
+                    pause = self.backoff*2**(self.consecutive_throttles-1)
+                    pause *= random.uniform(0.75, 1.25) # jitter so workers don't all resume together
+                pause = min(pause, self.max_backoff)
+                self.paused_until = max(self.paused_until, time.monotonic()+pause)
+                print(f"{self.host}: throttled status:{status_code} rate:{round(self.rate,3)}/s pause:{round(pause,2)} seconds")
+                return pause
+            if status_code is not None and status_code < 500:
+                self.consecutive_throttles = 0
+                self.rate = min(self.max_rate, self.rate+self.rate_increase)
+            return 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {'host': self.host, 'rate': self.rate, 'in_flight': self.in_flight, 'requests': self.requests, 'throttled': self.throttled}
+
+
+class RateLimiter:
+    """Registry of HostLimiters keyed by host. Hosts not configured with set_limits() get the default limits."""
+
+    def __init__(self, **default_limits):
+        self.default_limits = default_limits
+        self.host_limits: Dict[str, dict] = {}
+        self.hosts: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def set_limits(self, host: str, **limits) -> None:
+        with self._lock:
+            self.host_limits[host] = limits
+            self.hosts.pop(host, None)
+
+    def for_url(self, url: str) -> HostLimiter:
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            limiter = self.hosts.get(host)
+            if limiter is None:
+                limiter = self.hosts[host] = HostLimiter(host, **{**self.default_limits, **self.host_limits.get(host, {})})
+            return limiter
+
+    def get(self, url: str, session: Optional[requests.Session] = None, max_retries: int = ACBL_MAX_RETRIES, **kwargs) -> requests.Response:
+        """requests.get() paced by the url's host. Throttled responses (403, 429) are retried after the host's pause.
+
+        Returns:
+            The last response. Its status code is still 403/429 if max_retries was exhausted. Connection errors are raised.
+        """
+        limiter = self.for_url(url)
+        get = requests.get if session is None else session.get
+        for attempt in range(max_retries+1):
+            limiter.acquire()
+            try:
+                response = get(url, **kwargs)
+            except BaseException:
+                limiter.release(None)
+                raise
+            limiter.release(response.status_code, parse_retry_after(response.headers.get('Retry-After')))
+            if response.status_code not in THROTTLE_STATUS_CODES:
+                break
+        return response
+
+
+# shared by all acbllib crawls in this process.
+acbl_rate_limiter = RateLimiter()
+# the api (bearer token) tolerates a higher rate than the my.acbl.org web pages.
+ACBL_API_RATE = float(os.getenv('ACBL_API_RATE', 5))
+acbl_rate_limiter.set_limits('api.acbl.org', rate=ACBL_API_RATE, max_rate=max(ACBL_API_RATE, ACBL_MAX_RATE), burst=ACBL_API_RATE)
@@ -11,6 +11,10 @@ def print_to_log_debug(*args):
 def print_to_log(level, *args):
     logging.log(level, ' '.join(str(arg) for arg in args))
 
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import httpx
 import pandas as pd
 import re
 import traceback
@@ -22,7 +26,9 @@ from collections import defaultdict
 import time
 import json
 import pathlib
+import sqlite3
 import sys
+import uuid
 import sqlalchemy
 from sqlalchemy import create_engine, inspect
 import sqlalchemy_utils
@@ -30,9 +36,67 @@ from sqlalchemy_utils.functions import database_exists, create_database
 sys.path.append(str(pathlib.Path.cwd().parent.parent.joinpath('mlBridgeLib'))) # removed .parent
 sys.path
 from mlBridgeLib.mlBridgeLib import json_to_sql_walk, CreateSqlFile
+from acbllib.acblPackLib import PackStore
+from acbllib.acblRateLimitLib import acbl_rate_limiter, parse_retry_after, THROTTLE_STATUS_CODES, ACBL_MAX_RETRIES
 
 
-def get_club_results(cns, base_url, acbl_url, acblPath, read_local):
+def club_html_file(url, cn, acbl_url):
+    # local (acblPath relative) file of a club's results listing.
+    return url.replace(acbl_url,'')+str(cn)+'.html'
+
+
+def club_result_files(url, cn, acbl_url):
+    # local (acblPath relative) html and json files of a club result.
+    html_file = url.replace(acbl_url,'').replace('club-results','club-results/'+str(cn))+'.html'
+    return html_file, html_file.replace('.html','.data.json')
+
+
+# the local cache of downloaded pages is either files under acblPath or, if pack_store is given, an acblPackLib.PackStore
+# keyed by the same acblPath relative paths.
+def read_cached_text(acblPath, file, pack_store=None, min_size=0):
+    # returns None if not cached or not larger than min_size bytes.
+    if pack_store is not None:
+        size = pack_store.size(file)
+        return None if size is None or size <= min_size else pack_store.get_text(file)
+    path = acblPath.joinpath(file)
+    if not path.exists() or path.stat().st_size <= min_size:
+        return None
+    return path.read_text(encoding="utf-8")
+
+
+def cached_exists(acblPath, file, pack_store=None):
+    return acblPath.joinpath(file).exists() if pack_store is None else pack_store.exists(file)
+
+
+def write_cached_text(acblPath, file, text, pack_store=None):
+    if pack_store is not None:
+        pack_store.put_text(file, text)
+        return
+    path = acblPath.joinpath(file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def delete_cached(acblPath, file, pack_store=None):
+    if pack_store is not None:
+        pack_store.delete(file)
+    else:
+        acblPath.joinpath(file).unlink(missing_ok=True)
+
+
+def extract_var_data_json(html):
+    # club result pages embed the result as 'var data = {...};' in a script. returns None if not found.
+    data_json = None
+    bs = BeautifulSoup(html, "html.parser")
+    for script in bs.find_all('script'):
+        if script.string: # not defined for all scripts
+            vardata = re.search('var data = (.*);\n', script.string)
+            if vardata:
+                data_json = json.loads(vardata.group(1))
+    return data_json
+
+
+def get_club_results(cns, base_url, acbl_url, acblPath, read_local, pack_store=None):
     htmls = {}
     total_clubs = len(cns)
     failed_urls = []
@@ -47,30 +111,26 @@ def get_club_results(cns, base_url, acbl_url, acblPath, read_local):
     for ncn,cn in enumerate(sorted(cns)):
         ncn += 1
         url = base_url+str(cn)+'/'
-        file = url.replace(acbl_url,'')+str(cn)+'.html'
+        file = club_html_file(url, cn, acbl_url)
         print_to_log_info(f'Processing file ({ncn}/{total_clubs}): {file}')
-        path = acblPath.joinpath(file)
-        if read_local and path.exists() and path.stat().st_size > 200:
-            html = path.read_text(encoding="utf-8")
+        html = read_cached_text(acblPath, file, pack_store, min_size=200) if read_local else None
+        if html is not None:
             print_to_log_info(f'Reading local {file}: len={len(html)}')
         else:
             print_to_log_info(f'Requesting {url}')
             try:
-                r = requests.get(url,headers=headers)
-            except:
-                print_to_log_info(f'Except: status:{r.status_code} {url}')
-            else:
-                html = r.text
-                print_to_log_info(f'Creating {file}: len={len(html)}')
+                r = acbl_rate_limiter.get(url,headers=headers) # paced per host. 403 (forbidden) and 429 are backed off and retried.
+            except Exception as ex:
+                print_to_log_info(f'Except: type:{type(ex).__name__} args:{ex.args} {url}')
+                failed_urls.append(url)
+                continue
+            html = r.text
+            print_to_log_info(f'Creating {file}: len={len(html)}')
             if r.status_code != 200:
                 print_to_log_info(f'Error: status:{r.status_code} {url}')
-                time.sleep(60) # obsolete?
                 failed_urls.append(url)
                 continue
-            # pathlib.Path.mkdir(path.parent, parents=True, exist_ok=True)
-            path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(html, encoding="utf-8")
-            time.sleep(2) # need to self-throttle otherwise acbl returns 403 "forbidden". obsolete?
+            write_cached_text(acblPath, file, html, pack_store)
         htmls[str(cn)] = html
     print_to_log_info(f'Failed Urls: len:{len(failed_urls)} Urls:{failed_urls}')
     print_to_log_info(f"Done: Total clubs processed:{total_clubs}: Total url failures:{len(failed_urls)}")
@@ -115,7 +175,7 @@ def extract_club_games(htmls, acbl_url):
     return dfs, ClubInfos    
 
 
-def extract_club_result_json(dfs, filtered_clubs, starting_nclub, ending_nclub, total_local_files, acblPath,acbl_url, read_local=True):
+def extract_club_result_json(dfs, filtered_clubs, starting_nclub, ending_nclub, total_local_files, acblPath,acbl_url, read_local=True, pack_store=None):
     total_clubs = len(filtered_clubs)
     failed_urls = []
     total_urls_processed = 0
@@ -138,24 +198,20 @@ def extract_club_result_json(dfs, filtered_clubs, starting_nclub, ending_nclub,
         for cn, (nurl, url) in zip(df['Club'],enumerate(df['ResultUrl'])):
             #nurl += 1
             total_urls_processed += 1
-            html_file = url.replace(acbl_url,'').replace('club-results','club-results/'+str(cn))+'.html'
-            json_file = html_file.replace('.html','.data.json')
+            html_file, json_file = club_result_files(url, cn, acbl_url)
             if nurl % 100 == 0: # commented out because overloaded notebook output causing system instability.
                 print_to_log_info(f'Processing club ({ndf}/{total_clubs}): result file ({nurl}/{total_results}): {html_file}')
             #if ndf < 1652:
             #    continue
-            html_path = acblPath.joinpath(html_file)
-            json_path = acblPath.joinpath(json_file)
             html = None
             data_json = None
-            if read_local and json_path.exists():
+            if read_local and cached_exists(acblPath, json_file, pack_store):
                 #if html_path.exists():
                 #    print_to_log(f'Found local html file: {html_file}')
                 #else:
                 #    print_to_log(f'Missing local html file: {html_file}')
                 try:
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        data_json = json.load(f)
+                    data_json = json.loads(read_cached_text(acblPath, json_file, pack_store))
                 except:
                     print_to_log_info(f'Exception when reading json file: {json_file}. Deleting html and json files.')
                 else:
@@ -164,7 +220,7 @@ def extract_club_result_json(dfs, filtered_clubs, starting_nclub, ending_nclub,
             else:
                 print_to_log_info(f'Requesting {url}')
                 try:
-                    r = requests.get(url,headers=headers)
+                    r = acbl_rate_limiter.get(url,headers=headers) # paced per host. 403 (forbidden) and 429 are backed off and retried.
                 except Exception as ex:
                     print_to_log_info(f'Exception: count:{except_count} type:{type(ex).__name__} args:{ex.args}')
                     if except_count > 5:
@@ -185,33 +241,21 @@ def extract_club_result_json(dfs, filtered_clubs, starting_nclub, ending_nclub,
                 # some clubs return 200 (ok) but with instructions to login (len < 200).
                 # skip clubs returning errors or tiny files. assumes one failed club result will be true for all club's results.
                 if r.status_code != 200 or len(html) < 200:
-                    print_to_log_info(f'Error: {r.status_code} len:{len(html)} {url}. Waiting 60s.')
+                    print_to_log_info(f'Error: {r.status_code} len:{len(html)} {url}. Skipping club.')
                     failed_urls.append(url)
-                    time.sleep(60) # wait 1 minute before retrying.
                     break
-                # pathlib.Path.mkdir(html_path.parent, parents=True, exist_ok=True)
-                html_path.parent.mkdir(parents=True, exist_ok=True)
-                html_path.write_text(html, encoding="utf-8")
-                bs = BeautifulSoup(html, "html.parser")
-                scripts = bs.find_all('script')
-                #print_to_log(scripts)
-                for script in scripts:
-                    if script.string: # not defined for all scripts
-                        #print_to_log(script.string)
-                        vardata = re.search('var data = (.*);\n', script.string)
-                        if vardata:
-                            data_json = json.loads(vardata.group(1))
-                            #print_to_log(json.dumps(data_json, indent=4))
-                            print_to_log_info(f"Writing {json_path}")
-                            with open(json_path, 'w', encoding='utf-8') as f:
-                                json.dump(data_json, f, indent=2)
-                            bbo_tournament_id = data_json["bbo_tournament_id"]
-                            print_to_log_info(f'bbo_tournament_id: {bbo_tournament_id}')
-                time.sleep(2) # need to self-throttle otherwise acbl returns 403 "forbidden". looks like sleep of 1 second has become insufficient in 2025-Jun.
+                write_cached_text(acblPath, html_file, html, pack_store)
+                data_json = extract_var_data_json(html)
+                if data_json:
+                    #print_to_log(json.dumps(data_json, indent=4))
+                    print_to_log_info(f"Writing {json_file}")
+                    write_cached_text(acblPath, json_file, json.dumps(data_json, indent=2), pack_store)
+                    bbo_tournament_id = data_json["bbo_tournament_id"]
+                    print_to_log_info(f'bbo_tournament_id: {bbo_tournament_id}')
             # if no data_json file read, must be an error so delete both html and json files.
             if not data_json:
-                html_path.unlink(missing_ok=True)
-                json_path.unlink(missing_ok=True)
+                delete_cached(acblPath, html_file, pack_store)
+                delete_cached(acblPath, json_file, pack_store)
             #print_to_log(f'Files processed ({total_urls_processed}/{total_local_files_read}/{total_urls_to_process})')
     print_to_log_info(f'Failed Urls: len:{len(failed_urls)} Urls:{failed_urls}')
     print_to_log_info(f"Done: Totals: clubs:{total_clubs} urls:{total_urls_processed} local files read:{total_local_files_read}: failed urls:{len(failed_urls)}")
@@ -265,8 +309,345 @@ def club_results_json_to_sql(urls, starting_nfile=0, ending_nfile=0, initially_d
     return total_urls, total_files_written
 
 
+# direct ingestion of club result json. normalizes the same table hierarchy as club_results_json_to_sql() (json_to_sql_walk)
+# but bulk loads the rows with executemany instead of writing, re-reading and parsing .sql script files.
+# json parsing and walking is done in worker processes. the (single writer) sqlite connection stays in the calling process.
+
+def sql_value(value):
+    # the value CreateSqlFile() would have written as an sql literal. lists become their json-like text.
+    if type(value) is list:
+        if len(value)>0 and isinstance(value[0],str):
+            return '["'+'","'.join(str(v) for v in value)+'"]'
+        return '['+','.join(str(v) for v in value)+']'
+    return value
+
+
+def upsert_conflict_sql(columns, primary_keys=['id']):
+    # ON CONFLICT clause written by CreateSqlFile(). newer updated_at/created_at rows win.
+    sql = ''
+    s = ','.join('"'+c+'"=excluded."'+c+'"' for c in columns)
+    for pk in primary_keys:
+        if pk in columns:
+            sql += f" ON CONFLICT({pk}) DO UPDATE SET {s}"
+    if 'created_at' in columns:
+        sql += ' WHERE excluded."updated_at" > "updated_at" OR (excluded."updated_at" = "updated_at" AND excluded."created_at" > "created_at")'
+    return sql
+
+
+def upsert_sql(table, columns, primary_keys=['id']):
+    # same statement as CreateSqlFile() but with ? parameters.
+    s = '","'.join(columns)
+    return f'INSERT INTO "{table}" ("{s}") VALUES({",".join("?"*len(columns))})'+upsert_conflict_sql(columns, primary_keys)
+
+
+_pack_stores = {} # read-only PackStores opened by this (worker) process
+
+
+def read_club_result_json(json_file, pack_path=None):
+    # json_file is a path, or a PackStore key if pack_path is given.
+    if pack_path is None:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    if pack_path not in _pack_stores:
+        _pack_stores[pack_path] = PackStore(pack_path, readonly=True)
+    return json.loads(_pack_stores[pack_path].get(json_file))
+
+
+def club_result_json_to_rows(json_file, event_types=[], pack_path=None):
+    """Read and normalize a club result json file (or PackStore key if pack_path is given).
+
+    Returns:
+        (type, {(table, columns): [row tuples]}) in table order. (type, None) if skipped by event_types. Rows with the same
+        columns are grouped so each group is one executemany(). Raises on unreadable json.
+    """
+    data_json = read_club_result_json(json_file, pack_path)
+    if len(event_types) > 0 and data_json['type'] not in event_types:
+        return data_json['type'], None
+    tables = defaultdict(lambda :defaultdict(dict))
+    primary_keys = ['id']
+    json_to_sql_walk(tables,"events","","",data_json,primary_keys) # "events" is the main table.
+    rows = defaultdict(list)
+    for table,ids in tables.items():
+        for row in ids.values():
+            rows[(table, tuple(row.keys()))].append(tuple(sql_value(v) for v in row.values()))
+    return data_json['type'], dict(rows)
+
+
+def _club_result_json_to_rows(args):
+    # worker process wrapper. errors are returned so one bad file doesn't stop the pool.
+    json_file, event_types, pack_path = args
+    try:
+        return json_file, *club_result_json_to_rows(json_file, event_types, pack_path), None
+    except Exception as e:
+        return json_file, None, None, f"{type(e).__name__}: {e}"
+
+
+def club_results_json_to_db(raw_connection, json_files, starting_nfile=0, ending_nfile=0, event_types=[], max_workers=None, commit_every=1000, pack_path=None, loaded_files=None):
+    """Bulk load club result json files into an open sqlite connection (replaces club_results_json_to_sql() + executescript).
+
+    Args:
+        raw_connection: sqlite3 (or sqlalchemy raw) connection with the tables already created.
+        json_files: *.data.json paths. Loaded in order so later files win conflicts as with the .sql scripts.
+        max_workers: Worker processes normalizing json. None is os.cpu_count(). 0 normalizes in this process.
+        commit_every: Files per transaction.
+        pack_path: Directory of an acblPackLib.PackStore. json_files are then its keys. Puts must be committed before loading.
+        loaded_files: Optional list which the successfully loaded json_files are appended to.
+
+    Returns:
+        (total_files_loaded, total_rows)
+    """
+    if ending_nfile == 0: ending_nfile = len(json_files)
+    filtered_files = json_files[starting_nfile:ending_nfile]
+    total_files = len(filtered_files)
+    total_files_loaded = 0
+    total_rows = 0
+    sql_cache = {}
+    start_time = time.time()
+    cursor = raw_connection.cursor()
+
+    args = [(json_file, event_types, pack_path) for json_file in filtered_files]
+    if max_workers == 0:
+        executor = None
+        results = map(_club_result_json_to_rows, args)
+    else:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        results = executor.map(_club_result_json_to_rows, args, chunksize=64) # ordered
+    try:
+        for nfile,(json_file,event_type,rows,error) in enumerate(results):
+            if error is not None:
+                print_to_log_info(f"Error: {error}: file:{pathlib.Path(json_file).as_posix()}")
+                continue
+            if rows is None:
+                continue # skipped event_type
+            try:
+                for (table,columns),values in rows.items():
+                    if (table,columns) not in sql_cache:
+                        sql_cache[(table,columns)] = upsert_sql(table,columns)
+                    cursor.executemany(sql_cache[(table,columns)], values)
+                    total_rows += len(values)
+            except Exception as e:
+                print_to_log_info(f"Error: {type(e).__name__}: {e} while loading type:{event_type} file:{pathlib.Path(json_file).as_posix()}")
+                print_to_log_info(f"Every json field must be an entry in the schema file. Update schema if needed.")
+                continue
+            total_files_loaded += 1
+            if loaded_files is not None:
+                loaded_files.append(json_file)
+            if total_files_loaded % commit_every == 0:
+                raw_connection.commit()
+                print_to_log_info(f"{nfile+1}/{total_files} files loaded: rows:{total_rows} rows/s:{round(total_rows/(time.time()-start_time))}")
+        raw_connection.commit()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    elapsed = time.time()-start_time
+    print_to_log_info(f"All files processed:{total_files} files loaded:{total_files_loaded} rows:{total_rows} total time:{round(elapsed,2)} rows/s:{round(total_rows/max(elapsed,1e-9))}")
+    return total_files_loaded, total_rows
+
+
+# bulk load mode for club_results_create_sql_db(). clubs are split into shard databases which are loaded in parallel worker
+# processes with load friendly PRAGMAs (no journal, no fsync, large cache). shards are merged into the db file with ATTACH and
+# INSERT ... SELECT upserts. schema indexes are created after the merge instead of being maintained row by row.
+
+BULK_LOAD_PRAGMAS = [
+    'PRAGMA journal_mode=OFF',
+    'PRAGMA synchronous=OFF',
+    'PRAGMA cache_size=-262144', # KiB
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA locking_mode=EXCLUSIVE',
+    'PRAGMA foreign_keys=OFF',
+]
+
+
+def list_club_results_files(acblPath, suffix, pack_path=None):
+    # club result files in the local cache. PackStore keys if pack_path is given. an index query instead of a directory walk.
+    if pack_path is not None:
+        with PackStore(pack_path, readonly=True) as pack_store:
+            return pack_store.keys('club-results/', suffix)
+    return sorted(acblPath.joinpath('club-results').rglob('*'+suffix)) # fyi: PurePathPosix doesn't support glob/rglob
+
+
+def split_sql_script(sql_script):
+    # returns (table_statements, index_statements, pragma_statements) of a schema script.
+    statements = []
+    statement = ''
+    for line in sql_script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            statements.append(statement.strip())
+            statement = ''
+    if statement.strip():
+        statements.append(statement.strip())
+    split = {'table':[], 'index':[], 'pragma':[]}
+    for statement in statements:
+        code = re.sub(r'^(\s*--[^\n]*\n)*\s*', '', statement)
+        if re.match(r'CREATE\s+(UNIQUE\s+)?INDEX', code, re.IGNORECASE):
+            split['index'].append(statement)
+        elif re.match(r'PRAGMA', code, re.IGNORECASE):
+            split['pragma'].append(statement)
+        else:
+            split['table'].append(statement)
+    return split['table'], split['index'], split['pragma']
+
+
+def club_results_shards(files, n_shards):
+    # all of a club's files go to the same shard, in their original order. largest clubs are placed first on the smallest shard.
+    clubs = defaultdict(list)
+    for file in files:
+        clubs[pathlib.Path(file).parent.parent.name].append(file) # club-results/{club}/details/{result}.data.json
+    shards = [[] for _ in range(max(1, min(n_shards, len(clubs))))]
+    for club in sorted(clubs, key=lambda club: len(clubs[club]), reverse=True):
+        min(shards, key=len).extend(clubs[club])
+    return [shard for shard in shards if shard]
+
+
+def _bulk_load_shard(args):
+    # worker process. loads files into a new shard db. returns (shard_path, files loaded, rows, error).
+    shard_path, table_statements, files, from_json, event_types, pack_path = args
+    try:
+        pathlib.Path(shard_path).unlink(missing_ok=True)
+        connection = sqlite3.connect(shard_path)
+        for pragma in BULK_LOAD_PRAGMAS:
+            connection.execute(pragma)
+        connection.executescript(';\n'.join(table_statements)+';')
+        if from_json:
+            files_loaded, rows = club_results_json_to_db(connection, files, event_types=event_types, max_workers=0, commit_every=len(files)+1, pack_path=pack_path)
+        else:
+            files_loaded = 0
+            for sql_file in files:
+                try:
+                    connection.executescript(pathlib.Path(sql_file).read_text(encoding='utf-8'))
+                    files_loaded += 1
+                except Exception as e:
+                    print_to_log_info(f"Error: {type(e).__name__}: {e} while processing file:{pathlib.Path(sql_file).as_posix()}")
+            rows = connection.total_changes
+        connection.commit()
+        connection.close()
+        return shard_path, files_loaded, rows, None
+    except Exception as e:
+        return shard_path, 0, 0, f"{type(e).__name__}: {e}"
+
+
+def merge_shard_sql(connection, table, primary_keys=['id']):
+    # upsert every row of the attached shard's table into main. same conflict rules as upsert_sql().
+    columns = [row[1] for row in connection.execute(f'PRAGMA shard.table_info("{table}")')]
+    s = '","'.join(columns)
+    sql = f'INSERT INTO main."{table}" ("{s}") SELECT "{s}" FROM shard."{table}" WHERE true' # WHERE true is required before ON CONFLICT
+    return sql+upsert_conflict_sql(columns, primary_keys)
+
+
+def club_results_bulk_load_sql_db(db_file_path, create_tables_sql_file, acblPath, shard_dir=None, n_shards=None, max_workers=None, from_json=True, event_types=[], delete_db=False, pack_path=None):
+    """Rebuild (or update) the club results db from the local cache using parallel shards.
+
+    Args:
+        db_file_path: sqlite db file.
+        create_tables_sql_file: Schema script. CREATE INDEX statements are run after the merge.
+        shard_dir: Directory for shard dbs. Default is next to db_file_path. Shards are deleted once merged.
+        n_shards: Default is max_workers.
+        max_workers: Worker processes. None is os.cpu_count().
+        from_json: Load *.data.json (club_results_json_to_db) or execute *.data.sql scripts.
+        pack_path: Load *.data.json from this acblPackLib.PackStore instead of acblPath.
+
+    Returns:
+        (total_files_loaded, total_rows)
+    """
+    start_time = time.time()
+    db_file_path = pathlib.Path(db_file_path)
+    shard_dir = db_file_path.parent if shard_dir is None else pathlib.Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    max_workers = os.cpu_count() if max_workers is None else max_workers
+    n_shards = max_workers if n_shards is None else n_shards
+    with open(create_tables_sql_file, 'r', encoding='utf-8') as f:
+        table_statements, index_statements, pragma_statements = split_sql_script(f.read())
+
+    files = list_club_results_files(acblPath, '.data.json' if from_json else '.data.sql', pack_path)
+    shards = club_results_shards(files, n_shards)
+    print_to_log_info(f"Bulk loading files:{len(files)} into shards:{len(shards)} with workers:{max_workers}")
+    args = [(str(shard_dir.joinpath(f'{db_file_path.stem}.shard{n}.sqlite')), table_statements, shard, from_json, event_types, pack_path) for n,shard in enumerate(shards)]
+    total_files_loaded = 0
+    total_rows = 0
+    shard_paths = []
+    errors = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for shard_path, files_loaded, rows, error in executor.map(_bulk_load_shard, args):
+            shard_paths.append(shard_path)
+            if error is not None:
+                print_to_log_info(f"Error: {error}: shard:{shard_path}")
+                errors.append(f"shard:{shard_path}: {error}")
+                continue
+            total_files_loaded += files_loaded
+            total_rows += rows
+    if errors:
+        # a partial merge would silently drop the failed shard's files. leave db_file_path as it was.
+        for shard_path in shard_paths:
+            pathlib.Path(shard_path).unlink(missing_ok=True)
+        raise RuntimeError(f"Bulk load failed. {len(errors)} of {len(shard_paths)} shards failed: {'; '.join(errors)}")
+    load_time = time.time()-start_time
+    print_to_log_info(f"Shards loaded: files:{total_files_loaded} rows:{total_rows} time:{round(load_time,2)} rows/s:{round(total_rows/max(load_time,1e-9))}")
+
+    # merge into a temp copy with the journal off then rename it over db_file_path. a crash or error mid merge leaves
+    # db_file_path untouched. delete_db starts from an empty db instead of a copy.
+    merge_start_time = time.time()
+    tmp_db_file_path = db_file_path.with_name(f'{db_file_path.name}.{os.getpid()}.tmp')
+    tmp_db_file_path.unlink(missing_ok=True)
+    connection = sqlite3.connect(tmp_db_file_path)
+    try:
+        if delete_db:
+            print_to_log_info(f"Replacing db:{db_file_path}")
+        elif db_file_path.exists():
+            with sqlite3.connect(db_file_path) as existing: # backup() includes committed pages still in a -wal file.
+                existing.backup(connection)
+            existing.close()
+        for pragma in BULK_LOAD_PRAGMAS:
+            connection.execute(pragma)
+        connection.executescript(';\n'.join(table_statements)+';')
+        merged_rows = 0
+        for shard_path in shard_paths:
+            connection.execute('ATTACH DATABASE ? AS shard', (shard_path,))
+            tables = [row[0] for row in connection.execute("SELECT name FROM shard.sqlite_master WHERE type='table'")]
+            for table in tables:
+                merged_rows += connection.execute(merge_shard_sql(connection, table)).rowcount
+            connection.commit()
+            connection.execute('DETACH DATABASE shard')
+        merge_time = time.time()-merge_start_time
+        print_to_log_info(f"Shards merged: rows:{merged_rows} time:{round(merge_time,2)} rows/s:{round(merged_rows/max(merge_time,1e-9))}")
+
+        index_start_time = time.time()
+        for statement in index_statements:
+            connection.execute(statement)
+        connection.commit()
+        print_to_log_info(f"Indexes created:{len(index_statements)} time:{round(time.time()-index_start_time,2)}")
+        connection.execute('PRAGMA locking_mode=NORMAL')
+        connection.execute('PRAGMA journal_mode=DELETE')
+        for pragma in pragma_statements: # the schema's own PRAGMAs e.g. journal_mode=WAL
+            connection.execute(pragma)
+        connection.close()
+        # the old db's -wal/-shm files must not be applied to the new file.
+        for suffix in ['-wal', '-shm']:
+            db_file_path.with_name(db_file_path.name+suffix).unlink(missing_ok=True)
+        os.replace(tmp_db_file_path, db_file_path)
+    except BaseException:
+        connection.close()
+        tmp_db_file_path.unlink(missing_ok=True)
+        raise
+    finally:
+        for shard_path in shard_paths:
+            pathlib.Path(shard_path).unlink(missing_ok=True)
+    total_time = time.time()-start_time
+    print_to_log_info(f"Done: files:{total_files_loaded} rows:{total_rows} total time:{round(total_time,2)} rows/s:{round(total_rows/max(total_time,1e-9))}: saved {db_file_path}: size:{db_file_path.stat().st_size}")
+    return total_files_loaded, total_rows
+
+
 # todo: can acblPath be removed?
-def club_results_create_sql_db(db_file_connection_string, create_tables_sql_file, db_file_path,  acblPath, db_memory_connection_string='sqlite://', starting_nfile=0, ending_nfile=0, write_direct_to_disk=False, create_tables=True, delete_db=False, perform_integrity_checks=False, create_engine_echo=False):
+def club_results_create_sql_db(db_file_connection_string, create_tables_sql_file, db_file_path,  acblPath, db_memory_connection_string='sqlite://', starting_nfile=0, ending_nfile=0, write_direct_to_disk=False, create_tables=True, delete_db=False, perform_integrity_checks=False, create_engine_echo=False, from_json=False, event_types=[], max_workers=None, bulk_load=False, pack_path=None):
+    # from_json=True loads *.data.json directly (club_results_json_to_db) instead of executing the *.data.sql scripts.
+    # bulk_load=True loads parallel shards straight into db_file_path (club_results_bulk_load_sql_db). the connection strings,
+    # write_direct_to_disk and the memory db backup aren't used. pack_path reads *.data.json from an acblPackLib.PackStore.
+    if bulk_load:
+        total_files_loaded, total_rows = club_results_bulk_load_sql_db(db_file_path, create_tables_sql_file, acblPath, max_workers=max_workers, from_json=from_json, event_types=event_types, delete_db=delete_db, pack_path=pack_path)
+        if perform_integrity_checks:
+            with sqlite3.connect(db_file_path) as connection:
+                print_to_log_info(f"Performing quick_check on file: {connection.execute('PRAGMA quick_check;').fetchall()}")
+        return total_files_loaded
     if write_direct_to_disk:
         db_connection_string = db_file_connection_string # disk file based db
     else:
@@ -290,9 +671,7 @@ def club_results_create_sql_db(db_file_connection_string, create_tables_sql_file
             create_sql = f.read()
         raw_connection.executescript(create_sql) # create tables
 
-    urls = []
-    for path in acblPath.joinpath('club-results').rglob('*.data.sql'): # fyi: PurePathPosix doesn't support glob/rglob
-        urls.append(path)
+    urls = list_club_results_files(acblPath, '.data.json' if from_json else '.data.sql', pack_path)
 
     #urls = [acblPath.joinpath(f) for f in ['club-results/108571/details/280270.data.sql']] # use slashes, not backslashes
     #urls = [acblPath.joinpath(f) for f in ['club-results/275966/details/99197.data.sql']] # use slashes, not backslashes
@@ -307,6 +686,13 @@ def club_results_create_sql_db(db_file_connection_string, create_tables_sql_file
     filtered_urls = urls[starting_nfile:ending_nfile]
     total_filtered_urls = len(filtered_urls)
     start_time = time.time()
+    if from_json:
+        try:
+            total_scripts_executed, total_rows = club_results_json_to_db(raw_connection, filtered_urls, event_types=event_types, max_workers=max_workers, pack_path=pack_path)
+        except KeyboardInterrupt as e:
+            print_to_log_info(f"Error: {type(e).__name__} while loading json files")
+            canceled = True
+        filtered_urls = [] # loaded
     for nfile,url in enumerate(filtered_urls):
         sql_file = url
         #if (nfile % 1000) == 0:
@@ -376,8 +762,11 @@ def get_club_results_details_data(url):
     # todo: use some get...() for 'https://my.acbl.org/club-results/details/993420'
     response = requests.get(url, headers=headers)
     assert response.status_code == 200, [url, response.status_code]
+    return parse_club_results_details_data(url, response.content)
 
-    soup = BeautifulSoup(response.content, "html.parser")
+
+def parse_club_results_details_data(url, content):
+    soup = BeautifulSoup(content, "html.parser")
 
     if soup.find('result-details-combined-section'):
         data = soup.find('result-details-combined-section')['v-bind:data']
@@ -394,6 +783,229 @@ def get_club_results_details_data(url):
     return details_data
 
 
+# asyncio crawler. async counterparts of get_club_results(), extract_club_result_json() and get_club_results_details_data().
+# urls flow through fetch, parse and write stages joined by bounded queues so that downloading, BeautifulSoup parsing and
+# file writes overlap. fetches share one pooled httpx client and are paced by acbl_rate_limiter. files already in the local
+# cache (acblPath) are read instead of fetched so an interrupted crawl resumes where it stopped.
+
+ACBL_CRAWL_CONCURRENCY = int(os.getenv('ACBL_CRAWL_CONCURRENCY', 8)) # fetch workers and pooled connections.
+ACBL_CRAWL_QUEUE_SIZE = 100 # items buffered between stages.
+ACBL_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/124.0.0.0 Safari/537.36"
+    )
+}
+
+
+def create_crawl_client(concurrency=ACBL_CRAWL_CONCURRENCY, headers=ACBL_HEADERS):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(headers=headers, limits=limits, timeout=httpx.Timeout(60), follow_redirects=True)
+
+
+async def fetch_async(client, url, max_retries=ACBL_MAX_RETRIES, **kwargs):
+    # returns the response, None on repeated connection errors. throttled (403, 429) responses are retried after the host's pause.
+    # kwargs are passed to client.get() e.g. headers.
+    limiter = acbl_rate_limiter.for_url(url)
+    except_count = 0
+    throttle_count = 0
+    while True:
+        await limiter.acquire_async()
+        try:
+            response = await client.get(url, **kwargs)
+        except httpx.HTTPError as ex:
+            limiter.release(None)
+            print_to_log_info(f'Exception: count:{except_count} type:{type(ex).__name__} args:{ex.args} {url}')
+            if except_count >= max_retries:
+                print_to_log_info('Except count exceeded')
+                return None
+            except_count += 1
+            await asyncio.sleep(1) # just in case the exception is transient
+            continue
+        limiter.release(response.status_code, parse_retry_after(response.headers.get('Retry-After')))
+        if response.status_code in THROTTLE_STATUS_CODES and throttle_count < max_retries:
+            throttle_count += 1
+            continue
+        return response
+
+
+async def run_pipeline(items, stages, queue_size=ACBL_CRAWL_QUEUE_SIZE):
+    # stages is a list of (async func(item), number of workers). an item returned by a stage is passed to the next stage.
+    # returning None drops the item. returning a list passes each of its items.
+    queues = [asyncio.Queue(queue_size) for _ in stages]
+
+    async def worker(func, queue_in, queue_out):
+        while True:
+            item = await queue_in.get()
+            try:
+                item = await func(item)
+                if item is not None and queue_out is not None:
+                    for item_out in (item if isinstance(item, list) else [item]):
+                        await queue_out.put(item_out)
+            except Exception as ex:
+                print_to_log_info(f'Error: {type(ex).__name__} {ex} in {func.__name__}')
+                print_to_log_info(traceback.format_exc())
+            finally:
+                queue_in.task_done()
+
+    workers = [
+        asyncio.create_task(worker(func, queues[n], queues[n+1] if n+1 < len(stages) else None))
+        for n,(func,n_workers) in enumerate(stages) for _ in range(n_workers)
+    ]
+    try:
+        for item in items:
+            await queues[0].put(item)
+        for queue in queues: # a stage is done once every earlier stage is done and its queue is drained.
+            await queue.join()
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def get_club_results_async(cns, base_url, acbl_url, acblPath, read_local, concurrency=ACBL_CRAWL_CONCURRENCY, pack_store=None):
+    # same results as get_club_results().
+    htmls = {}
+    total_clubs = len(cns)
+    failed_urls = []
+    start_time = time.time()
+
+    async def fetch(item):
+        cn, url, file = item
+        html = await asyncio.to_thread(read_cached_text, acblPath, file, pack_store, 200) if read_local else None
+        if html is not None:
+            htmls[str(cn)] = html
+            return None
+        print_to_log_info(f'Requesting {url}')
+        r = await fetch_async(client, url)
+        if r is None or r.status_code != 200:
+            print_to_log_info(f'Error: status:{None if r is None else r.status_code} {url}')
+            failed_urls.append(url)
+            return None
+        htmls[str(cn)] = r.text
+        return file, r.text
+
+    async def write(item):
+        file, html = item
+        print_to_log_info(f'Creating {file}: len={len(html)}')
+        await asyncio.to_thread(write_cached_text, acblPath, file, html, pack_store)
+
+    items = []
+    for cn in sorted(cns):
+        url = base_url+str(cn)+'/'
+        items.append((cn, url, club_html_file(url, cn, acbl_url)))
+    async with create_crawl_client(concurrency) as client:
+        await run_pipeline(items, [(fetch, concurrency), (write, 1)])
+    htmls = {str(cn):htmls[str(cn)] for cn in sorted(cns) if str(cn) in htmls} # same order as get_club_results()
+    print_to_log_info(f'Failed Urls: len:{len(failed_urls)} Urls:{failed_urls}')
+    print_to_log_info(f"Done: Total clubs processed:{total_clubs}: Total url failures:{len(failed_urls)} time:{round(time.time()-start_time,2)}")
+    return htmls, total_clubs, failed_urls
+
+
+async def extract_club_result_json_async(filtered_clubs, starting_nclub, ending_nclub, acblPath, acbl_url, read_local=True, concurrency=ACBL_CRAWL_CONCURRENCY, parse_executor=None, pack_store=None, no_data_urls=None):
+    """Async extract_club_result_json(). Fetches result pages concurrently and writes their .html and .data.json files.
+
+    As in extract_club_result_json(), the first failed result of a club (error status or a tiny login page) skips the club's remaining results.
+
+    Args:
+        parse_executor: Executor for BeautifulSoup parsing, e.g. a ProcessPoolExecutor. None uses the default thread pool.
+        pack_store: acblPackLib.PackStore to use as the local cache instead of files under acblPath.
+        no_data_urls: Optional set which the urls of fetched pages without result data are added to.
+
+    Returns:
+        (total_urls_processed, total_local_files_read, failed_urls)
+    """
+    total_clubs = len(filtered_clubs)
+    failed_urls = []
+    failed_clubs = set()
+    counts = defaultdict(int)
+    start_time = time.time()
+    loop = asyncio.get_running_loop()
+
+    async def fetch(item):
+        cn, url, html_file, json_file = item
+        if cn in failed_clubs:
+            return None
+        counts['urls_processed'] += 1
+        if read_local and await asyncio.to_thread(cached_exists, acblPath, json_file, pack_store):
+            try:
+                await asyncio.to_thread(lambda: json.loads(read_cached_text(acblPath, json_file, pack_store)))
+            except Exception:
+                print_to_log_info(f'Exception when reading json file: {json_file}. Deleting html and json files.')
+                return (cn, url, html_file, json_file, None, None)
+            counts['local_files_read'] += 1
+            return None
+        print_to_log_info(f'Requesting {url}')
+        r = await fetch_async(client, url)
+        if r is None:
+            failed_urls.append(url)
+            return None # skip url
+        html = r.text
+        # some clubs return 200 (ok) but with instructions to login (len < 200).
+        # skip clubs returning errors or tiny files. assumes one failed club result will be true for all club's results.
+        if r.status_code != 200 or len(html) < 200:
+            print_to_log_info(f'Error: {r.status_code} len:{len(html)} {url}. Skipping club.')
+            failed_urls.append(url)
+            failed_clubs.add(cn)
+            return None
+        return cn, url, html_file, json_file, html, None
+
+    async def parse(item):
+        cn, url, html_file, json_file, html, _ = item
+        data_json = None if html is None else await loop.run_in_executor(parse_executor, extract_var_data_json, html)
+        return cn, url, html_file, json_file, html, data_json
+
+    async def write(item):
+        cn, url, html_file, json_file, html, data_json = item
+        # if no data_json, must be an error so delete both html and json files.
+        if not data_json:
+            await asyncio.to_thread(delete_cached, acblPath, html_file, pack_store)
+            await asyncio.to_thread(delete_cached, acblPath, json_file, pack_store)
+            if html is not None and no_data_urls is not None:
+                no_data_urls.add(url)
+            return
+        print_to_log_info(f"Writing {json_file}: bbo_tournament_id: {data_json['bbo_tournament_id']}")
+        await asyncio.to_thread(write_cached_text, acblPath, html_file, html, pack_store)
+        await asyncio.to_thread(write_cached_text, acblPath, json_file, json.dumps(data_json, indent=2), pack_store)
+
+    def items():
+        for ndf,(kdf,df) in enumerate(filtered_clubs.items()):
+            if ndf < starting_nclub or ndf >= ending_nclub:
+                continue
+            for cn, url in zip(df['Club'],df['ResultUrl']):
+                html_file, json_file = club_result_files(url, cn, acbl_url)
+                yield cn, url, html_file, json_file
+
+    async with create_crawl_client(concurrency) as client:
+        await run_pipeline(items(), [(fetch, concurrency), (parse, max(1, concurrency//2)), (write, 1)])
+    print_to_log_info(f'Failed Urls: len:{len(failed_urls)} Urls:{failed_urls}')
+    print_to_log_info(f"Done: Totals: clubs:{total_clubs} urls:{counts['urls_processed']} local files read:{counts['local_files_read']}: failed urls:{len(failed_urls)} time:{round(time.time()-start_time,2)}")
+    return counts['urls_processed'], counts['local_files_read'], failed_urls
+
+
+async def get_club_results_details_data_async(urls, concurrency=ACBL_CRAWL_CONCURRENCY, parse_executor=None):
+    # get_club_results_details_data() for many urls. returns {url: details_data}. failed urls and team events are None.
+    details_data = {}
+    loop = asyncio.get_running_loop()
+
+    async def fetch(url):
+        r = await fetch_async(client, url)
+        if r is None or r.status_code != 200:
+            print_to_log_info(f'Error: status:{None if r is None else r.status_code} {url}')
+            details_data[url] = None
+            return None
+        return url, r.content
+
+    async def parse(item):
+        url, content = item
+        details_data[url] = await loop.run_in_executor(parse_executor, parse_club_results_details_data, url, content)
+
+    async with create_crawl_client(concurrency) as client:
+        await run_pipeline(urls, [(fetch, concurrency), (parse, max(1, concurrency//2))])
+    return {url:details_data.get(url) for url in urls}
+
+
 # def get_tournament_results_details_data(session_id, acbl_api_key):
 #     print_to_log_info('details url:',session_id)
 #     response = get_tournament_session_results(session_id, acbl_api_key)
@@ -481,9 +1093,8 @@ def get_tournament_sessions_from_acbl_number(acbl_number, acbl_api_key):
     return tournament_sessions_urls
 
 
-# get a single player's tournament history
-def download_tournament_player_history(player_id, acbl_api_key):
-    headers = {
+def acbl_api_headers(acbl_api_key):
+    return {
         'accept': 'application/json', 
         'Authorization': f'Bearer {acbl_api_key}',
         "User-Agent": (
@@ -492,24 +1103,40 @@ def download_tournament_player_history(player_id, acbl_api_key):
             "Chrome/124.0.0.0 Safari/537.36"
         )
     }
-    path = 'https://api.acbl.org/v1/tournament/player/history_query'
-    query = {'acbl_number':player_id,'page':1,'page_size':50,'start_date':'1900-01-01'}
+
+
+ACBL_TOURNAMENT_PLAYER_HISTORY_URL = 'https://api.acbl.org/v1/tournament/player/history_query'
+ACBL_TOURNAMENT_SESSION_URL = 'https://api.acbl.org/v1/tournament/session'
+ACBL_HISTORY_PAGE_SIZE = 50
+ACBL_HISTORY_CONCURRENCY = int(os.getenv('ACBL_HISTORY_CONCURRENCY', 8)) # concurrent history pages per player.
+
+
+def tournament_player_history_url(player_id, page=1, page_size=ACBL_HISTORY_PAGE_SIZE, start_date='1900-01-01'):
+    query = {'acbl_number':player_id,'page':page,'page_size':page_size,'start_date':start_date}
     params = urllib.parse.urlencode(query)
-    url = path+'?'+params
-    sessions_count = 0
+    return ACBL_TOURNAMENT_PLAYER_HISTORY_URL+'?'+params
+
+
+def tournament_player_history_page_count(json_response, page_size=ACBL_HISTORY_PAGE_SIZE):
+    # paginated responses have 'total' (same for every page) and usually 'last_page'.
+    if json_response.get('last_page') is not None:
+        return int(json_response['last_page'])
+    return max(1, -(-int(json_response['total'])//page_size))
+
+
+def get_tournament_player_history_page(url, headers):
+    # returns the response, None if the request keeps failing or was canceled.
     except_count = 0
-    json_responses = []
-    while url:
+    while True:
         try:
             print_to_log_info(f'url:{url}')
-            print_to_log_info(f'headers:{headers}')
-            response = requests.get(url, headers=headers)
+            response = acbl_rate_limiter.get(url, headers=headers)
             print_to_log_info(f'Status Code:{response.status_code}')
         except Exception as ex:
             print_to_log_info(f'Exception: count:{except_count} type:{type(ex).__name__} args:{ex.args}')
             if except_count > 5:
                 print_to_log_info('Except count exceeded')
-                break # skip url
+                return None # skip url
             except_count += 1
             time.sleep(1) # just in case the exception is transient
             continue # retry url
@@ -517,19 +1144,37 @@ def download_tournament_player_history(player_id, acbl_api_key):
             print_to_log_info(f"Error: {type(e).__name__} while processing file:{url}")
             print_to_log_info(traceback.format_exc())
             return None
-        else:
-            except_count = 0
+        return response
+
+
+def tournament_player_history_responses(responses):
+    # returns the json of pages up to the first failed page. status codes 400, 500, 504 skip the player's remaining pages.
+    json_responses = []
+    for url, response in responses:
+        if response is None:
+            break
         if response.status_code in [400,500,504]: # 500 is unknown response code. try skipping player
             print_to_log_info(f'Status Code:{response.status_code}: count:{len(json_responses)} skipping') # 4476921 - Thx Merle.
-            # next_page_url = None
-            # sessions_total = 0
             break
         assert response.status_code == 200, (url, response.status_code) # 401 is authorization error often because Personal Access Token has expired.
-        json_response = response.json()
-        #json_pretty = json.dumps(json_response, indent=4)
-        #print_to_log(json_pretty)
-        json_responses.append(json_response)
-        url = json_response['next_page_url']
+        json_responses.append(response.json())
+    return json_responses
+
+
+# get a single player's tournament history
+def download_tournament_player_history(player_id, acbl_api_key, start_date='1900-01-01'):
+    # the first page gives the page count. the remaining pages are requested concurrently instead of following next_page_url.
+    headers = acbl_api_headers(acbl_api_key)
+    path = ACBL_TOURNAMENT_PLAYER_HISTORY_URL
+    url = tournament_player_history_url(player_id, start_date=start_date)
+    json_responses = tournament_player_history_responses([(url, get_tournament_player_history_page(url, headers))])
+    if len(json_responses) == 0:
+        return path, json_responses
+    urls = [tournament_player_history_url(player_id, page, start_date=start_date) for page in range(2, tournament_player_history_page_count(json_responses[0])+1)]
+    if urls:
+        with ThreadPoolExecutor(max_workers=ACBL_HISTORY_CONCURRENCY) as executor:
+            responses = list(executor.map(lambda url: get_tournament_player_history_page(url, headers), urls))
+        json_responses += tournament_player_history_responses(zip(urls, responses))
     return path, json_responses
 
 
@@ -596,6 +1241,233 @@ def download_tournament_players_history(player_ids, acbl_api_key, dirPath):
         if sessions_count != sessions_total:
             print_to_log_info(f'Session count mismatch: {dirPath}: variance:{sessions_count-sessions_total}')
 
+# async tournament player history. fans out across players with shared rate limiting (acbl_rate_limiter) and keeps a
+# per-player history cache ({player_id}.history.json) whose watermark (latest session date) is used as start_date on
+# refresh so only new sessions are requested.
+
+def tournament_player_history_cache_path(dirPath, player_id):
+    return dirPath.joinpath(f'{player_id}.history.json')
+
+
+def read_tournament_player_history_cache(dirPath, player_id):
+    # returns {'player_id', 'watermark', 'fetched', 'sessions': {session_id: session}} or None.
+    path = tournament_player_history_cache_path(dirPath, player_id)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as ex:
+        print_to_log_info(f'Exception when reading history cache: {path}: {type(ex).__name__} {ex}. Refetching.')
+        return None
+
+
+def write_tournament_player_history_cache(dirPath, player_id, history):
+    # temp file then rename so an interrupted write never leaves a truncated cache.
+    # the temp name is unique so concurrent refreshes of a player never write the same temp file.
+    path = tournament_player_history_cache_path(dirPath, player_id)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(history, f, indent=2)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+async def get_tournament_player_history_page_async(client, url, headers):
+    response = await fetch_async(client, url, headers=headers)
+    print_to_log_info(f'url:{url} Status Code:{None if response is None else response.status_code}')
+    return response
+
+
+async def download_tournament_player_history_async(client, player_id, acbl_api_key, start_date='1900-01-01'):
+    # async download_tournament_player_history(). returns (path, json_responses).
+    headers = acbl_api_headers(acbl_api_key)
+    url = tournament_player_history_url(player_id, start_date=start_date)
+    json_responses = tournament_player_history_responses([(url, await get_tournament_player_history_page_async(client, url, headers))])
+    if len(json_responses) == 0:
+        return ACBL_TOURNAMENT_PLAYER_HISTORY_URL, json_responses
+    urls = [tournament_player_history_url(player_id, page, start_date=start_date) for page in range(2, tournament_player_history_page_count(json_responses[0])+1)]
+    responses = await asyncio.gather(*[get_tournament_player_history_page_async(client, url, headers) for url in urls])
+    json_responses += tournament_player_history_responses(zip(urls, responses))
+    return ACBL_TOURNAMENT_PLAYER_HISTORY_URL, json_responses
+
+
+async def refresh_tournament_player_history_async(client, player_id, acbl_api_key, dirPath):
+    """Bring a player's history cache up to date.
+
+    The watermark is only advanced when every history page was downloaded. Sessions from a partial download are still
+    cached but the same start_date is requested again on the next refresh.
+
+    Returns:
+        (history, new_sessions). new_sessions are the sessions not previously in the cache. None if the download failed.
+    """
+    history = read_tournament_player_history_cache(dirPath, player_id)
+    if history is None:
+        history = {'player_id': player_id, 'watermark': '1900-01-01', 'fetched': None, 'sessions': {}}
+    # the watermark day is requested again. sessions on that day may not all have been posted on the last fetch.
+    url, json_responses = await download_tournament_player_history_async(client, player_id, acbl_api_key, start_date=history['watermark'])
+    if len(json_responses) == 0:
+        return history, None
+    # tournament_player_history_responses() stops at the first failed page.
+    complete = len(json_responses) == tournament_player_history_page_count(json_responses[0])
+    new_sessions = []
+    for json_response in json_responses:
+        for data in json_response['data']:
+            if data['session_id'] not in history['sessions']:
+                new_sessions.append(data)
+            history['sessions'][data['session_id']] = data
+    if complete and history['sessions']:
+        history['watermark'] = max(str(d['date'])[:10] for d in history['sessions'].values())
+    elif not complete:
+        print_to_log_info(f'{player_id=}: {len(json_responses)} of {tournament_player_history_page_count(json_responses[0])} history pages downloaded. watermark stays {history["watermark"]}')
+    history['fetched'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    await asyncio.to_thread(write_tournament_player_history_cache, dirPath, player_id, history)
+    return history, new_sessions
+
+
+async def download_tournament_players_history_async(player_ids, acbl_api_key, dirPath, concurrency=ACBL_CRAWL_CONCURRENCY):
+    """Async download_tournament_players_history(). Refreshes each player's history cache and writes {session_id}.session.json
+    for every cached session that isn't already on disk, so sessions which failed to download on an earlier run are retried.
+    Players, history pages and sessions are all fetched concurrently.
+
+    Returns:
+        Dict of counts: players, failed_players, new_sessions, sessions_written.
+    """
+    start_time = time.time()
+    dirPath.mkdir(parents=True, exist_ok=True)
+    counts = defaultdict(int)
+    headers = acbl_api_headers(acbl_api_key)
+
+    async def refresh(player_id):
+        history, new_sessions = await refresh_tournament_player_history_async(client, player_id, acbl_api_key, dirPath)
+        counts['players'] += 1
+        if new_sessions is None: # skip player_id's generating errors. e.g. player_id 5103045, 5103045, 5103053
+            counts['failed_players'] += 1
+            return None
+        counts['new_sessions'] += len(new_sessions)
+        print_to_log_info(f"{counts['players']}/{len(player_ids)} {player_id=} sessions:{len(history['sessions'])} new:{len(new_sessions)} rate:{round(counts['players']/(time.time()-start_time),2)} players/s")
+        # not just new_sessions. the history cache is written before its sessions are downloaded.
+        return [session_id for session_id in history['sessions'] if not dirPath.joinpath(session_id+'.session.json').exists()]
+
+    async def fetch_session(session_id):
+        url = ACBL_TOURNAMENT_SESSION_URL+'?'+urllib.parse.urlencode({'id':session_id,'full_monty':1})
+        response = await fetch_async(client, url, headers=headers)
+        assert response is not None and response.status_code == 200, (url, None if response is None else response.status_code)
+        return session_id, response.json()
+
+    async def write_session(item):
+        session_id, session_json = item
+        filePath_json = dirPath.joinpath(session_id+'.session.json')
+        print_to_log_info(f'Writing:{filePath_json} len:{len(session_json)}')
+        await asyncio.to_thread(filePath_json.write_text, json.dumps(session_json, indent=4), encoding='utf-8')
+        counts['sessions_written'] += 1
+
+    player_ids = [player_id for player_id in sorted(player_ids) if not (player_id.startswith('tmp:') or player_id.startswith('#'))] # somehow #* crept into player_id
+    async with create_crawl_client(concurrency) as client:
+        await run_pipeline(player_ids, [(refresh, concurrency), (fetch_session, concurrency), (write_session, 1)])
+    print_to_log_info(f"Done: {dict(counts)} time:{round(time.time()-start_time,2)}")
+    return dict(counts)
+
+
+# incremental club results sync. each club's highest loaded ResultID (its watermark) is kept in the club_sync_state table
+# of the club results db. a sync fetches the club listings, requests only results newer than the watermark and appends
+# them to the db. old result files are neither checked nor re-loaded.
+
+def create_club_sync_state_table(connection):
+    connection.execute('CREATE TABLE IF NOT EXISTS club_sync_state (club TEXT NOT NULL PRIMARY KEY, max_result_id INT NOT NULL, synced_at TEXT NOT NULL)')
+
+
+def read_club_sync_state(connection):
+    # returns {club: max_result_id}
+    return {club:max_result_id for club,max_result_id in connection.execute('SELECT club, max_result_id FROM club_sync_state')}
+
+
+def write_club_sync_state(connection, watermarks):
+    synced_at = time.strftime('%Y-%m-%d %H:%M:%S')
+    connection.executemany('INSERT INTO club_sync_state VALUES (?,?,?) ON CONFLICT(club) DO UPDATE SET max_result_id=excluded.max_result_id, synced_at=excluded.synced_at',
+                           [(str(club), int(max_result_id), synced_at) for club,max_result_id in watermarks.items()])
+
+
+def cached_max_result_id(acblPath, club, pack_store=None):
+    # watermark of a club without sync state. the highest ResultID in its cache directory, which a full build has loaded.
+    if pack_store is not None:
+        files = [pathlib.PurePosixPath(key) for key in pack_store.keys(f'club-results/{club}/details/', '.data.json')]
+    else:
+        files = acblPath.joinpath(f'club-results/{club}/details').glob('*.data.json')
+    return max((int(file.name.split('.')[0]) for file in files if file.name.split('.')[0].isdigit()), default=0)
+
+
+def filter_new_club_results(dfs, watermarks):
+    # rows of each club's results listing (extract_club_games()) with a ResultID above the club's watermark, oldest first.
+    new_dfs = {}
+    for cn,df in dfs.items():
+        df = df[df['ResultID'].astype(int) > watermarks.get(cn, 0)]
+        if len(df):
+            new_dfs[cn] = df.iloc[df['ResultID'].astype(int).argsort()]
+    return new_dfs
+
+
+async def sync_new_club_results_async(dfs, acbl_url, acblPath, db_file_path, concurrency=ACBL_CRAWL_CONCURRENCY, pack_store=None, max_workers=0):
+    """Download and load the results of each club's listing that are newer than its watermark, then advance the watermarks.
+
+    Args:
+        dfs: {club: results listing} from extract_club_games().
+        db_file_path: Club results db. Its tables must exist. club_sync_state is created if needed.
+        max_workers: Worker processes for club_results_json_to_db(). A daily sync is small so the default loads in this process.
+
+    Returns:
+        Dict of counts: clubs, new_results, files_loaded, rows.
+    """
+    start_time = time.time()
+    connection = sqlite3.connect(db_file_path)
+    create_club_sync_state_table(connection)
+    state = read_club_sync_state(connection)
+    watermarks = {cn:state[cn] if cn in state else cached_max_result_id(acblPath, cn, pack_store) for cn in dfs}
+    new_dfs = filter_new_club_results(dfs, watermarks)
+    new_results = sum(len(df) for df in new_dfs.values())
+    print_to_log_info(f"Sync: clubs:{len(dfs)} clubs with new results:{len(new_dfs)} new results:{new_results}")
+
+    no_data_urls = set()
+    total_urls, local_files_read, failed_urls = await extract_club_result_json_async(new_dfs, 0, len(new_dfs), acblPath, acbl_url, concurrency=concurrency, pack_store=pack_store, no_data_urls=no_data_urls)
+    json_files = {}
+    for cn,df in new_dfs.items():
+        for url,result_id in zip(df['ResultUrl'],df['ResultID']):
+            html_file, json_file = club_result_files(url, cn, acbl_url)
+            if cached_exists(acblPath, json_file, pack_store):
+                json_files[json_file] = (cn, int(result_id))
+    if pack_store is not None:
+        pack_store.commit() # the loader reads the pack through its own connection
+    load_files = {json_file if pack_store is not None else acblPath.joinpath(json_file):json_file for json_file in json_files} # keys or paths
+    loaded_files = []
+    files_loaded, rows = club_results_json_to_db(connection, list(load_files), max_workers=max_workers, pack_path=None if pack_store is None else pack_store.path, loaded_files=loaded_files)
+    loaded = {load_files[file] for file in loaded_files}
+
+    # advance each watermark to just before its oldest result that wasn't loaded, so it's retried next sync.
+    # this covers failed downloads and parse or write errors which the pipeline only logs.
+    # fetched pages without result data are passed over.
+    for cn,df in new_dfs.items():
+        for url,result_id in zip(df['ResultUrl'],df['ResultID']):
+            html_file, json_file = club_result_files(url, cn, acbl_url)
+            if json_file not in loaded and url not in no_data_urls:
+                break
+            watermarks[cn] = int(result_id)
+    write_club_sync_state(connection, watermarks)
+    connection.commit()
+    connection.close()
+    counts = {'clubs': len(dfs), 'new_results': new_results, 'files_loaded': files_loaded, 'rows': rows}
+    print_to_log_info(f"Sync done: {counts} time:{round(time.time()-start_time,2)}")
+    return counts
+
+
+async def sync_club_results_async(cns, base_url, acbl_url, acblPath, db_file_path, concurrency=ACBL_CRAWL_CONCURRENCY, pack_store=None, max_workers=0):
+    # fetch the current results listing of each club and sync its new results into the db.
+    htmls, total_clubs, failed_urls = await get_club_results_async(cns, base_url, acbl_url, acblPath, read_local=False, concurrency=concurrency, pack_store=pack_store)
+    dfs, ClubInfos = await asyncio.to_thread(extract_club_games, htmls, acbl_url)
+    return await sync_new_club_results_async(dfs, acbl_url, acblPath, db_file_path, concurrency=concurrency, pack_store=pack_store, max_workers=max_workers)
+
+
 # def post_with_auth_token(url, data, auth_token, headers=None):
 #     """
 #     Performs a POST request with authorization bearer token.
@@ -0,0 +1,32 @@
+from collections import defaultdict
+
+from mlBridgeLib.mlBridgeLib import json_to_sql_walk
+
+
+def club_result(event_id, updated_at):
+    # shaped like a my.acbl.org club result: nested objects with ids, objects without ids and lists of values.
+    return {
+        'id': event_id, 'type': 'PAIRS', 'name': "Mon Aft O'Brien Pairs", 'created_at': '2024-01-01 10:00:00', 'updated_at': updated_at,
+        'club': {'id': 108571, 'name': 'Ft Lauderdale Bridge Club', 'created_at': '2020-01-01', 'updated_at': '2020-01-01'},
+        'bbo_tournament_id': None,
+        'sessions': [{
+            'id': event_id*10+n, 'number': n, 'is_online': False, 'score_factor': 0.5,
+            'hand_records': [{'id': event_id*100+n*10+b, 'board': b, 'north_spades': 'AKQ'} for b in range(1, 4)],
+            'settings': {'movement': 'Mitchell', 'tables': [5, 6]},
+        } for n in range(1, 3)],
+        'directors': ['Jane', 'Joe'],
+    }
+
+def create_tables(connection, data_jsons):
+    table_columns = defaultdict(dict)
+    for data_json in data_jsons:
+        tables = defaultdict(lambda :defaultdict(dict))
+        json_to_sql_walk(tables,"events","","",data_json,['id'])
+        for table,ids in tables.items():
+            table_columns[table].update(dict.fromkeys(c for row in ids.values() for c in row))
+    for table,columns in table_columns.items():
+        connection.execute(f'CREATE TABLE "{table}" ('+','.join(f'"{c}" INT NOT NULL PRIMARY KEY' if c == 'id' else f'"{c}" VARCHAR NULL' for c in columns)+')')
+    return list(table_columns)
+
+def dump(connection, tables):
+    return {table: sorted(map(repr, connection.execute(f'SELECT * FROM "{table}"').fetchall())) for table in tables}
@@ -0,0 +1,93 @@
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import acbllib.acbllib as acbllib
+from acbllib.acblRateLimitLib import RateLimiter
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # stand-in for my.acbl.org club results listings and result details pages.
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        if self.path.startswith('/club-results/details/'):
+            result_id = int(self.path.rsplit('/', 1)[-1])
+            data = {'id': result_id, 'bbo_tournament_id': None, 'type': 'PAIRS'}
+            if result_id in self.server.no_data_ids:
+                script = "\nvar other = 0;\n"
+            elif result_id in self.server.bad_json_ids:
+                script = "\nvar data = {bad};\n"
+            else:
+                script = f"\nvar data = {json.dumps(data)};\n"
+            html = f"<html><body><script>{script}</script>{'x'*200}</body></html>"
+        else:
+            html = f"<html><body><table><tr><td>{self.path}</td></tr></table>{'x'*200}</body></html>"
+        body = html.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.paths = []
+    server.no_data_ids = set()
+    server.bad_json_ids = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(acbllib, 'acbl_rate_limiter', RateLimiter(rate=1000, max_rate=1000, burst=10, max_in_flight=8))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+class StandInApiHandler(BaseHTTPRequestHandler):
+    # stand-in for api.acbl.org tournament player history (paginated) and session results.
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        self.server.queries.append((url.path, query))
+        if query.get('page') in self.server.failing_pages or query.get('id') in self.server.failing_sessions:
+            self.send_response(500)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if url.path == '/history_query':
+            sessions = [s for s in self.server.sessions if s['date'] >= query['start_date']]
+            page, page_size = int(query['page']), int(query['page_size'])
+            last_page = max(1, -(-len(sessions)//page_size))
+            data = {'total': len(sessions), 'last_page': last_page, 'data': sessions[(page-1)*page_size:page*page_size],
+                    'next_page_url': None if page >= last_page else 'unused'}
+        else:
+            data = {'id': query['id'], 'boards': []}
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_api(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInApiHandler)
+    server.queries = []
+    server.failing_pages = set() # history pages and session ids which get a 500
+    server.failing_sessions = set()
+    server.sessions = [{'session_id': f'2401{i:03}-1', 'date': f'2024-01-{i%28+1:02}'} for i in range(120)]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(acbllib, 'ACBL_TOURNAMENT_PLAYER_HISTORY_URL', api_url+'/history_query')
+    monkeypatch.setattr(acbllib, 'ACBL_TOURNAMENT_SESSION_URL', api_url+'/session')
+    monkeypatch.setattr(acbllib, 'acbl_rate_limiter', RateLimiter(rate=1000, max_rate=1000, burst=10, max_in_flight=8))
+    yield server
+    server.shutdown()
+    server.server_close()
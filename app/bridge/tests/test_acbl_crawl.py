@@ -0,0 +1,80 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import acbllib.acbllib as acbllib
+
+
+def test_crawl_club_results_and_resume(stand_in_server, tmp_path):
+    acbl_url = f"http://127.0.0.1:{stand_in_server.server_address[1]}/"
+    cns = [108571, 275966]
+    htmls, total_clubs, failed_urls = asyncio.run(acbllib.get_club_results_async(cns, acbl_url+'club-results/', acbl_url, tmp_path, read_local=True))
+    assert list(htmls) == ['108571', '275966'] and total_clubs == 2 and failed_urls == []
+    assert tmp_path.joinpath('club-results/108571/108571.html').exists()
+
+    filtered_clubs = {str(cn): pd.DataFrame({'Club': [str(cn)]*3, 'ResultUrl': [f"{acbl_url}club-results/details/{cn*10+i}" for i in range(3)]}) for cn in cns}
+    total_urls, local_files_read, failed_urls = asyncio.run(acbllib.extract_club_result_json_async(filtered_clubs, 0, len(filtered_clubs), tmp_path, acbl_url))
+    assert (total_urls, local_files_read, failed_urls) == (6, 0, [])
+    json_path = tmp_path.joinpath('club-results/108571/details/1085711.data.json')
+    assert json.loads(json_path.read_text(encoding='utf-8'))['id'] == 1085711
+    assert tmp_path.joinpath('club-results/108571/details/1085711.html').exists()
+
+    # second run resumes from the local cache without fetching
+    fetched = len(stand_in_server.paths)
+    assert asyncio.run(acbllib.extract_club_result_json_async(filtered_clubs, 0, len(filtered_clubs), tmp_path, acbl_url)) == (6, 6, [])
+    htmls_local, _, _ = asyncio.run(acbllib.get_club_results_async(cns, acbl_url+'club-results/', acbl_url, tmp_path, read_local=True))
+    assert htmls_local == htmls
+    assert len(stand_in_server.paths) == fetched
+
+
+def test_tournament_player_history_pages(stand_in_api):
+    url, json_responses = acbllib.download_tournament_player_history('2663279', 'key')
+    assert len(json_responses) == 3 # 120 sessions, 50 per page
+    assert [d['session_id'] for r in json_responses for d in r['data']] == [s['session_id'] for s in stand_in_api.sessions]
+
+def test_tournament_players_history_watermark(stand_in_api, tmp_path):
+    counts = asyncio.run(acbllib.download_tournament_players_history_async(['2663279', 'tmp:1'], 'key', tmp_path))
+    assert counts == {'players': 1, 'new_sessions': 120, 'sessions_written': 120}
+    assert len(list(tmp_path.glob('*.session.json'))) == 120
+    history = acbllib.read_tournament_player_history_cache(tmp_path, '2663279')
+    assert history['watermark'] == '2024-01-28'
+
+    # refresh only requests sessions since the watermark
+    stand_in_api.sessions.append({'session_id': '2402001-1', 'date': '2024-02-01'})
+    stand_in_api.queries.clear()
+    counts = asyncio.run(acbllib.download_tournament_players_history_async(['2663279'], 'key', tmp_path))
+    assert counts == {'players': 1, 'new_sessions': 1, 'sessions_written': 1}
+    assert {q['start_date'] for path, q in stand_in_api.queries if path == '/history_query'} == {'2024-01-28'}
+    assert acbllib.read_tournament_player_history_cache(tmp_path, '2663279')['watermark'] == '2024-02-01'
+
+def test_tournament_player_history_cache_writes(tmp_path):
+    histories = [{'player_id': '2663279', 'watermark': f'2024-01-{n:02}', 'sessions': {f'2401{m:03}-1': {} for m in range(2000)}} for n in range(1, 17)]
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda history: acbllib.write_tournament_player_history_cache(tmp_path, '2663279', history), histories))
+    history = acbllib.read_tournament_player_history_cache(tmp_path, '2663279')
+    assert history in histories
+    with pytest.raises(TypeError):
+        acbllib.write_tournament_player_history_cache(tmp_path, '2663279', {'watermark': object()}) # not json serializable
+    assert acbllib.read_tournament_player_history_cache(tmp_path, '2663279') == history
+    assert list(tmp_path.glob('*.tmp')) == []
+
+def test_tournament_players_history_retries_failures(stand_in_api, tmp_path):
+    # the last history page and one session fail. the watermark isn't advanced and the session is retried next run.
+    stand_in_api.failing_pages.add('3')
+    stand_in_api.failing_sessions.add('2401005-1')
+    counts = asyncio.run(acbllib.download_tournament_players_history_async(['2663279'], 'key', tmp_path))
+    assert counts == {'players': 1, 'new_sessions': 100, 'sessions_written': 99}
+    history = acbllib.read_tournament_player_history_cache(tmp_path, '2663279')
+    assert history['watermark'] == '1900-01-01' and len(history['sessions']) == 100
+
+    stand_in_api.failing_pages.clear()
+    stand_in_api.failing_sessions.clear()
+    stand_in_api.queries.clear()
+    counts = asyncio.run(acbllib.download_tournament_players_history_async(['2663279'], 'key', tmp_path))
+    assert counts == {'players': 1, 'new_sessions': 20, 'sessions_written': 21}
+    assert {q['start_date'] for path, q in stand_in_api.queries if path == '/history_query'} == {'1900-01-01'}
+    assert len(list(tmp_path.glob('*.session.json'))) == 120
+    assert acbllib.read_tournament_player_history_cache(tmp_path, '2663279')['watermark'] == '2024-01-28'
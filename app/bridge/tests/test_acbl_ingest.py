@@ -0,0 +1,90 @@
+import json
+import sqlite3
+
+import pytest
+
+import acbllib.acbllib as acbllib
+from app.bridge.tests.acbl_helpers import club_result, create_tables, dump
+
+
+def test_json_to_db_matches_sql_scripts(tmp_path):
+    data_jsons = [club_result(1, '2024-01-02'), club_result(2, '2024-01-02'), club_result(1, '2024-01-03')] # revised result of event 1
+    data_jsons[2]['name'] = 'revised'
+    json_files = []
+    for n,data_json in enumerate(data_jsons):
+        json_files.append(tmp_path.joinpath(f'club-results/108571/details/{n}.data.json'))
+        json_files[-1].parent.mkdir(parents=True, exist_ok=True)
+        json_files[-1].write_text(json.dumps(data_json), encoding='utf-8')
+
+    # old path: json -> .sql files -> executescript
+    acbllib.club_results_json_to_sql(json_files)
+    connection_sql = sqlite3.connect(':memory:')
+    tables = create_tables(connection_sql, data_jsons)
+    for json_file in json_files:
+        connection_sql.executescript(json_file.with_suffix('.sql').read_text(encoding='utf-8'))
+
+    connection_json = sqlite3.connect(':memory:')
+    create_tables(connection_json, data_jsons)
+    assert acbllib.club_results_json_to_db(connection_json, json_files, max_workers=0) == (3, 36) # 12 rows per file
+
+    assert dump(connection_json, tables) == dump(connection_sql, tables)
+    assert connection_json.execute('SELECT name FROM events WHERE id=1').fetchone() == ('revised',)
+
+def test_bulk_load_matches_sequential_load(tmp_path):
+    data_jsons = [club_result(event_id, '2024-01-02') for event_id in range(1, 7)]
+    acblPath = tmp_path.joinpath('acbl')
+    json_files = []
+    for n,data_json in enumerate(data_jsons):
+        json_files.append(acblPath.joinpath(f'club-results/{108571+n%3}/details/{n}.data.json'))
+        json_files[-1].parent.mkdir(parents=True, exist_ok=True)
+        json_files[-1].write_text(json.dumps(data_json), encoding='utf-8')
+    connection = sqlite3.connect(':memory:')
+    tables = create_tables(connection, data_jsons)
+    schema = connection.execute("SELECT group_concat(sql, ';\n') FROM sqlite_master WHERE type='table'").fetchone()[0]
+    create_tables_sql_file = tmp_path.joinpath('schema.sql')
+    create_tables_sql_file.write_text(f'PRAGMA journal_mode=WAL;\n{schema};\nCREATE INDEX hand_records_board ON hand_records (board);\n', encoding='utf-8')
+    acbllib.club_results_json_to_db(connection, sorted(json_files), max_workers=0)
+
+    db_file_path = tmp_path.joinpath('club_results.sqlite')
+    assert acbllib.club_results_bulk_load_sql_db(db_file_path, create_tables_sql_file, acblPath, max_workers=2) == (6, 72)
+    assert list(tmp_path.glob('*.shard*')) == []
+    with sqlite3.connect(db_file_path) as db:
+        assert dump(db, tables) == dump(connection, tables)
+        assert db.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='hand_records_board'").fetchone() is not None
+        assert db.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+
+def test_bulk_load_updates_existing_db_and_fails_whole(tmp_path):
+    acblPath = tmp_path.joinpath('acbl')
+    def write(event_ids):
+        for event_id in event_ids:
+            json_file = acblPath.joinpath(f'club-results/{108571+event_id%3}/details/{event_id}.data.json')
+            json_file.parent.mkdir(parents=True, exist_ok=True)
+            json_file.write_text(json.dumps(club_result(event_id, '2024-01-02')), encoding='utf-8')
+    write(range(1, 7))
+    connection = sqlite3.connect(':memory:')
+    tables = create_tables(connection, [club_result(1, '2024-01-02')])
+    schema = connection.execute("SELECT group_concat(sql, ';\n') FROM sqlite_master WHERE type='table'").fetchone()[0].replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS')
+    create_tables_sql_file = tmp_path.joinpath('schema.sql')
+    create_tables_sql_file.write_text(f'PRAGMA journal_mode=WAL;\n{schema};\n', encoding='utf-8')
+    db_file_path = tmp_path.joinpath('club_results.sqlite')
+    assert acbllib.club_results_bulk_load_sql_db(db_file_path, create_tables_sql_file, acblPath, max_workers=2) == (6, 72)
+
+    # rows which only exist in the db are kept by an update (delete_db=False).
+    with sqlite3.connect(db_file_path) as db:
+        db.execute("INSERT INTO events (id, name) VALUES (999, 'only in db')")
+    db.close()
+    write([7])
+    assert acbllib.club_results_bulk_load_sql_db(db_file_path, create_tables_sql_file, acblPath, max_workers=2) == (7, 84)
+    with sqlite3.connect(db_file_path) as db:
+        assert [row[0] for row in db.execute('SELECT id FROM events ORDER BY id')] == [1, 2, 3, 4, 5, 6, 7, 999]
+        before = dump(db, tables)
+    db.close()
+
+    # a failed shard raises before the merge. the db is unchanged and no shard or temp files are left behind.
+    create_tables_sql_file.write_text(f'{schema};\nCREATE TABLE broken (a INT) WITHOUT ROWID;\n', encoding='utf-8')
+    with pytest.raises(RuntimeError, match='shards failed'):
+        acbllib.club_results_bulk_load_sql_db(db_file_path, create_tables_sql_file, acblPath, max_workers=2)
+    with sqlite3.connect(db_file_path) as db:
+        assert dump(db, tables) == before
+    db.close()
+    assert list(tmp_path.glob('*.shard*')) == [] and list(tmp_path.glob('*.tmp')) == []
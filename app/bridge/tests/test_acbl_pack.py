@@ -0,0 +1,105 @@
+import asyncio
+import json
+import sqlite3
+
+import pandas as pd
+
+import acbllib.acbllib as acbllib
+import acbllib.acblPackLib as acblPackLib
+from acbllib.acblPackLib import PackStore, import_tree
+from app.bridge.tests.acbl_helpers import club_result, create_tables, dump
+
+
+def test_pack_store_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(acblPackLib, 'SEGMENT_MAX_BYTES', 1000)
+    monkeypatch.setattr(acblPackLib, 'COMMIT_EVERY', 25)
+    html = '<html>'+'club results '*200+'</html>'
+    with PackStore(tmp_path) as store:
+        assert store.put_text('club-results/108571/108571.html', html)
+        assert not store.put_text('club-results/275966/275966.html', html) # same content is stored once
+        for n in range(20):
+            store.put('club-results/108571/details/%d.data.json' % n, json.dumps({'id': n, 'pad': 'x'*100*n}).encode('utf-8'))
+        store.delete('club-results/108571/details/0.data.json')
+        store.delete('club-results/108571/details/1.data.json')
+        store.delete('club-results/108571/details/2.data.json') # the 25th change
+        # deletes commit every COMMIT_EVERY changes like puts do, so readers see them and the write lock is released.
+        with PackStore(tmp_path, readonly=True) as reader:
+            assert not reader.exists('club-results/108571/details/2.data.json') and reader.exists('club-results/108571/details/3.data.json')
+        assert store.get_text('club-results/275966/275966.html') == html
+        assert store.size('club-results/108571/108571.html') == len(html)
+        assert store.get('missing') is None and not store.exists('club-results/108571/details/0.data.json')
+        assert store.stats()['segments'] > 1
+
+    # reopened read-only, as worker processes do
+    with PackStore(tmp_path, readonly=True) as store:
+        assert store.keys('club-results/108571/', '.data.json') == sorted('club-results/108571/details/%d.data.json' % n for n in range(3, 20))
+        assert json.loads(store.get('club-results/108571/details/19.data.json'))['id'] == 19
+        assert len(dict(store.items(suffix='.html'))) == 2
+
+def test_crawl_into_pack_and_load(stand_in_server, tmp_path):
+    acbl_url = f"http://127.0.0.1:{stand_in_server.server_address[1]}/"
+    filtered_clubs = {'108571': pd.DataFrame({'Club': ['108571']*3, 'ResultUrl': [f"{acbl_url}club-results/details/{n}" for n in range(3)]})}
+    with PackStore(tmp_path.joinpath('pack')) as store:
+        assert asyncio.run(acbllib.extract_club_result_json_async(filtered_clubs, 0, 1, tmp_path, acbl_url, pack_store=store)) == (3, 0, [])
+        assert acbllib.extract_club_result_json(None, filtered_clubs, 0, 1, 0, tmp_path, acbl_url, pack_store=store) == (3, 3, [])
+        assert store.keys(suffix='.html') == ['club-results/108571/details/%d.html' % n for n in range(3)]
+    assert not tmp_path.joinpath('club-results').exists()
+
+def test_load_from_pack_matches_files(tmp_path):
+    data_jsons = [club_result(event_id, '2024-01-02') for event_id in range(1, 4)]
+    acblPath = tmp_path.joinpath('acbl')
+    for n,data_json in enumerate(data_jsons):
+        json_file = acblPath.joinpath(f'club-results/108571/details/{n}.data.json')
+        json_file.parent.mkdir(parents=True, exist_ok=True)
+        json_file.write_text(json.dumps(data_json), encoding='utf-8')
+    pack_path = tmp_path.joinpath('pack')
+    with PackStore(pack_path) as store:
+        assert import_tree(acblPath, store)['keys'] == 3
+
+    connection_files = sqlite3.connect(':memory:')
+    tables = create_tables(connection_files, data_jsons)
+    acbllib.club_results_json_to_db(connection_files, acbllib.list_club_results_files(acblPath, '.data.json'), max_workers=0)
+    connection_pack = sqlite3.connect(':memory:')
+    create_tables(connection_pack, data_jsons)
+    json_files = acbllib.list_club_results_files(acblPath, '.data.json', pack_path)
+    assert json_files == ['club-results/108571/details/%d.data.json' % n for n in range(3)]
+    assert acbllib.club_results_json_to_db(connection_pack, json_files, max_workers=0, pack_path=pack_path) == (3, 36)
+    assert dump(connection_pack, tables) == dump(connection_files, tables)
+
+def test_incremental_sync(stand_in_server, tmp_path):
+    acbl_url = f"http://127.0.0.1:{stand_in_server.server_address[1]}/"
+    db_file_path = tmp_path.joinpath('club_results.sqlite')
+    with sqlite3.connect(db_file_path) as connection:
+        connection.execute('CREATE TABLE events (id INT NOT NULL PRIMARY KEY, type VARCHAR NULL, bbo_tournament_id VARCHAR NULL)')
+    def listing(result_ids):
+        return {'108571': pd.DataFrame({'Club': '108571', 'ResultID': [str(n) for n in result_ids], 'ResultUrl': [f"{acbl_url}club-results/details/{n}" for n in result_ids]})}
+
+    with PackStore(tmp_path.joinpath('pack')) as store:
+        # results up to 11 are already in the cache (and db) from a full build
+        store.put_text('club-results/108571/details/11.data.json', '{}')
+        counts = asyncio.run(acbllib.sync_new_club_results_async(listing([13, 10, 11, 12]), acbl_url, tmp_path, db_file_path, pack_store=store))
+        assert counts == {'clubs': 1, 'new_results': 2, 'files_loaded': 2, 'rows': 2}
+        assert sorted(stand_in_server.paths) == ['/club-results/details/12', '/club-results/details/13']
+
+        stand_in_server.paths.clear()
+        counts = asyncio.run(acbllib.sync_new_club_results_async(listing([14, 13, 12]), acbl_url, tmp_path, db_file_path, pack_store=store))
+        assert counts == {'clubs': 1, 'new_results': 1, 'files_loaded': 1, 'rows': 1}
+        assert stand_in_server.paths == ['/club-results/details/14']
+
+        # 15 has no result data and is passed over. 16 fails to parse so the watermark stops before it though 17 loads.
+        stand_in_server.no_data_ids.add(15)
+        stand_in_server.bad_json_ids.add(16)
+        counts = asyncio.run(acbllib.sync_new_club_results_async(listing([17, 16, 15, 14]), acbl_url, tmp_path, db_file_path, pack_store=store))
+        assert counts == {'clubs': 1, 'new_results': 3, 'files_loaded': 1, 'rows': 1}
+        with sqlite3.connect(db_file_path) as connection:
+            assert connection.execute('SELECT max_result_id FROM club_sync_state').fetchall() == [(15,)]
+
+        stand_in_server.bad_json_ids.clear()
+        stand_in_server.paths.clear()
+        counts = asyncio.run(acbllib.sync_new_club_results_async(listing([17, 16, 15, 14]), acbl_url, tmp_path, db_file_path, pack_store=store))
+        assert counts['new_results'] == 2
+        assert stand_in_server.paths == ['/club-results/details/16']
+
+    with sqlite3.connect(db_file_path) as connection:
+        assert connection.execute('SELECT id FROM events ORDER BY id').fetchall() == [(12,), (13,), (14,), (16,), (17,)]
+        assert connection.execute('SELECT club, max_result_id FROM club_sync_state').fetchall() == [('108571', 17)]
@@ -1,6 +1,14 @@
 from fastapi.testclient import TestClient
 from app.main import app
-from unittest.mock import patch
+from unittest.mock import patch, AsyncMock
+import asyncio
+import io
+import time
+import httpx
+import app.services.ffbridge_service as ffbridge_service
+import app.services.job_service as job_service
+from mlBridgeLib.mlBridgeHrsCacheLib import HrsCacheStore
+from app.services.response_cache import response_cache
 from typing import Optional, Dict, Any
 import polars as pl
 
@@ -58,6 +66,74 @@ def test_get_ffbridge_data(mock_create_df):
     assert "success" in data
     assert data["success"] is True
 
+FFBRIDGE_PAIR_URL = "/ffbridge.fr/competitions/results/groups/7878/sessions/107118/pairs/3976783"
+
+@patch('app.main.create_df_from_group_session_pair', new_callable=AsyncMock)
+def test_get_ffbridge_data_arrow(mock_create_df):
+    """Test Arrow IPC content negotiation on the FFBridge data endpoint"""
+    df = mock_create_df_from_group_session_pair("7878", "107118", "3976783")
+    mock_create_df.return_value = df
+
+    response = client.get(FFBRIDGE_PAIR_URL, headers={"Accept": "application/vnd.apache.arrow.stream"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert pl.read_ipc_stream(io.BytesIO(response.content)).equals(df)
+
+    response = client.get(FFBRIDGE_PAIR_URL, headers={"Accept": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert pl.read_ndjson(io.BytesIO(response.content)).equals(df)
+
+    response = client.get(FFBRIDGE_PAIR_URL)
+    assert response.status_code == 200
+    assert response.json() == {"success": True, "data": df.to_dict(as_series=False)}
+
+def mock_lancelot_handler(request: httpx.Request) -> httpx.Response:
+    """Mock api-lancelot.ffbridge.fr. Teams 1-3 are in the ranking. Team 4 is only found as team 3's opponent."""
+    path = request.url.path
+    if path.endswith("/ranking"):
+        return httpx.Response(200, json=[{"rank": i, "team": {"id": i}} for i in [1, 2, 3]])
+    team_id = int(path.split("/")[3])
+    if path.endswith("/scores"):
+        opponent = 4 if team_id == 3 else 10 + team_id
+        return httpx.Response(200, json=[{
+            "board": {"id": board}, "boardNumber": board,
+            "lineup": {"segment": {"game": {"homeTeam": {"id": team_id, "orientation": "NS"}, "awayTeam": {"id": opponent, "orientation": "EW"}}}},
+            "contract": "4H", "declarer": "N", "result": "="
+        } for board in [1, 2]])
+    if team_id > 4:
+        return httpx.Response(404)
+    return httpx.Response(200, json={
+        "orientation": "NS", "section": "A", "startTableNumber": team_id, "id": team_id, "label": str(team_id),
+        "player1": {"id": 100+team_id, "firstName": "A", "lastName": "B"}, "player2": {"id": 200+team_id, "firstName": "C", "lastName": "D"}
+    })
+
+def test_get_ffbridge_session_data():
+    """Test the FFBridge session endpoint combines every discovered pair"""
+    response_cache.clear()
+    with patch.object(ffbridge_service, '_client', httpx.AsyncClient(transport=httpx.MockTransport(mock_lancelot_handler))):
+        response = client.get("/ffbridge.fr/competitions/results/groups/7878/sessions/107118", headers={"Accept": "application/vnd.apache.arrow.stream"})
+    response_cache.clear()
+    assert response.status_code == 200
+    df = pl.read_ipc_stream(io.BytesIO(response.content))
+    assert df['team_id'].unique().sort().to_list() == [1, 2, 3, 4]
+    assert df.height == 8
+    assert df['team_session_id'].struct.field('session_id').unique().to_list() == [107118]
+
+def test_ffbridge_client_scoped_outside_app():
+    """Without the app lifespan each call gets its own client, shared by its pair fetches and closed before its event loop ends"""
+    response_cache.clear()
+    clients = []
+    def create_client():
+        clients.append(httpx.AsyncClient(transport=httpx.MockTransport(mock_lancelot_handler)))
+        return clients[-1]
+    with patch.object(ffbridge_service, 'create_client', create_client):
+        for _ in range(2):
+            df = asyncio.run(ffbridge_service.create_df_from_group_session.uncached("7878", "107118"))
+            assert df['team_id'].unique().sort().to_list() == [1, 2, 3, 4]
+    response_cache.clear()
+    assert len(clients) == 2 and all(c.is_closed for c in clients)
+    assert ffbridge_service._client is None
+
 # TODO: re-Implement test for invalid IDs
 def test_get_ffbridge_data_invalid():
     """Test the FFBridge data endpoint with invalid IDs"""
@@ -175,4 +251,51 @@ def test_get_acbl_tournament_session_valid(mock_get_session):
     assert "sections" in data["data"]
 
 
-    
\ No newline at end of file
+    
+def test_augment_job_lifecycle():
+    """Test job submission, status polling and failure reporting. Board results without PBN fail in the worker."""
+    response = client.post("/jobs/augment?sd_productions=10", json={"Board": [1, 2]})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["location"] == f"/jobs/{job_id}"
+
+    for _ in range(300):
+        status = client.get(f"/jobs/{job_id}").json()
+        if status["status"] in ("done", "failed"):
+            break
+        time.sleep(0.1)
+    assert status["status"] == "failed"
+    assert status["error"], status
+
+    response = client.get(f"/jobs/{job_id}/result")
+    assert response.status_code == 500
+    assert client.get("/jobs/unknown").status_code == 404
+
+def test_augment_job_done(tmp_path):
+    """Test a job which completes. The result is fetched as Arrow and the job's DD results land in the shared hrs cache"""
+    pbn = "N:T5.J98643.K95.76 432.KQ5.863.T984 86.AT72.QJT7.AKQ AKQJ97..A42.J532"
+    board_results = {
+        "session_id": [1, 1], "Board": [1, 1], "PBN": [pbn, pbn], "Dealer": ["N", "N"], "Vul": ["None", "None"],
+        "Contract": ["4SE", "3NTN"], "Result": [0, -1], "Score_NS": [-420, -50], "Score_EW": [420, 50],
+        **{f"Player_Name_{d}": ["a", "b"] for d in "NESW"}, **{f"Player_ID_{d}": ["1", "2"] for d in "NESW"},
+    }
+    with patch.object(job_service, 'HRS_CACHE_DIR', str(tmp_path)):
+        response = client.post("/jobs/augment?sd_productions=2", json=board_results)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    for _ in range(1200):
+        status = client.get(f"/jobs/{job_id}").json()
+        if status["status"] in ("done", "failed"):
+            break
+        time.sleep(0.1)
+    assert status["status"] == "done", status
+    assert status["percent"] == 100 and status["error"] is None and status["finished"] is not None
+
+    response = client.get(f"/jobs/{job_id}/result", headers={"Accept": "application/vnd.apache.arrow.stream"})
+    assert response.status_code == 200
+    df = pl.read_ipc_stream(io.BytesIO(response.content))
+    assert df.height == 2
+    assert df["Score_Declarer"].to_list() == [420, -50]
+    assert df["Pct_NS"].to_list() == [0.0, 1.0]
+    assert HrsCacheStore(tmp_path).lookup([pbn])["PBN"].to_list() == [pbn]
@@ -0,0 +1,208 @@
+import numpy as np
+import polars as pl
+from polars.testing import assert_frame_equal
+
+import mlBridgeLib.mlBridgeAugmentLib as augmentlib
+import mlBridgeLib.mlBridgeScoreTableLib as scoretablelib
+
+
+def max_horizontal_and_col(df, pattern):
+    # baseline implementation replaced by the EV tensor argmax.
+    cols = df.select(pl.col(pattern)).columns
+    max_expr = pl.max_horizontal(pl.col(pattern))
+    col_expr = pl.when(pl.col(cols[0]) == max_expr).then(pl.lit(cols[0]))
+    for col in cols[1:]:
+        col_expr = col_expr.when(pl.col(col) == max_expr).then(pl.lit(col))
+    return max_expr, col_expr.otherwise(pl.lit(""))
+
+def ev_frame(rows=6, seed=0):
+    # EV_{pair}_{declarer}_{strain}_{level}_{vul} columns with ties (values rounded to 10s) and nulls, row 0 entirely null.
+    rng = np.random.default_rng(seed)
+    cols = [f'EV_{pd}_{dd}_{s}_{l}_{v}' for pd in ['NS', 'EW'] for dd in pd for s in 'SHDCN' for l in range(1, 8) for v in ['NV', 'V']]
+    data = {}
+    for col in cols:
+        values = (rng.integers(-50, 50, rows)*10).astype(float)
+        values[rng.random(rows) < 0.2] = np.nan
+        values[0] = np.nan
+        data[col] = pl.Series(col, values, nan_to_null=True)
+    return pl.DataFrame(data)
+
+def test_create_best_contracts_matches_max_horizontal():
+    df = ev_frame()
+    exprs = {}
+    for v in ['NV', 'V']:
+        exprs[f'EV_{v}'] = f'^EV_(NS|EW)_[NESW]_[SHDCN]_[1-7]_{v}$'
+        for pd in ['NS', 'EW']:
+            exprs[f'EV_{pd}_{v}'] = f'^EV_{pd}_[NESW]_[SHDCN]_[1-7]_{v}$'
+            for dd in pd:
+                exprs[f'EV_{pd}_{dd}_{v}'] = f'^EV_{pd}_{dd}_[SHDCN]_[1-7]_{v}$'
+                for s in 'SHDCN':
+                    exprs[f'EV_{pd}_{dd}_{s}_{v}'] = f'^EV_{pd}_{dd}_{s}_[1-7]_{v}$'
+    baseline = []
+    for alias, pattern in exprs.items():
+        max_expr, col_expr = max_horizontal_and_col(df, pattern)
+        baseline += [max_expr.alias(f'{alias}_Max'), col_expr.alias(f'{alias}_Max_Col')]
+    assert_frame_equal(augmentlib.create_best_contracts(df), df.select(baseline))
+
+def test_final_contract_ev_columns():
+    df = augmentlib.create_best_contracts(ev_frame())
+    df = pl.concat([ev_frame(), df], how='horizontal').with_columns(
+        pl.Series('Vul', ['None', 'N_S', 'E_W', 'Both', 'None', 'Both']),
+        pl.Series('Declarer_Pair_Direction', ['NS', 'EW', 'NS', 'EW', 'NS', 'EW']),
+    )
+    augmenter = augmentlib.FinalContractAugmenter(df)
+    augmenter._create_ev_columns()
+    result = augmenter.df
+    max_expr, col_expr = max_horizontal_and_col(result, '^EV_Max_(NS|EW)$')
+    expected = result.select(max_expr.alias('EV_Max'), col_expr.alias('EV_Max_Col'))
+    assert_frame_equal(result.select('EV_Max', 'EV_Max_Col'), expected)
+    assert result['EV_Max_Col'][0] == '' and result['EV_Max'][0] is None
+    assert result['EV_Max_Declarer'].to_list()[1:] == [result[f'EV_Max_{pd}'][i] for i, pd in enumerate(['NS', 'EW', 'NS', 'EW', 'NS', 'EW']) if i > 0]
+
+def sample_deals(produce):
+    # fixed (seeded) deals to solve.
+    return augmentlib.sample_single_dummy_deals('N:AKQ2.KJ5.T98.A74 ... 9876.A432.KQ.K32 ...', produce, show_progress=False)
+
+def test_calc_double_dummy_deals_pool_matches_serial():
+    deals = sample_deals(10)
+    baseline = [t.to_list() for b in range(0, len(deals), 4) for t in augmentlib.calc_all_tables(deals[b:b+4])]
+    try:
+        assert [t.to_list() for t in augmentlib.calc_double_dummy_deals(deals, batch_size=4, max_workers=2)] == baseline
+        pool = augmentlib.get_process_pool(2)
+        assert [t.to_list() for t in augmentlib.calc_double_dummy_deals(deals[::-1], batch_size=4, max_workers=2)] == baseline[::-1]
+        assert augmentlib.get_process_pool(2) is pool # reused across calls
+    finally:
+        augmentlib.shutdown_process_pool()
+    assert [t.to_list() for t in augmentlib.calc_double_dummy_deals(deals, batch_size=4, max_workers=1)] == baseline
+
+def single_dummy_probabilities(deal, produce):
+    # baseline: one board at a time, NS then EW, each solved on its own.
+    SD_Tricks_df = {}
+    ns_ew_rows = {}
+    for ns_ew in ['NS', 'EW']:
+        sd_deals, sd_dd_result_tables = augmentlib.generate_single_dummy_deals(augmentlib.single_dummy_predeal_string(deal, ns_ew), produce, show_progress=False)
+        SD_Tricks_df[ns_ew] = pl.DataFrame([[sddeal.to_pbn()]+[s for d in t.to_list() for s in d] for sddeal,t in zip(sd_deals,sd_dd_result_tables)],schema={'SD_Deal':pl.String}|{'_'.join(['SD_Tricks',d,s]):pl.UInt8 for s in 'SHDCN' for d in 'NESW'},orient='row')
+        for d in 'NESW':
+            for s in 'SHDCN':
+                vc = {ds:p for ds,p in SD_Tricks_df[ns_ew]['_'.join(['SD_Tricks',d,s])].value_counts(normalize=True).rows()}
+                ns_ew_rows[(ns_ew,d,s)] = list(({i:0.0 for i in range(14)}|vc).values())
+    return SD_Tricks_df, (produce, ns_ew_rows)
+
+def test_single_dummy_probabilities_batch_matches_per_deal():
+    deals = [deal.to_pbn() for deal in augmentlib.sample_single_dummy_deals('N:... ... ... ...', 2, show_progress=False)]
+    baseline = {deal: single_dummy_probabilities(deal, 2) for deal in deals}
+
+    def check(results):
+        assert sorted(deal for deal, _, _ in results) == sorted(deals)
+        for deal, SD_Tricks_df, sd in results:
+            expected_df, expected_sd = baseline[deal]
+            assert sd == expected_sd
+            for ns_ew in ['NS', 'EW']:
+                assert_frame_equal(SD_Tricks_df[ns_ew], expected_df[ns_ew])
+
+    batch = augmentlib.calculate_single_dummy_probabilities_batch(deals, 2)
+    assert [deal for deal, _, _ in batch] == deals
+    check(batch)
+    try:
+        check(list(augmentlib.iter_single_dummy_probabilities(deals, 2, max_workers=2, deals_per_task=1)))
+    finally:
+        augmentlib.shutdown_process_pool()
+
+def calculate_matchpoints_group(series_list):
+    # baseline: map_groups python loop replaced by the search_sorted expression.
+    col_values = series_list[0].fill_null(0.0)
+    score_ns_values = series_list[1].fill_null(0.0)
+    return pl.Series([sum(1.0 if val > score else 0.5 if val == score else 0.0 for score in score_ns_values) for val in col_values])
+
+def test_matchpoints_expr_matches_map_groups():
+    # ties within a board, null scores and null values (scored as 0), a single row board and a float column against int scores.
+    df = pl.DataFrame({
+        'session_id': [1]*7 + [2]*4,
+        'PBN': ['a']*4 + ['b']*3 + ['a']*4,
+        'Board': [1]*4 + [2]*3 + [1]*3 + [3],
+        'Score_NS': [420, 420, -50, None, 100, 100, 100, 0, -200, None, 650],
+        'DD_Score_NS': [420, None, 0, 140, 100, 110, 90, -200, 0, 0, 650],
+        'EV_NS': [415.5, 420.0, -50.0, -0.0, None, 100.0, 99.9, 0.0, -200.0, 1.0, -650.0],
+    })
+    augmenter = augmentlib.MatchPointAugmenter(df)
+    for col in ['Score_NS', 'DD_Score_NS', 'EV_NS']:
+        for over in [['session_id', 'PBN', 'Board'], 'Board']:
+            expected = df.select(pl.map_groups(exprs=[col, 'Score_NS'], function=calculate_matchpoints_group, return_dtype=pl.Float64).over(over).alias('MP'))
+            assert_frame_equal(df.select(augmenter._matchpoints_expr(col, 'Score_NS', over).alias('MP')), expected)
+
+def test_score_lookup_exprs_match_calculate_scores_dicts():
+    all_scores_d, scores_d, _ = augmentlib.calculate_scores()
+    keys = [(level, strain, tricks, vul, dbl) for level in range(1, 8) for strain in 'SHDCN' for tricks in range(14) for vul in (False, True) for dbl in ['', 'X', 'XX']]
+    # PASS, partially null keys (director's adjustments) and out of range keys.
+    keys += [(None, None, None, None, None), (None, 'S', 9, False, ''), (4, None, 10, True, 'X'), (3, 'N', None, False, ''), (3, 'N', 9, None, ''), (3, 'N', 9, False, None),
+             (0, 'S', 7, False, ''), (8, 'S', 13, True, 'X'), (1, 'S', 14, False, ''), (1, 'S', -1, False, ''), (1, 'Z', 7, False, ''), (1, 'S', 7, False, 'XXX')]
+    df = pl.DataFrame(keys, schema={'BidLvl': pl.Int64, 'BidSuit': pl.String, 'Tricks': pl.Int64, 'Vul_Declarer': pl.Boolean, 'Dbl': pl.String}, orient='row')
+    score_table = augmentlib.get_score_table()
+    result = df.select(
+        augmentlib.all_scores_lookup_expr(score_table).alias('all_scores'),
+        augmentlib.score_lookup_expr(score_table, 'BidLvl', 'BidSuit', 'Tricks', 'Vul_Declarer').alias('scores'),
+    )
+    assert result['all_scores'].to_list() == [all_scores_d.get(key, None) for key in keys]
+    assert result['scores'].to_list() == [scores_d.get(key[:4], None) for key in keys]
+    assert result.schema == {'all_scores': pl.Int16, 'scores': pl.Int16}
+
+def test_convert_contract_to_DD_Score_Ref_matches_dict_lookups():
+    _, scores_d, _ = augmentlib.calculate_scores()
+    rng = np.random.default_rng(0)
+    rows = 5
+    df = pl.DataFrame({f'DD_{d}_{s}': rng.integers(0, 14, rows) for d in 'NESW' for s in 'CDHSN'}).with_columns(
+        pl.Series('Vul_NS', [False, True, True, False, None]),
+        pl.Series('Vul_EW', [False, True, False, True, None]),
+        # PASS row and a row with a null double dummy result (director's adjustment).
+        pl.Series('BidLvl', [1, 4, None, 7, 3]),
+        pl.Series('BidSuit', ['N', 'S', None, 'C', 'H']),
+        pl.Series('Declarer_Direction', ['E', 'N', None, 'W', 'S']),
+        pl.Series('Declarer_Pair_Direction', ['EW', 'NS', None, 'EW', 'NS']),
+        pl.Series('DD_N_C', [7, None, 0, 13, 2]),
+    )
+    result = augmentlib.convert_contract_to_DD_Score_Ref(df)
+    for level in range(1, 8):
+        for s in 'CDHSN':
+            for d, pd in [('N', 'NS'), ('E', 'EW'), ('S', 'NS'), ('W', 'EW')]:
+                expected = [scores_d.get((level, s, tricks, vul), None) for tricks, vul in zip(df[f'DD_{d}_{s}'], df[f'Vul_{pd}'])]
+                assert result[f'DD_Score_{level}{s}_{d}'].to_list() == expected
+    declarer = [None if r['Declarer_Direction'] is None else r[f"DD_Score_{r['BidLvl']}{r['BidSuit']}_{r['Declarer_Direction']}"] for r in result.iter_rows(named=True)]
+    assert result['DD_Score_Declarer'].to_list() == declarer
+    assert result['DD_Score_NS'].to_list() == [-declarer[0], declarer[1], 0, -declarer[3], declarer[4]]
+
+def test_shipped_score_table_matches_endplay():
+    score_table = augmentlib.get_score_table()
+    np.testing.assert_array_equal(score_table, scoretablelib.compute_score_table())
+    assert score_table.dtype == np.int16 and not score_table.flags.writeable
+    assert augmentlib.calculate_scores() is augmentlib.calculate_scores() # memoized
+
+def sd_expected_values(df, scores_df):
+    # baseline: a prob*score column for every trick, summed with sum_horizontal.
+    scores_df_vuls = augmentlib.create_scores_df_with_vul(scores_df)
+    keys = [(pd, dd, s, l, v) for pd in ['NS', 'EW'] for dd in pd for s in 'SHDCN' for l in range(1, 8) for v in ['NV', 'V']]
+    df = df.with_columns([
+        pl.col(f'Probs_{pd}_{dd}_{s}_{taken}').mul(score).alias(f'EV_{pd}_{dd}_{s}_{l}_{v}_{taken}_{score}')
+        for pd, dd, s, l, v in keys
+        for taken, score in zip(range(14), scores_df_vuls[f'Score_{l}{s}_{v}'])
+    ])
+    return df.select([pl.sum_horizontal(pl.col(f'^EV_{pd}_{dd}_{s}_{l}_{v}_\\d+_.*$')).alias(f'EV_{pd}_{dd}_{s}_{l}_{v}') for pd, dd, s, l, v in keys])
+
+def test_calculate_sd_expected_values_matches_sum_horizontal():
+    rng = np.random.default_rng(0)
+    rows = 4
+    data = {}
+    for pd in ['NS', 'EW']:
+        for dd in pd:
+            for s in 'SHDCN':
+                probs = rng.dirichlet(np.ones(14), rows)
+                probs[rng.random(probs.shape) < 0.1] = np.nan
+                probs[0] = np.nan # no single dummy result for the first row
+                for taken in range(14):
+                    data[f'Probs_{pd}_{dd}_{s}_{taken}'] = pl.Series(probs[:, taken], nan_to_null=True)
+    df = pl.DataFrame(data)
+    _, _, scores_df = augmentlib.calculate_scores()
+    expected = sd_expected_values(df, scores_df)
+    result = augmentlib.calculate_sd_expected_values(df, scores_df)
+    assert result.columns == df.columns + expected.columns
+    assert_frame_equal(result.select(expected.columns), expected, check_exact=False, rtol=1e-12, atol=1e-9)
+    assert result.select(expected.columns).row(0) == (0.0,)*len(expected.columns)
@@ -0,0 +1,198 @@
+import asyncio
+import collections
+import importlib
+import importlib.util
+import sys
+import time
+import types
+
+import pytest
+
+
+class StandInPage:
+    # stand-in for a playwright page. rendered maps selectors to the seconds after creation they appear at.
+    def __init__(self, context, rendered=None, idle_after=0.0, body_text=''):
+        self.context = context
+        self.rendered = rendered or {}
+        self.idle_after = idle_after
+        self.body_text = body_text
+        self.url = 'about:blank'
+        self.created = time.monotonic()
+
+    async def _until(self, seconds, timeout):
+        delay = self.created+seconds-time.monotonic()
+        if delay > timeout/1000:
+            await asyncio.sleep(timeout/1000)
+            raise TimeoutError(f'Timeout {timeout}ms exceeded')
+        await asyncio.sleep(max(0.0, delay))
+
+    async def wait_for_selector(self, selector, state='visible', timeout=30000):
+        await self._until(self.rendered.get(selector, float('inf')), timeout)
+
+    async def wait_for_load_state(self, state='load', timeout=30000):
+        await self._until(self.idle_after, timeout)
+
+    async def text_content(self, selector):
+        # the body text appears with the last rendered element
+        return self.body_text if time.monotonic() >= self.created+max(self.rendered.values(), default=0.0) else ''
+
+    async def evaluate(self, expression):
+        return (time.monotonic()-self.created)*1000
+
+    async def close(self):
+        self.context.pages.remove(self)
+        if self.context.browser.failing_page_closes:
+            raise RuntimeError('Target page has been closed')
+
+
+class StandInContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages = []
+        self.closed = False
+
+    async def set_extra_http_headers(self, headers):
+        pass
+
+    async def route(self, url, handler):
+        pass
+
+    async def cookies(self):
+        if self.closed or not self.browser.connected:
+            raise RuntimeError('Target closed')
+        return []
+
+    async def new_page(self):
+        if self.browser.failing_new_pages:
+            self.browser.failing_new_pages -= 1
+            raise RuntimeError('new_page failed')
+        page = StandInPage(self)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+
+
+class StandInBrowser:
+    def __init__(self):
+        self.connected = True
+        self.failing_new_pages = 0
+        self.failing_page_closes = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        return StandInContext(self)
+
+    async def close(self):
+        self.connected = False
+
+
+class StandInPlaywright:
+    # stand-in for async_playwright(). records the browsers it launches.
+    def __init__(self):
+        self.browsers = []
+        self.chromium = self
+
+    def __call__(self):
+        return self
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+    async def launch(self, **kwargs):
+        self.browsers.append(StandInBrowser())
+        return self.browsers[-1]
+
+
+@pytest.fixture
+def stand_in_playwright(monkeypatch):
+    if importlib.util.find_spec('playwright') is None:
+        # only the names mlBridgeBPLib imports. the browser itself is the stand-in below.
+        async_api = types.ModuleType('playwright.async_api')
+        async_api.async_playwright = StandInPlaywright()
+        async_api.Page = async_api.BrowserContext = object
+        monkeypatch.setitem(sys.modules, 'playwright', types.ModuleType('playwright'))
+        monkeypatch.setitem(sys.modules, 'playwright.async_api', async_api)
+    bp = importlib.import_module('mlBridgeLib.mlBridgeBPLib')
+    playwright = StandInPlaywright()
+    monkeypatch.setattr(bp, 'async_playwright', playwright)
+    monkeypatch.setattr(bp, 'browser_pool', bp.BrowserPool(size=2))
+    monkeypatch.setattr(bp, 'page_load_timings', collections.deque(maxlen=bp.BP_PAGE_TIMINGS_MAX))
+    return playwright
+
+@pytest.fixture
+def bp(stand_in_playwright):
+    return importlib.import_module('mlBridgeLib.mlBridgeBPLib')
+
+
+def test_browser_pool_reuses_contexts_and_relaunches(bp, stand_in_playwright):
+    async def lease():
+        async with bp.get_browser_context_async() as context:
+            async with bp.get_browser_context_async() as nested:
+                assert nested is context # nested leases share the context
+            await asyncio.sleep(0.01)
+            return context
+
+    async def main():
+        contexts = await asyncio.gather(*[lease() for _ in range(6)])
+        assert len(set(contexts)) == 2
+        assert bp.browser_pool.stats() == {'size': 2, 'contexts': 2, 'idle': 2, 'launches': 1, 'leases': 6}
+        stand_in_playwright.browsers[0].connected = False # crashed
+        assert await lease() not in contexts
+        assert bp.browser_pool.stats() == {'size': 2, 'contexts': 1, 'idle': 1, 'launches': 2, 'leases': 7}
+        await bp.close_browser_pool_async()
+
+    asyncio.run(main())
+    assert [browser.connected for browser in stand_in_playwright.browsers] == [False, False]
+
+def test_sync_wrappers_close_the_browser(bp, stand_in_playwright):
+    async def lease():
+        async with bp.get_browser_context_async():
+            return bp.browser_pool.stats()['contexts']
+
+    assert bp._run(lease()) == 1
+    assert bp._run(lease()) == 1
+    assert [browser.connected for browser in stand_in_playwright.browsers] == [False, False]
+    assert bp.browser_pool.stats()['contexts'] == 0
+
+def test_boards_scraped_concurrently_keep_order_and_record_failures(bp, stand_in_playwright, monkeypatch):
+    async def scrape(page, url):
+        deal_num = int(url.rsplit('/', 1)[-1])
+        await asyncio.sleep(0.01*(5-deal_num % 5)) # finish out of order
+        if deal_num == 3:
+            raise ValueError('no hands')
+        return {'url': url}
+    monkeypatch.setattr(bp, 'scrape_boards_page_async', scrape)
+    boards_urls = [(d, f'https://stand.in/boards/{d}') for d in range(1, 9)]
+
+    async def main():
+        async with bp.get_browser_context_async() as context:
+            stand_in_playwright.browsers[0].failing_new_pages = 1 # the first board's worker can't open a page
+            stand_in_playwright.browsers[0].failing_page_closes = True
+            return await bp.request_boards_dataframes_async(boards_urls, context, concurrency=3)
+
+    results, failures = bp._run(main())
+    assert results == [None if d in (1, 3) else {'url': url} for d, url in boards_urls]
+    assert failures == {1: 'new_page failed', 3: 'no hands'}
+
+def test_parsers_wait_for_their_selector_or_networkidle(bp, stand_in_playwright):
+    context = StandInContext(StandInBrowser())
+    async def main():
+        # the score frequency table renders well after the page loads but before the network is idle
+        page = StandInPage(context, rendered={'text=top EO': 0.2}, idle_after=1.0, body_text='Score\nNb\ntop NS\ntop EO\n420\n3\n4,5\n1,5\n-50\n1\n0\n6\n')
+        score_frequency_data = await bp.parse_score_frequency_html_async(page, 7)
+        assert [(d['Board'], d['Score'], d['Frequency'], d['Matchpoints_NS']) for d in score_frequency_data] == [(7, 420, 3, 4.5), (7, -50, 1, 0.0)]
+        # a board nobody played has no hands. its page is parsed once the network is idle, not after the timeout.
+        page = StandInPage(context, idle_after=0.1)
+        start_time = time.monotonic()
+        await bp.wait_for_parser_ready_async(page, 'boards', 'div.flex-grow-1.ms-3.gros', timeout=5000)
+        assert time.monotonic()-start_time < 1.0
+
+    asyncio.run(main())
+    assert [(t['parser'], t['waited_for']) for t in bp.page_load_timings] == [('score_frequency', 'selector'), ('boards', 'networkidle')]
@@ -0,0 +1,95 @@
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from app.services.ffbridge_service import LANCELOT_SCORES_SCHEMA, LANCELOT_TEAM_SCHEMA, normalize_json
+
+
+def flatten_json(nested_json: Dict) -> Dict:
+    # baseline: original python flattening replaced by normalize_json().
+    flat_dict = {}
+
+    def flatten(x: Any, name: str = '') -> None:
+        if isinstance(x, dict):
+            for key, value in x.items():
+                flatten(value, f"{name}_{key}" if name else key)
+        else:
+            flat_dict[name] = x # lists are kept as is
+
+    flatten(nested_json)
+    return flat_dict
+
+def create_dataframe_flatten_json(data: List[Dict[str, Any]]) -> pl.DataFrame:
+    return pl.DataFrame([flatten_json(record) for record in data])
+
+def make_scores_payload(n_boards: int = 2000) -> bytes:
+    """Synthetic scores payload shaped like /results/teams/{id}/session/{id}/scores."""
+    def player(i: int) -> Dict[str, Any]:
+        return {'id': i, 'ffbId': 1000000+i, 'firstName': f'First{i}', 'lastName': f'Last{i}'}
+    def team(i: int, orientation: str) -> Dict[str, Any]:
+        return {'id': i, 'section': 'A', 'orientation': orientation, 'startTableNumber': i % 20}
+    return json.dumps([{
+        'board': {
+            'id': 1000+i, 'deal': 'N:T5.J98643.K95.76 432.KQ5.863.T984 86.AT72.QJT7.AKQ AKQJ97..A42.J532',
+            'frequencies': [{'nsScore': str(s), 'ewScore': '', 'nsNote': 50.0, 'ewNote': 50.0, 'count': 2} for s in (420, 450, 170)],
+        },
+        'boardNumber': i % 36 + 1,
+        'lineup': {
+            'northPlayer': player(4*i), 'eastPlayer': player(4*i+1), 'southPlayer': player(4*i+2), 'westPlayer': player(4*i+3),
+            'segment': {'game': {'homeTeam': team(i, 'NS'), 'awayTeam': team(i+1, 'EW')}},
+        },
+        'contract': '4H', 'declarer': 'N', 'result': '=', 'nsScore': '420', 'ewScore': '', 'nsNote': 62.5, 'ewNote': 37.5,
+    } for i in range(n_boards)]).encode('utf-8')
+
+def test_normalize_json_matches_flatten_json():
+    payload = make_scores_payload(50)
+    expected = create_dataframe_flatten_json(json.loads(payload))
+    assert 'lineup_segment_game_homeTeam_id' in expected.columns
+    assert_frame_equal(normalize_json(payload), expected)
+    assert_frame_equal(normalize_json(payload.decode('utf-8')), expected)
+    assert_frame_equal(normalize_json(json.loads(payload)), expected)
+    assert_frame_equal(normalize_json(payload, LANCELOT_SCORES_SCHEMA), expected)
+
+def test_normalize_json_keeps_declared_dtypes():
+    records = json.loads(make_scores_payload(3))
+    # a sitout has no away team, unplayed boards have null notes and frequencies and a record can lack fields altogether.
+    records[0]['lineup']['segment']['game']['awayTeam'] = None
+    for record in records:
+        record['nsNote'] = record['ewNote'] = None
+    records[1]['board']['frequencies'] = None
+    del records[2]['lineup']['northPlayer']['ffbId'], records[2]['boardNumber']
+    declared = normalize_json(b'[]', LANCELOT_SCORES_SCHEMA).schema
+    for data in [json.dumps(records).encode('utf-8'), records]:
+        df = normalize_json(data, LANCELOT_SCORES_SCHEMA)
+        assert df.schema == declared
+        assert df['lineup_segment_game_awayTeam_id'].to_list() == [None, 2, 3]
+        assert df['nsNote'].dtype == pl.Float64 and df['nsNote'].null_count() == 3
+        assert df['boardNumber'].to_list() == [1, 2, None]
+    team_df = normalize_json(b'{"id": 5, "label": "A", "player1": {"id": 7, "firstName": "Jo"}, "player3": null, "rankings": []}', LANCELOT_TEAM_SCHEMA)
+    assert team_df.schema == normalize_json(b'[]', LANCELOT_TEAM_SCHEMA).schema
+    assert team_df.row(0, named=True)['player1_lastName'] is None and team_df['player2_id'].dtype == pl.Int64
+
+def benchmark_normalize_json(payload: Optional[bytes] = None, n: int = 20) -> None:
+    """Compare json.loads + flatten_json (original path) with normalize_json() on raw bytes (new path)."""
+    payload = make_scores_payload() if payload is None else payload
+    t = time.time()
+    for _ in range(n):
+        flatten_df = create_dataframe_flatten_json(json.loads(payload))
+    flatten_time = (time.time()-t)/n
+    t = time.time()
+    for _ in range(n):
+        normalize_df = normalize_json(payload)
+    normalize_time = (time.time()-t)/n
+    print(f"payload: {len(payload)} bytes rows:{normalize_df.height} columns:{normalize_df.width}")
+    print(f"json.loads+flatten_json: time:{flatten_time} seconds")
+    print(f"normalize_json: time:{normalize_time} seconds speedup:{flatten_time/normalize_time:.1f}x")
+    assert flatten_df.columns == normalize_df.columns, set(flatten_df.columns) ^ set(normalize_df.columns)
+
+
+if __name__ == '__main__':
+    # python -m app.bridge.tests.test_ffbridge_normalize [recorded_scores_payload.json]
+    import sys
+    benchmark_normalize_json(open(sys.argv[1], 'rb').read() if len(sys.argv) > 1 else None)
@@ -0,0 +1,49 @@
+import multiprocessing
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from mlBridgeLib.mlBridgeAugmentLib import update_hrs_cache_df
+from mlBridgeLib.mlBridgeHrsCacheLib import HrsCacheStore
+
+SCHEMA = {'PBN': pl.String, 'Dealer': pl.String, 'Vul': pl.String, 'DD_N_S': pl.UInt8, 'Par_NS': pl.Int16}
+
+
+def pbn(n):
+    return f'N:{n:03d}.KQJ.T98.7654 x.x.x.x x.x.x.x x.x.x.x'
+
+def test_upsert_matches_update_hrs_cache_df(tmp_path):
+    cache_df = pl.DataFrame({'PBN': [pbn(n) for n in range(6)], 'Dealer': list('NESWNE'), 'Vul': ['None', 'N_S', 'E_W', 'Both', 'None', 'N_S'],
+                             'DD_N_S': [7, 8, 9, None, 10, 11], 'Par_NS': [100, -100, None, 420, 0, 50]}, schema=SCHEMA)
+    # DD results arrive without Dealer/Vul. updates 2 existing PBNs (one with a null DD) and adds 2 new ones.
+    dd_df = pl.DataFrame({'PBN': [pbn(n) for n in [1, 3, 6, 7]], 'DD_N_S': [12, 13, None, 6]}, schema={'PBN': pl.String, 'DD_N_S': pl.UInt8})
+    par_df = pl.DataFrame({'PBN': [pbn(n) for n in [6, 0]], 'Dealer': ['S', 'N'], 'Vul': ['Both', 'None'], 'Par_NS': [-620, 110]}, schema={k: SCHEMA[k] for k in ['PBN', 'Dealer', 'Vul', 'Par_NS']})
+
+    store = HrsCacheStore(tmp_path, schema=SCHEMA, n_buckets=4)
+    for df in [cache_df, dd_df, par_df]:
+        store.upsert(df)
+    expected = update_hrs_cache_df(update_hrs_cache_df(cache_df, dd_df), par_df)
+    assert_frame_equal(store.to_df().sort('PBN'), expected.cast(SCHEMA).sort('PBN'))
+    assert_frame_equal(HrsCacheStore(tmp_path).lookup([pbn(3), pbn(7)]).sort('PBN'), expected.filter(pl.col('PBN').is_in([pbn(3), pbn(7)])).cast(SCHEMA).sort('PBN'))
+    assert list(tmp_path.glob('*.tmp')) == []
+
+    with pytest.raises(ValueError):
+        store.upsert(pl.DataFrame({'PBN': [pbn(0)], 'Unknown': [1]}))
+    with pytest.raises(ValueError):
+        store.set_schema({'PBN': pl.String})
+
+def _upsert_rows(path, first):
+    store = HrsCacheStore(path)
+    for n in range(first, first+10):
+        store.upsert(pl.DataFrame({'PBN': [pbn(n)], 'DD_N_S': [n % 14]}, schema={'PBN': pl.String, 'DD_N_S': pl.UInt8}))
+
+def test_concurrent_upserts_keep_every_row(tmp_path):
+    HrsCacheStore(tmp_path, schema=SCHEMA, n_buckets=2)
+    processes = [multiprocessing.get_context('spawn').Process(target=_upsert_rows, args=(tmp_path, first)) for first in range(0, 40, 10)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    assert sorted(HrsCacheStore(tmp_path).to_df()['PBN']) == [pbn(n) for n in range(40)]
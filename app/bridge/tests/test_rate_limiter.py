@@ -0,0 +1,84 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from acbllib.acblRateLimitLib import RateLimiter, parse_retry_after
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # stand-in for my.acbl.org. the first `throttle` requests get a 429.
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            throttled = server.hits <= server.throttle
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        if throttled:
+            self.send_response(429)
+            self.send_header('Retry-After', '0.1')
+            self.end_headers()
+            return
+        body = b'<html>club results</html>'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.lock = threading.Lock()
+    server.hits = server.in_flight = server.max_in_flight = server.throttle = 0
+    server.delay = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/club-results/108571/"
+
+def test_throttled_requests_back_off_and_retry(stand_in_server):
+    stand_in_server.throttle = 2
+    limiter = RateLimiter(rate=100, max_rate=100)
+    t = time.time()
+    response = limiter.get(url(stand_in_server))
+    assert response.status_code == 200
+    assert stand_in_server.hits == 3
+    assert time.time()-t >= 0.2 # two Retry-After pauses
+    host = limiter.for_url(url(stand_in_server))
+    assert host.throttled == 2 and host.rate < 100
+
+def test_rate_and_max_in_flight(stand_in_server):
+    stand_in_server.delay = 0.05
+    limiter = RateLimiter(rate=20, max_rate=20, max_in_flight=2)
+    t = time.time()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda _: limiter.get(url(stand_in_server)), range(10)))
+    assert all(r.status_code == 200 for r in responses)
+    assert stand_in_server.max_in_flight <= 2
+    assert time.time()-t >= 9/20 # first request uses the burst token
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+
+def test_acbllib_shares_the_limiter_module():
+    # acbllib must import acblRateLimitLib as a package module, not a second copy through sys.path.
+    import sys
+    import acbllib.acbllib as acbllib
+    import acbllib.acblRateLimitLib as acblRateLimitLib
+    assert acbllib.acbl_rate_limiter is acblRateLimitLib.acbl_rate_limiter
+    assert 'acblRateLimitLib' not in sys.modules and 'acblPackLib' not in sys.modules
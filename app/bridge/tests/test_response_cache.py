@@ -0,0 +1,108 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.response_cache import DiskTier, ResponseCache, cached
+
+def test_coalesces_concurrent_fetches():
+    cache = ResponseCache(ttl=60)
+    calls = []
+
+    @cached(cache)
+    async def fetch(session_id: str) -> dict:
+        calls.append(session_id)
+        await asyncio.sleep(0.05)
+        return {"session_id": session_id}
+
+    async def burst():
+        return await asyncio.gather(*[fetch("2402101-07AS-1") for _ in range(10)])
+
+    results = asyncio.run(burst())
+    assert calls == ["2402101-07AS-1"]
+    assert all(r == {"session_id": "2402101-07AS-1"} for r in results)
+    assert cache.misses == 1 and cache.coalesced == 9
+
+def test_ttl_expiry_and_none_not_cached():
+    cache = ResponseCache(ttl=0.05)
+    calls = []
+
+    @cached(cache)
+    async def fetch(acbl_number: str):
+        calls.append(acbl_number)
+        return None if acbl_number == "0" else {"acbl_number": acbl_number}
+
+    async def run():
+        await fetch("2663279")
+        await fetch("2663279")
+        time.sleep(0.1)
+        await fetch("2663279")
+        await fetch("0")
+        await fetch("0")
+
+    asyncio.run(run())
+    assert calls == ["2663279", "2663279", "0", "0"]
+
+def test_lru_eviction():
+    cache = ResponseCache(ttl=60, max_entries=2)
+    calls = []
+
+    @cached(cache)
+    async def fetch(key: int) -> int:
+        calls.append(key)
+        return key
+
+    async def run():
+        for key in [1, 2, 1, 3, 1, 2]: # 3 evicts 2 (least recently used), so 2 is refetched
+            await fetch(key)
+
+    asyncio.run(run())
+    assert calls == [1, 2, 3, 2]
+
+def test_disk_tier_survives_new_cache(tmp_path):
+    calls = []
+
+    async def fetch() -> dict:
+        calls.append(1)
+        return {"data": [1, 2, 3]}
+
+    asyncio.run(ResponseCache(disk_path=tmp_path).get_or_fetch("key", fetch))
+    assert asyncio.run(ResponseCache(disk_path=tmp_path).get_or_fetch("key", fetch)) == {"data": [1, 2, 3]}
+    assert calls == [1]
+
+def test_disk_tier_concurrent_and_failed_writes(tmp_path):
+    disk = DiskTier(tmp_path)
+    with ThreadPoolExecutor(8) as executor: # ResponseCache writes the disk tier in threads
+        list(executor.map(lambda n: disk.set("key", list(range(n, n+20000)), 60), range(32)))
+    value = disk.get("key")
+    assert value == list(range(value[0], value[0]+20000))
+    with pytest.raises(Exception):
+        disk.set("key", lambda: None, 60) # can't be pickled
+    assert disk.get("key") == value
+    assert list(tmp_path.glob('*.tmp')) == []
+
+def test_waiters_refetch_when_leader_is_cancelled():
+    cache = ResponseCache(ttl=60)
+    calls = []
+
+    @cached(cache)
+    async def fetch(session_id: str) -> dict:
+        calls.append(session_id)
+        await asyncio.sleep(0.05)
+        return {"session_id": session_id}
+
+    async def run():
+        leader = asyncio.create_task(fetch("2402101-07AS-1"))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(fetch("2402101-07AS-1")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        assert leader.cancelled()
+        return results
+
+    results = asyncio.run(run())
+    assert results == [{"session_id": "2402101-07AS-1"}]*3
+    assert calls == ["2402101-07AS-1"]*2 # the cancelled fetch and one retry shared by the waiters
+    assert cache.coalesced == 5 and not cache._inflight
@@ -1,10 +1,15 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
 from typing import List, Optional
 from .models import DealRequest, AuctionResponse
+from .responses import dataframe_response, dataframe_from_request
+from .services.job_service import job_manager
 from .services.auction_service import generate_auction
-from .services.ffbridge_service import create_df_from_group_session_pair
+from .services import ffbridge_service
+from .services.ffbridge_service import create_df_from_group_session_pair, create_df_from_group_session
 import polars as pl
-from .services.acbl_service import get_club_player_history, get_tournament_player_history, get_acbl_tournament_session_results, get_club_results_from_acbl_number
+from .services.acbl_service import acbl_executor, get_club_player_history, get_tournament_player_history, get_acbl_tournament_session_results, get_club_results_from_acbl_number
 
 
 # There's weirdness with unicorn sometimes. if so:
@@ -12,10 +17,21 @@ from .services.acbl_service import get_club_player_history, get_tournament_playe
 # 2) kill python "spawn" in command line process
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # create pooled upstream clients once per worker and close them on shutdown.
+    await ffbridge_service.startup()
+    yield
+    await ffbridge_service.shutdown()
+    acbl_executor.shutdown(wait=False, cancel_futures=True)
+    job_manager.shutdown()
+
+
 app = FastAPI(
     title="Bridge Postmortem API",
     description="API for analyzing bridge deals and auctions",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 @app.get("/")
@@ -36,24 +52,39 @@ async def get_auction(request: DealRequest) -> AuctionResponse:
         raise HTTPException(status_code=400, detail=str(e))
 
 # https://ffbridge.fr/competitions/results/groups/7878/sessions/107118/pairs/3976783
+# Accept: application/vnd.apache.arrow.stream, application/vnd.apache.parquet or application/x-ndjson return the frame in that format.
 @app.get("/ffbridge.fr/competitions/results/groups/{group_id}/sessions/{session_id}/pairs/{pair_id}")
 async def get_ffbridge_data(
+    request: Request,
     group_id: str,
     session_id: str,
     pair_id: str
-) -> dict:
+) -> Response:
     try:
         print("Starting ffbridge data fetch...")
         df = await create_df_from_group_session_pair(group_id, session_id, pair_id)
         print(f"DF created: {df is not None}")
-        return {
-            "success": True,
-            "data": df.to_dict(as_series=False)
-        }
+        return dataframe_response(request, df)
     except Exception as e:
         print(f"Error in get_ffbridge_data: {type(e).__name__}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# All pairs of a session in one frame keyed by team_session_id. Same content negotiation as the pair route.
+@app.get("/ffbridge.fr/competitions/results/groups/{group_id}/sessions/{session_id}")
+async def get_ffbridge_session_data(
+    request: Request,
+    group_id: str,
+    session_id: str
+) -> Response:
+    try:
+        df = await create_df_from_group_session(group_id, session_id)
+    except Exception as e:
+        print(f"Error in get_ffbridge_session_data: {type(e).__name__}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if df is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return dataframe_response(request, df)
+
 # change route to something sensible for acbl
 # https://my.acbl.org/club-results/my-results/{acbl_number}
 @app.get("/acbl/club/player_id/{player_id}")
@@ -114,3 +145,35 @@ async def get_acbl_tournament_session(session_id: str) -> dict:
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=404, detail=str(e))
+
+# Long running augmentations (DD, par, single dummy) run as background jobs in a worker process pool.
+# Body is the session's board results as JSON, NDJSON, Arrow IPC or Parquet (Content-Type). Returns a job_id to poll.
+@app.post("/jobs/augment", status_code=202)
+async def post_augment_job(request: Request, sd_productions: int = 40, max_adds: Optional[int] = None) -> JSONResponse:
+    try:
+        df = await dataframe_from_request(request)
+    except Exception as e:
+        print(f"Error reading board results: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    job_id = job_manager.submit_augment(df, sd_productions, max_adds)
+    return JSONResponse({"job_id": job_id, "status": "queued"}, status_code=202, headers={"Location": f"/jobs/{job_id}"})
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> dict:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_manager.status(job)
+
+# Same content negotiation as the FFBridge routes. 409 until the job is done.
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(request: Request, job_id: str) -> Response:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    status = job_manager.status(job)
+    if status['status'] == 'failed':
+        raise HTTPException(status_code=500, detail=status['error'])
+    if status['status'] != 'done':
+        raise HTTPException(status_code=409, detail=f"Job is {status['status']}")
+    return dataframe_response(request, job.future.result())
@@ -0,0 +1,85 @@
+import io
+from typing import Iterator, Optional
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import polars as pl
+
+# Content negotiation for routes returning (or accepting) DataFrames.
+# Arrow IPC and Parquet are written straight from the polars frame. NDJSON is streamed in chunks of rows.
+# application/json (the default) keeps the original {"success": True, "data": {column: [values]}} response.
+
+JSON = 'application/json'
+NDJSON = 'application/x-ndjson'
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+PARQUET = 'application/vnd.apache.parquet'
+DATAFRAME_MEDIA_TYPES = [JSON, NDJSON, ARROW_STREAM, PARQUET]
+
+NDJSON_CHUNK_ROWS = 10_000
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Return the supported media type with the highest q value in the Accept header. JSON if none are supported."""
+    if not accept:
+        return JSON
+    candidates = []
+    for i, part in enumerate(accept.split(',')):
+        media_type, *params = [p.strip() for p in part.split(';')]
+        q = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        candidates.append((-q, i, media_type.lower()))
+    for neg_q, _, media_type in sorted(candidates):
+        if neg_q == 0:
+            break
+        if media_type in DATAFRAME_MEDIA_TYPES:
+            return media_type
+        if media_type in ('*/*', 'application/*'):
+            return JSON
+    return JSON
+
+
+def _ndjson_chunks(df: pl.DataFrame) -> Iterator[bytes]:
+    for chunk in df.iter_slices(NDJSON_CHUNK_ROWS):
+        yield chunk.write_ndjson().encode('utf-8')
+
+
+def dataframe_response(request: Request, df: pl.DataFrame) -> Response:
+    media_type = negotiate_media_type(request.headers.get('accept'))
+    if media_type == ARROW_STREAM:
+        buffer = io.BytesIO()
+        df.write_ipc_stream(buffer)
+        return Response(content=buffer.getvalue(), media_type=ARROW_STREAM)
+    if media_type == PARQUET:
+        buffer = io.BytesIO()
+        df.write_parquet(buffer)
+        return Response(content=buffer.getvalue(), media_type=PARQUET)
+    if media_type == NDJSON:
+        return StreamingResponse(_ndjson_chunks(df), media_type=NDJSON)
+    return JSONResponse(jsonable_encoder({
+        "success": True,
+        "data": df.to_dict(as_series=False)
+    }))
+
+
+async def dataframe_from_request(request: Request) -> pl.DataFrame:
+    """Read a DataFrame from the request body according to Content-Type. JSON may be {column: [values]}, a list of records
+    or the {"success": True, "data": {column: [values]}} envelope returned by dataframe_response()."""
+    content_type = request.headers.get('content-type', JSON).split(';')[0].strip().lower()
+    body = await request.body()
+    if content_type == ARROW_STREAM:
+        return pl.read_ipc_stream(io.BytesIO(body))
+    if content_type == PARQUET:
+        return pl.read_parquet(io.BytesIO(body))
+    if content_type == NDJSON:
+        return pl.read_ndjson(io.BytesIO(body))
+    if content_type == JSON:
+        payload = await request.json()
+        if isinstance(payload, dict) and 'data' in payload:
+            payload = payload['data']
+        return pl.DataFrame(payload, infer_schema_length=None)
+    raise ValueError(f"Unsupported Content-Type: {content_type}")
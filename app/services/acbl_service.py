@@ -1,5 +1,8 @@
+import asyncio
+import functools
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
+from concurrent.futures import ThreadPoolExecutor
 import pathlib
 import sys
 import time
@@ -10,10 +13,19 @@ sys.path.extend([
     str(pathlib.Path.cwd().parent.joinpath('acbllib'))
 ])
 import acbllib
+from .response_cache import response_cache, cached
 
 dotenv.load_dotenv()
 acbl_api_key = os.getenv('ACBL_API_KEY')
 
+# acbllib uses blocking requests. calls are run in a bounded thread pool so that a slow ACBL call doesn't stall the event loop
+# and every other request on the worker. the bound also caps concurrent upstream requests per worker.
+acbl_executor = ThreadPoolExecutor(max_workers=int(os.getenv('ACBL_MAX_WORKERS', 8)), thread_name_prefix='acbl')
+
+async def run_blocking(func: Callable, *args: Any) -> Any:
+    """Run a blocking acbllib call in acbl_executor."""
+    return await asyncio.get_running_loop().run_in_executor(acbl_executor, functools.partial(func, *args))
+
 # https://my.acbl.org/club-results/my-results/{acbl_number}
 async def get_club_player_history(player_id: str) -> Optional[Dict[str, Any]]:
     """Fetch club player history from ACBL API"""
@@ -24,7 +36,7 @@ async def get_club_player_history(player_id: str) -> Optional[Dict[str, Any]]:
         #     response = await client.get(url)
         #     response.raise_for_status()
         #     return response.json()
-        game_urls = acbllib.get_club_player_history(int(player_id))
+        game_urls = await run_blocking(acbllib.get_club_player_history, int(player_id))
         print(f"game_urls: {game_urls}")
         #game_urls = {"2663279": "https://www.acbl.org/club-results/2024/01/01/2663279"}
         session_id = None
@@ -50,10 +62,11 @@ async def get_club_player_history(player_id: str) -> Optional[Dict[str, Any]]:
     return game_urls
 
 # f"https://my.acbl.org/club-results/my-results/{acbl_number}"
+@cached(response_cache)
 async def get_club_results_from_acbl_number(acbl_number: str) -> Optional[Dict[str, Any]]:
     """Fetch club results for an ACBL number"""
     try:
-        results = acbllib.get_club_results_from_acbl_number(acbl_number)
+        results = await run_blocking(acbllib.get_club_results_from_acbl_number, acbl_number)
         if results is None:
             print(f"No club results found for ACBL number {acbl_number}")
             return None
@@ -81,7 +94,7 @@ async def get_tournament_player_history(player_id: str) -> Optional[Dict[str, An
         #     return response.json()
         t = time.time()
         # https://api.acbl.org/v1/tournament/player/history_query
-        tournament_session_urls = acbllib.get_tournament_sessions_from_acbl_number(player_id, acbl_api_key) # returns [url, url, description, dfs]
+        tournament_session_urls = await run_blocking(acbllib.get_tournament_sessions_from_acbl_number, player_id, acbl_api_key) # returns [url, url, description, dfs]
         print(f"tournament_session_urls: {tournament_session_urls}")
         session_id = None
         if tournament_session_urls is None:
@@ -108,12 +121,13 @@ async def get_tournament_player_history(player_id: str) -> Optional[Dict[str, An
     return tournament_session_urls
 
 # https://api.acbl.org/v1/tournament/session
+@cached(response_cache)
 async def get_acbl_tournament_session_results(session_id: str) -> Optional[Dict[str, Any]]:
     """Fetch ACBL tournament session results from ACBL API"""
     try:
         t = time.time()
         # f"https://live.acbl.org/event/{d['session_id'].replace('-','/')}/summary"
-        response = acbllib.get_tournament_session_results(session_id, acbl_api_key)
+        response = await run_blocking(acbllib.get_tournament_session_results, session_id, acbl_api_key)
         #print('response:', response)
         assert response.status_code == 200, response.status_code
         dfs_results = response.json()
@@ -1,7 +1,74 @@
 import polars as pl
-from typing import Dict, Any, List, Optional
-import json
+from typing import Dict, Any, List, Optional, Union
+import asyncio
+import contextlib
+import io
+import os
+import time
 import httpx
+from contextvars import ContextVar
+from .response_cache import response_cache, cached
+
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2]). Fall back to HTTP/1.1 keep-alive without it.
+try:
+    import h2 # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+# Shared connection pool for api-lancelot.ffbridge.fr. Created at app startup (see app.main lifespan) so requests reuse
+# warm TLS connections instead of opening a new client per request. All requests go to one host so the pool limits are per host limits.
+FFBRIDGE_MAX_CONNECTIONS = int(os.getenv('FFBRIDGE_MAX_CONNECTIONS', 20))
+_client: Optional[httpx.AsyncClient] = None
+# client of the enclosing client_scope() when there is no shared client. tasks created inside the scope inherit it.
+_scoped_client: ContextVar[Optional[httpx.AsyncClient]] = ContextVar('_scoped_client', default=None)
+
+
+def create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2,
+        limits=httpx.Limits(max_connections=FFBRIDGE_MAX_CONNECTIONS, max_keepalive_connections=FFBRIDGE_MAX_CONNECTIONS, keepalive_expiry=60),
+        timeout=httpx.Timeout(30.0, connect=10.0),
+    )
+
+
+async def startup() -> None:
+    global _client
+    if _client is None:
+        _client = create_client()
+
+
+async def shutdown() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@contextlib.asynccontextmanager
+async def client_scope():
+    """Yield the shared client created by startup(). Outside of the app (no startup()) yield a client which is closed when the
+    outermost scope exits, so a client never outlives the event loop it was created on. Nested scopes reuse the enclosing client."""
+    client = _client if _client is not None else _scoped_client.get()
+    if client is not None:
+        yield client
+        return
+    async with create_client() as client:
+        token = _scoped_client.set(client)
+        try:
+            yield client
+        finally:
+            _scoped_client.reset(token)
+
+
+async def get_content(url: str) -> bytes:
+    # raw JSON bytes. parsed by normalize_json() directly into polars without building python objects.
+    print(f"get_content:{url}")
+    async with client_scope() as client:
+        response = await client.get(url)
+    response.raise_for_status()
+    return response.content
 
 
 def test_for_create_df_from_group_session_pair(group_id: str, session_id: str, pair_id: str) -> Optional[pl.DataFrame]:
@@ -31,58 +98,93 @@ def test_for_create_df_from_group_session_pair(group_id: str, session_id: str, p
     return pl.DataFrame(data)
 
 
-def flatten_json(nested_json: Dict) -> Dict:
-    """Flatten nested JSON structure into a single level dictionary"""
-    flat_dict = {}
-    
-    def flatten(x: Any, name: str = '') -> None:
-        #print(f"flattening {name}")
-        if isinstance(x, dict):
-            for key, value in x.items():
-                flatten(value, f"{name}_{key}" if name else key)
-        elif isinstance(x, list):
-            #for i, value in enumerate(x):
-            #    flatten(value, f"{name}_{i}")
-            flat_dict[name] = x
-        else:
-            flat_dict[name] = x
-            
-    flatten(nested_json)
-    return flat_dict
-
-
-def create_dataframe(data: List[Dict[str, Any]]) -> pl.DataFrame:
-    """Create a Polars DataFrame from flattened JSON data"""
+# schemas of the Lancelot json. fields which aren't declared are dropped. missing or null fields load as nulls of the declared type.
+LANCELOT_PLAYER_SCHEMA = pl.Struct({
+    'id': pl.Int64,
+    'ffbId': pl.Int64,
+    'firstName': pl.String,
+    'lastName': pl.String,
+})
+LANCELOT_LINEUP_TEAM_SCHEMA = pl.Struct({
+    'id': pl.Int64,
+    'section': pl.String,
+    'orientation': pl.String,
+    'startTableNumber': pl.Int64,
+})
+# /results/teams/{team_id}/session/{session_id}/scores: one record per board played.
+LANCELOT_SCORES_SCHEMA = pl.Schema({
+    'board': pl.Struct({
+        'id': pl.Int64,
+        'deal': pl.String,
+        'frequencies': pl.List(pl.Struct({'nsScore': pl.String, 'ewScore': pl.String, 'nsNote': pl.Float64, 'ewNote': pl.Float64, 'count': pl.Int64})),
+    }),
+    'boardNumber': pl.Int64,
+    'lineup': pl.Struct({
+        'northPlayer': LANCELOT_PLAYER_SCHEMA,
+        'eastPlayer': LANCELOT_PLAYER_SCHEMA,
+        'southPlayer': LANCELOT_PLAYER_SCHEMA,
+        'westPlayer': LANCELOT_PLAYER_SCHEMA,
+        'segment': pl.Struct({'game': pl.Struct({'homeTeam': LANCELOT_LINEUP_TEAM_SCHEMA, 'awayTeam': LANCELOT_LINEUP_TEAM_SCHEMA})}),
+    }),
+    'contract': pl.String,
+    'declarer': pl.String,
+    'result': pl.String,
+    'nsScore': pl.String,
+    'ewScore': pl.String,
+    'nsNote': pl.Float64,
+    'ewNote': pl.Float64,
+})
+# /results/teams/{team_id}: a single object. only the fields in TEAM_METADATA_COLUMNS are used.
+LANCELOT_TEAM_SCHEMA = pl.Schema({
+    'id': pl.Int64,
+    'label': pl.String,
+    'orientation': pl.String,
+    'player1': pl.Struct({'id': pl.Int64, 'migrationId': pl.Int64, 'firstName': pl.String, 'lastName': pl.String}),
+    'player2': pl.Struct({'id': pl.Int64, 'migrationId': pl.Int64, 'firstName': pl.String, 'lastName': pl.String}),
+    'section': pl.String,
+    'startTableNumber': pl.Int64,
+})
+
+
+def normalize_json(data: Union[bytes, str, Dict, List[Dict]], schema: Optional[pl.Schema] = None) -> pl.DataFrame:
+    """Load JSON into polars and unnest all struct columns. Same column names as the original python flattening e.g. lineup_segment_game_homeTeam_id. Lists are kept as list columns.
+
+    Args:
+        data: Raw JSON bytes/str (parsed natively by polars) or already parsed records.
+        schema: Schema of the top level (nested) columns e.g. LANCELOT_SCORES_SCHEMA. Types are inferred from all records if None.
+    """
+    if isinstance(data, (bytes, str)):
+        df = pl.read_json(io.BytesIO(data.encode('utf-8') if isinstance(data, str) else data), schema=schema, infer_schema_length=None)
+    elif isinstance(data, (dict, list)):
+        df = pl.DataFrame([data] if isinstance(data, dict) else data, schema=schema, infer_schema_length=None)
+    else:
+        raise ValueError(f"Unsupported data type: {type(data)}")
+    # unnest one level of structs per pass until none remain.
+    while True:
+        struct_cols = [col for col, dtype in df.schema.items() if isinstance(dtype, pl.Struct) and len(dtype.fields) > 0]
+        if len(struct_cols) == 0:
+            return df
+        df = df.unnest(struct_cols, separator='_')
+
+
+def create_dataframe(data: Union[bytes, str, Dict, List[Dict]], schema: Optional[pl.Schema] = None) -> pl.DataFrame:
+    """Create a Polars DataFrame from (flattened) JSON data"""
     try:
-        # Flatten each record in the dict or list
-        if isinstance(data, dict):
-            #print(f"flattening dict")
-            flattened_data = [flatten_json(data)]
-        elif isinstance(data, list):
-            #print(f"flattening list")
-            flattened_data = [flatten_json(record) for record in data]
-        else:
-            print(f"Unsupported data type: {type(data)}")
-            raise ValueError(f"Unsupported data type: {type(data)}")
-        
-        # Create DataFrame
-        df = pl.DataFrame(flattened_data)
-        return df
-        
+        return normalize_json(data, schema)
     except Exception as e:
         print(f"Error creating DataFrame: {e}")
         print(f"Data structure: {type(data)}")
-        print(f"First record: {json.dumps(data[0], indent=2) if data else 'Empty'}")
         raise
 
+
 # obsolete?
-def get_scores_data(scores_json: List[Dict[str, Any]], group_id: int, session_id: int, team_id: int) -> Optional[pl.DataFrame]:
+def get_scores_data(scores_json: Union[bytes, List[Dict[str, Any]]], group_id: int, session_id: int, team_id: int) -> Optional[pl.DataFrame]:
     print(f"creating dataframe from scores_json")
-    df = create_dataframe(scores_json)
+    df = create_dataframe(scores_json, LANCELOT_SCORES_SCHEMA)
     if df is None:
         print(f"Couldn't make dataframe from scores_json for {team_id=} {session_id=}")
         return None
-    if 'board_id' not in df.columns: # todo: find out why 'board_id' doesn't exist
+    if df['board_id'].is_null().all(): # todo: find out why 'board_id' doesn't exist
         print(f"No board_id for team_session_scores: {team_id} {session_id}")
         return None
     if df['lineup_segment_game_homeTeam_orientation'].ne('NS').any():
@@ -94,51 +196,118 @@ def get_scores_data(scores_json: List[Dict[str, Any]], group_id: int, session_id
     return df
 
 
+# team json columns added to every scores row.
+TEAM_METADATA_COLUMNS = {
+    'orientation': pl.String,
+    'player1_id': pl.UInt32,
+    'player1_firstName': pl.String,
+    'player1_lastName': pl.String,
+    'player2_id': pl.UInt32,
+    'player2_firstName': pl.String,
+    'player2_lastName': pl.String,
+    'section': pl.String,
+    'startTableNumber': pl.UInt16,
+}
+
+
+@cached(response_cache)
 async def create_df_from_group_session_pair(group_id: str, session_id: str, pair_id: str) -> Optional[pl.DataFrame]:
     try:
         
-        # get team data
+        # get team data and scores concurrently over the shared connection pool.
         api_team_url = f'https://api-lancelot.ffbridge.fr/results/teams/{pair_id}'
-        print(f"api_team_url:{api_team_url}")
-        async with httpx.AsyncClient() as client:
-            response = await client.get(api_team_url)
-            response.raise_for_status()
-            team_json = response.json()
-            print(f"got team_json")
-            team_df = create_dataframe(team_json)
-            # columns: ['awayGames', 'homeGames', 'orientation', 'player1_id', 'player1_migrationId', 'player1_firstName', 'player1_lastName',
-            #  'player2_firstName', 'player2_lastName', 'player2_id', 'player2_migrationId',
-            #  'player3', 'player4', 'player5', 'player6', 'player7', 'player8', 'rankings', 'section', 'startTableNumber', 'id', 'label']
-            print(f"team_df:",team_df.columns)
-            print(team_df)
-
         api_scores_url = f'https://api-lancelot.ffbridge.fr/results/teams/{pair_id}/session/{session_id}/scores'
-        print(f"api_scores_url:{api_scores_url}")
-        async with httpx.AsyncClient() as client:
-            response = await client.get(api_scores_url)
-            response.raise_for_status()
-            scores_json = response.json() 
+        async with client_scope():
+            team_json, scores_json = await asyncio.gather(get_content(api_team_url), get_content(api_scores_url))
+        print(f"got team_json")
+        team_df = create_dataframe(team_json, LANCELOT_TEAM_SCHEMA)
+        # columns: ['id', 'label', 'orientation', 'player1_id', 'player1_migrationId', 'player1_firstName', 'player1_lastName',
+        #  'player2_id', 'player2_migrationId', 'player2_firstName', 'player2_lastName', 'section', 'startTableNumber']
+        # the json also has 'awayGames', 'homeGames', 'player3' to 'player8' and 'rankings' which aren't in LANCELOT_TEAM_SCHEMA.
+        print(f"team_df:",team_df.columns)
+        print(team_df)
+
         df = get_scores_data(scores_json, group_id, session_id, pair_id)
 
-        # initialize columns which are needed for SQL queries.
+        # initialize columns which are needed for SQL queries in a single projection.
         # todo: should these be initialized in ffbridgelib.convert_ffdf_to_mldf()?
-        df = df.with_columns(pl.lit(group_id).cast(pl.UInt32).alias('group_id'))
-        df = df.with_columns(pl.lit(session_id).cast(pl.UInt32).alias('session_id'))
-        df = df.with_columns(pl.lit(pair_id).cast(pl.UInt32).alias('team_id'))
-        df = df.with_columns(pl.lit(team_df['orientation'].first()).cast(pl.String).alias('orientation'))
-        df = df.with_columns(pl.lit(team_df['player1_id'].first()).cast(pl.UInt32).alias('player1_id'))
-        df = df.with_columns(pl.lit(team_df['player1_firstName'].first()).cast(pl.String).alias('player1_firstName'))
-        df = df.with_columns(pl.lit(team_df['player1_lastName'].first()).cast(pl.String).alias('player1_lastName'))
-        df = df.with_columns(pl.lit(team_df['player2_id'].first()).cast(pl.UInt32).alias('player2_id'))
-        df = df.with_columns(pl.lit(team_df['player2_firstName'].first()).cast(pl.String).alias('player2_firstName'))
-        df = df.with_columns(pl.lit(team_df['player2_lastName'].first()).cast(pl.String).alias('player2_lastName'))
         # todo: implement awayGames, homeGames, player3, player4, player5, player6, player7, player8, rankings?
-        df = df.with_columns(pl.lit(team_df['section'].first()).cast(pl.String).alias('section'))
-        df = df.with_columns(pl.lit(team_df['startTableNumber'].first()).cast(pl.UInt16).alias('startTableNumber'))
-        df = df.with_columns(pl.struct([pl.col('team_id'),pl.col('session_id')]).alias('team_session_id'))
-        df = df.select([pl.col('group_id','team_session_id','session_id','team_id'),pl.all().exclude('group_id','team_session_id','session_id','team_id')])
+        team = team_df.row(0, named=True)
+        key_cols = ['group_id','team_session_id','session_id','team_id']
+        df = df.select([
+            pl.lit(group_id).cast(pl.UInt32).alias('group_id'),
+            pl.struct([pl.lit(pair_id).cast(pl.UInt32).alias('team_id'),pl.lit(session_id).cast(pl.UInt32).alias('session_id')]).alias('team_session_id'),
+            pl.lit(session_id).cast(pl.UInt32).alias('session_id'),
+            pl.lit(pair_id).cast(pl.UInt32).alias('team_id'),
+            pl.all().exclude(key_cols+list(TEAM_METADATA_COLUMNS)),
+            *[pl.lit(team[col]).cast(dtype).alias(col) for col, dtype in TEAM_METADATA_COLUMNS.items()],
+        ])
     except Exception as e:
         print(f"Error creating df from group_session_pair: {e}")
         return None
 
-    return df
\ No newline at end of file
+    return df
+
+# maximum concurrent pair fetches for one session request. each pair fetch is two upstream requests.
+FFBRIDGE_SESSION_CONCURRENCY = int(os.getenv('FFBRIDGE_SESSION_CONCURRENCY', 8))
+# team id columns of the (flattened) scores json. used to discover teams which aren't in the session ranking.
+OPPONENT_TEAM_ID_COLUMNS = ['lineup_segment_game_homeTeam_id', 'lineup_segment_game_awayTeam_id']
+
+
+async def get_session_team_ids(session_id: str) -> List[str]:
+    api_ranking_url = f'https://api-lancelot.ffbridge.fr/results/sessions/{session_id}/ranking'
+    ranking_df = create_dataframe(await get_content(api_ranking_url))
+    team_id_col = 'team_id' if 'team_id' in ranking_df.columns else 'id' # ranking entries are either {'team': {'id': ...}} or teams.
+    return [str(team_id) for team_id in ranking_df[team_id_col].drop_nulls().unique(maintain_order=True)]
+
+
+@cached(response_cache)
+async def create_df_from_group_session(group_id: str, session_id: str) -> Optional[pl.DataFrame]:
+    """Create one frame of every pair's scores in the session keyed by team_session_id.
+
+    Teams are discovered from the session ranking. Opponents found in the scores which aren't in the ranking are fetched too.
+    Pairs are fetched concurrently (at most FFBRIDGE_SESSION_CONCURRENCY at a time) using create_df_from_group_session_pair().
+    """
+    try:
+        t = time.time()
+        async with client_scope(): # pair fetches are tasks created in this scope so they share its client.
+            team_ids = await get_session_team_ids(session_id)
+            print(f"session {session_id}: {len(team_ids)} teams in ranking")
+            semaphore = asyncio.Semaphore(FFBRIDGE_SESSION_CONCURRENCY)
+
+            async def fetch_pair(team_id: str) -> Optional[pl.DataFrame]:
+                async with semaphore:
+                    return await create_df_from_group_session_pair(group_id, session_id, team_id)
+
+            seen = set(team_ids)
+            pending = {asyncio.create_task(fetch_pair(team_id)) for team_id in team_ids}
+            dfs = []
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        df = task.result()
+                        if df is None: # already reported by create_df_from_group_session_pair e.g. sitout or not a Mitchell movement.
+                            continue
+                        dfs.append(df)
+                        for col in OPPONENT_TEAM_ID_COLUMNS:
+                            if col not in df.columns:
+                                continue
+                            for team_id in df[col].drop_nulls().unique().cast(pl.String):
+                                if team_id not in seen:
+                                    seen.add(team_id)
+                                    pending.add(asyncio.create_task(fetch_pair(team_id)))
+            finally:
+                for task in pending:
+                    task.cancel()
+
+            if len(dfs) == 0:
+                print(f"No pair scores found for session {session_id}")
+                return None
+        df = pl.concat(dfs, how='diagonal_relaxed').sort('team_id', maintain_order=True)
+        print(f"session {session_id}: {len(dfs)} of {len(seen)} teams fetched. rows:{df.height} time:{time.time()-t} seconds")
+    except Exception as e:
+        print(f"Error creating df from group_session: {e}")
+        return None
+
+    return df
@@ -0,0 +1,125 @@
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import dotenv
+import polars as pl
+
+dotenv.load_dotenv()
+
+# Background jobs for long running augmentations (DD, par, single dummy) which can't run inside a request.
+# Jobs run in a process pool. Workers report progress through a Manager dict using the same progress hook protocol
+# (progress.progress(percent, message), progress.empty()) that mlBridgeAugmentLib uses for streamlit.
+# Job state and results are kept in memory by the serving process and expire after JOB_RESULT_TTL seconds.
+
+JOB_MAX_WORKERS = int(os.getenv('JOB_MAX_WORKERS', 1))
+JOB_AUGMENT_MAX_WORKERS = int(os.getenv('JOB_AUGMENT_MAX_WORKERS', 1)) # DD worker processes used by each job.
+JOB_RESULT_TTL = float(os.getenv('JOB_RESULT_TTL', 3600))
+# shared HrsCacheStore so jobs reuse DD/SD computes. None computes everything. workers in this and other serving processes
+# may upsert at the same time. HrsCacheStore serializes them with a file lock.
+HRS_CACHE_DIR = os.getenv('HRS_CACHE_DIR')
+
+
+class JobProgress:
+    """Progress hook passed to the augmentations. Writes to a Manager dict so the serving process can read it."""
+
+    def __init__(self, job_id: str, progress_d: Any):
+        self.job_id = job_id
+        self.progress_d = progress_d
+
+    def progress(self, percent: int, message: str = '') -> None:
+        self.progress_d[self.job_id] = {'percent': percent, 'message': message}
+
+    def empty(self) -> None:
+        pass
+
+
+def run_augment_job(job_id: str, df: pl.DataFrame, sd_productions: int, max_adds: Optional[int], progress_d: Any, hrs_cache_dir: Optional[str] = None) -> pl.DataFrame:
+    # runs in a worker process. imported here so the serving process doesn't load endplay/dds.
+    from mlBridgeLib.mlBridgeAugmentLib import AllAugmentations
+    from mlBridgeLib.mlBridgeHrsCacheLib import HrsCacheStore
+    progress = JobProgress(job_id, progress_d)
+    progress.progress(0, 'started')
+    hrs_cache = None if hrs_cache_dir is None else HrsCacheStore(hrs_cache_dir)
+    augmenter = AllAugmentations(df, hrs_cache, sd_productions=sd_productions, max_adds=max_adds, output_progress=True, progress=progress, max_workers=JOB_AUGMENT_MAX_WORKERS)
+    df, _ = augmenter.perform_all_augmentations()
+    progress.progress(100, 'done')
+    return df
+
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str
+    future: Future
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+
+class JobManager:
+    def __init__(self, max_workers: int = JOB_MAX_WORKERS, result_ttl: float = JOB_RESULT_TTL):
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self.jobs: Dict[str, Job] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress_d = None
+
+    def _start(self) -> None:
+        # created on first submit so that importing the app doesn't start processes.
+        if self._executor is None:
+            # spawn rather than fork. the serving process is multi-threaded (event loop, thread pools).
+            mp_context = multiprocessing.get_context('spawn')
+            self._manager = mp_context.Manager()
+            self._progress_d = self._manager.dict()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp_context)
+
+    def _expire(self) -> None:
+        now = time.time()
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished is not None and now-job.finished > self.result_ttl]:
+            del self.jobs[job_id]
+            self._progress_d.pop(job_id, None)
+
+    def submit_augment(self, df: pl.DataFrame, sd_productions: int = 40, max_adds: Optional[int] = None) -> str:
+        self._start()
+        self._expire()
+        job_id = uuid.uuid4().hex
+        future = self._executor.submit(run_augment_job, job_id, df, sd_productions, max_adds, self._progress_d, HRS_CACHE_DIR)
+        job = Job(job_id, 'augment', future)
+        future.add_done_callback(lambda f: setattr(job, 'finished', time.time()))
+        self.jobs[job_id] = job
+        print(f"job {job_id}: queued augment rows:{df.height} sd_productions:{sd_productions}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def status(self, job: Job) -> Dict[str, Any]:
+        progress = self._progress_d.get(job.job_id, {})
+        if job.future.done():
+            status = 'failed' if job.future.exception() is not None else 'done'
+        else:
+            status = 'running' if progress else 'queued' # progress is written as soon as a worker starts the job.
+        return {
+            'job_id': job.job_id,
+            'kind': job.kind,
+            'status': status,
+            'percent': 100 if status == 'done' else progress.get('percent', 0),
+            'message': progress.get('message', ''),
+            'error': None if status != 'failed' else f"{type(job.future.exception()).__name__}: {job.future.exception()}",
+            'created': job.created,
+            'finished': job.finished,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._executor = None
+
+
+job_manager = JobManager()
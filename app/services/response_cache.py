@@ -0,0 +1,195 @@
+import asyncio
+import functools
+import hashlib
+import os
+import pathlib
+import pickle
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Union
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Response cache for upstream (ACBL, FFBridge) fetches.
+# Tier 1 is an in-process LRU with per entry TTL. Tier 2 is an optional on-disk tier which survives restarts and is shared by workers.
+# Concurrent requests for the same key are coalesced so only one upstream fetch is in flight per key.
+# None results are never cached because the services return None on upstream errors.
+
+_MISSING = object()
+
+
+class FetchCancelled(Exception):
+    """Set on a coalesced fetch whose leader was cancelled. Waiters retry instead of being cancelled with it."""
+
+
+class MemoryTier:
+    """In-process LRU cache with per entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires, value = entry
+        if expires < time.time():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.time()+ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class DiskTier:
+    """On-disk cache. One pickle file per key holding (expires, value)."""
+
+    def __init__(self, path: Union[str, pathlib.Path]):
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, key: Hashable) -> pathlib.Path:
+        return self.path.joinpath(hashlib.sha256(repr(key).encode('utf-8')).hexdigest()+'.pkl')
+
+    def get(self, key: Hashable) -> Any:
+        file = self._file(key)
+        try:
+            with open(file, 'rb') as f:
+                expires, value = pickle.load(f)
+        except FileNotFoundError:
+            return _MISSING
+        except Exception as e:
+            print(f"Error reading response cache file {file}: {e}")
+            return _MISSING
+        if expires < time.time():
+            file.unlink(missing_ok=True)
+            return _MISSING
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        # write to a temp file then rename so concurrent readers never see a partial file.
+        # the temp name is unique so concurrent writers (threads or processes) never share a temp file.
+        file = self._file(key)
+        tmp_file = file.with_name(f'{file.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp')
+        try:
+            with open(tmp_file, 'wb') as f:
+                pickle.dump((time.time()+ttl, value), f)
+            os.replace(tmp_file, file)
+        finally:
+            tmp_file.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for file in self.path.glob('*.pkl'):
+            file.unlink(missing_ok=True)
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = 600, max_entries: int = 1024, disk_path: Optional[Union[str, pathlib.Path]] = None):
+        """
+        Args:
+            ttl: Default time to live in seconds.
+            max_entries: Maximum number of entries kept in memory.
+            disk_path: Directory for the on-disk tier. None disables the disk tier.
+        """
+        self.ttl = ttl
+        self.memory = MemoryTier(max_entries)
+        self.disk = None if disk_path is None else DiskTier(disk_path)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, key: Hashable) -> Any:
+        value = self.memory.get(key)
+        if value is not _MISSING or self.disk is None:
+            return value
+        value = await asyncio.to_thread(self.disk.get, key)
+        if value is not _MISSING:
+            self.memory.set(key, value, self.ttl) # promote
+        return value
+
+    async def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self.memory.set(key, value, ttl)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, value, ttl)
+            except Exception as e: # e.g. unpicklable value. memory tier still has it.
+                print(f"Error writing response cache for {key}: {e}")
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        """Return the cached value for key or await fetch() to create it. Concurrent callers of the same key share one fetch()."""
+        value = await self.get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except FetchCancelled:
+                # the leader was cancelled (e.g. its client disconnected). this caller is still waiting so it fetches for itself.
+                return await self.get_or_fetch(key, fetch, ttl)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            t = time.time()
+            value = await fetch()
+            print(f"response cache miss: {key} fetch time:{time.time()-t} seconds")
+        except asyncio.CancelledError:
+            # don't cancel the shared future. that would cancel every waiter along with the leader.
+            future.set_exception(FetchCancelled(key))
+            future.exception() # mark retrieved in case there are no waiters
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() # mark retrieved in case there are no waiters
+            raise
+        else:
+            future.set_result(value)
+            if value is not None:
+                await self.set(key, value, ttl)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+def cached(cache: ResponseCache, ttl: Optional[float] = None) -> Callable:
+    """Decorator for async service functions. The key is the function and its arguments. The undecorated function is available as .uncached."""
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+            return await cache.get_or_fetch(key, lambda: func(*args, **kwargs), ttl)
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+# shared by all services. configure with RESPONSE_CACHE_TTL (seconds), RESPONSE_CACHE_MAX_ENTRIES and RESPONSE_CACHE_DIR (enables disk tier).
+response_cache = ResponseCache(
+    ttl=float(os.getenv('RESPONSE_CACHE_TTL', 600)),
+    max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1024)),
+    disk_path=os.getenv('RESPONSE_CACHE_DIR'),
+)
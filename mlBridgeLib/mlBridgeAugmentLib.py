@@ -11,13 +11,19 @@
 # print a list of mandatory columns that must be present in df.columns. many columns can be derived from other columns e.g. scoring columns.
 
 import polars as pl
+import numpy as np
 from collections import defaultdict
-from typing import Optional, Union, Callable, Type, Dict, List, Tuple, Any
+import functools
+from typing import Optional, Union, Callable, Type, Dict, List, Tuple, Any, Iterator
 import time
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 import endplay # for __version__
 from endplay.parsers import pbn, lin, json
-from endplay.types import Deal, Contract, Denom, Player, Penalty, Vul
+from endplay.types import Deal, Player, Vul
 from endplay.dds import calc_dd_table, calc_all_tables, par
 from endplay.dealer import generate_deals
 
@@ -29,6 +35,13 @@ from mlBridgeLib.mlBridgeLib import (
     PairDirectionToOpponentPairDirection,
     score
 )
+from mlBridgeLib.mlBridgeHrsCacheLib import HrsCacheStore
+from mlBridgeLib.mlBridgeScoreTableLib import (
+    SCORE_TABLE_STRAINS, SCORE_TABLE_DBLS, SCORE_TABLE_DD_DBL,
+    get_score_table,
+    score_lookup_expr,
+    all_scores_lookup_expr
+)
 
 
 # todo: use versions in mlBridgeLib
@@ -202,28 +215,24 @@ def update_hrs_cache_df(hrs_cache_df: pl.DataFrame, new_df: pl.DataFrame) -> pl.
 
 
 # calculate dict of contract result scores. each column contains (non-vul,vul) scores for each trick taken. sets are always penalty doubled.
+@functools.cache
 def calculate_scores() -> Tuple[Dict[Tuple, int], Dict[Tuple, int], pl.DataFrame]:
-
+    # memoized. built once per process from the precomputed score table instead of endplay Contract objects.
+    # the returned dicts are shared by all callers so they must not be modified.
+    score_table = get_score_table()
     scores_d = {}
     all_scores_d = {(None,None,None,None,None):0} # PASS
 
-    strain_to_denom = [Denom.clubs, Denom.diamonds, Denom.hearts, Denom.spades, Denom.nt]
     for strain_char in 'SHDCN':
-        strain_index = 'CDHSN'.index(strain_char) # [3,2,1,0,4]
-        denom = strain_to_denom[strain_index]
+        strain_index = SCORE_TABLE_STRAINS.index(strain_char)
         for level in range(1,8): # contract level
             for tricks in range(14):
-                result = tricks-6-level
-                # sets are always penalty doubled
-                scores_d[(level,strain_char,tricks,False)] = Contract(level=level,denom=denom,declarer=Player.north,penalty=Penalty.passed if result>=0 else Penalty.doubled,result=result).score(Vul.none)
-                scores_d[(level,strain_char,tricks,True)] = Contract(level=level,denom=denom,declarer=Player.north,penalty=Penalty.passed if result>=0 else Penalty.doubled,result=result).score(Vul.both)
-                # calculate all possible scores
-                all_scores_d[(level,strain_char,tricks,False,'')] = Contract(level=level,denom=denom,declarer=Player.north,penalty=Penalty.passed,result=result).score(Vul.none)
-                all_scores_d[(level,strain_char,tricks,False,'X')] = Contract(level=level,denom=denom,declarer=Player.north,penalty=Penalty.doubled,result=result).score(Vul.none)
-                all_scores_d[(level,strain_char,tricks,False,'XX')] = Contract(level=level,denom=denom,declarer=Player.north,penalty=Penalty.redoubled,result=result).score(Vul.none)
-                all_scores_d[(level,strain_char,tricks,True,'')] = Contract(level=level,denom=denom,declarer=Player.north,penalty=Penalty.passed,result=result).score(Vul.both)
-                all_scores_d[(level,strain_char,tricks,True,'X')] = Contract(level=level,denom=denom,declarer=Player.north,penalty=Penalty.doubled,result=result).score(Vul.both)
-                all_scores_d[(level,strain_char,tricks,True,'XX')] = Contract(level=level,denom=denom,declarer=Player.north,penalty=Penalty.redoubled,result=result).score(Vul.both)
+                for vul in (False,True):
+                    # sets are always penalty doubled
+                    scores_d[(level,strain_char,tricks,vul)] = int(score_table[level-1,strain_index,tricks,int(vul),SCORE_TABLE_DD_DBL])
+                    # all possible scores
+                    for dbl_index, dbl in enumerate(SCORE_TABLE_DBLS):
+                        all_scores_d[(level,strain_char,tricks,vul,dbl)] = int(score_table[level-1,strain_index,tricks,int(vul),dbl_index])
 
     # create score dataframe from dict
     sd = defaultdict(list)
@@ -244,23 +253,71 @@ def display_double_dummy_deals(deals: List[Deal], dd_result_tables: List[Any], d
         rt.pprint()
 
 
+# process pool shared by the double dummy and single dummy solvers so worker processes are started once, not on every call.
+# recreated when a call asks for a different max_workers or after a worker died.
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is not None and _process_pool_workers != max_workers:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=max_workers)
+            _process_pool_workers = max_workers
+        return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+def _calc_all_tables_batch(deals: List[Deal]) -> List[Any]:
+    # module level so it can be pickled into a ProcessPoolExecutor worker.
+    return list(calc_all_tables(deals))
+
+
 # todo: could save a couple seconds by creating dict of deals
-def calc_double_dummy_deals(deals: List[Deal], batch_size: int = 40, output_progress: bool = False, progress: Optional[Any] = None) -> List[Any]:
+def calc_double_dummy_deals(deals: List[Deal], batch_size: int = 40, output_progress: bool = False, progress: Optional[Any] = None, max_workers: Optional[int] = None) -> List[Any]:
     # was the wonkyness due to unique() not having maintain_order=True? Let's see if it behaves now.
+    # batches are solved across a pool of max_workers processes (default: one per core). results are returned in the order of deals.
+    # max_workers=1 solves serially in this process. scripts calling this on Windows must be guarded by if __name__ == '__main__'.
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    batches = [deals[b:b+batch_size] for b in range(0,len(deals),batch_size)]
+    if max_workers > 1 and len(batches) > 1:
+        batch_results = get_process_pool(max_workers).map(_calc_all_tables_batch, batches)
+    else:
+        batch_results = map(_calc_all_tables_batch, batches)
     all_result_tables = []
-    for i,b in enumerate(range(0,len(deals),batch_size)):
-        if output_progress:
-            if i % 100 == 0: # only show progress every 100 batches
-                percent_complete = int(b*100/len(deals))
-                if progress:
-                    if hasattr(progress, 'progress'): # streamlit
-                        progress.progress(percent_complete, f"{percent_complete}%: Double dummies calculated for {b} of {len(deals)} unique deals.")
-                    elif hasattr(progress, 'set_description'): # tqdm
-                        progress.set_description(f"{percent_complete}%: Double dummies calculated for {b} of {len(deals)} unique deals.")
-                else:
-                    print(f"{percent_complete}%: Double dummies calculated for {b} of {len(deals)} unique deals.")
-        result_tables = calc_all_tables(deals[b:b+batch_size])
-        all_result_tables.extend(result_tables)
+    try:
+        for i,result_tables in enumerate(batch_results):
+            b = i*batch_size
+            if output_progress:
+                if i % 100 == 0: # only show progress every 100 batches
+                    percent_complete = int(b*100/len(deals))
+                    if progress:
+                        if hasattr(progress, 'progress'): # streamlit
+                            progress.progress(percent_complete, f"{percent_complete}%: Double dummies calculated for {b} of {len(deals)} unique deals.")
+                        elif hasattr(progress, 'set_description'): # tqdm
+                            progress.set_description(f"{percent_complete}%: Double dummies calculated for {b} of {len(deals)} unique deals.")
+                    else:
+                        print(f"{percent_complete}%: Double dummies calculated for {b} of {len(deals)} unique deals.")
+            all_result_tables.extend(result_tables)
+    except BrokenProcessPool:
+        shutdown_process_pool()
+        raise
+    finally:
+        if hasattr(batch_results, 'close'):
+            batch_results.close() # cancels batches not yet started if we stopped early
     if output_progress: 
         if progress:
             if hasattr(progress, 'progress'): # streamlit
@@ -274,7 +331,7 @@ def calc_double_dummy_deals(deals: List[Deal], batch_size: int = 40, output_prog
 
 
 # takes 10000/hour
-def calculate_dd_scores(hrs_df: pl.DataFrame, hrs_cache_df: pl.DataFrame, max_adds: Optional[int] = None, output_progress: bool = True, progress: Optional[Any] = None) -> Tuple[pl.DataFrame, Dict[str, Any]]:
+def calculate_dd_scores(hrs_df: pl.DataFrame, hrs_cache_df: pl.DataFrame, max_adds: Optional[int] = None, output_progress: bool = True, progress: Optional[Any] = None, max_workers: Optional[int] = None) -> Tuple[pl.DataFrame, Dict[str, Any]]:
 
     # Calculate double dummy scores only
     print(f"{hrs_df.height=}")
@@ -306,7 +363,7 @@ def calculate_dd_scores(hrs_df: pl.DataFrame, hrs_cache_df: pl.DataFrame, max_ad
     
     cleaned_pbns = [Deal(pbn) for pbn in pbns_to_process]
     assert all([pbn == dpbn.to_pbn() for pbn,dpbn in zip(pbns_to_process,cleaned_pbns)]), [(pbn,dpbn.to_pbn()) for pbn,dpbn in zip(pbns_to_process,cleaned_pbns) if pbn != dpbn.to_pbn()] # usually a sort order issue which should have been fixed in previous step
-    unique_dd_tables = calc_double_dummy_deals(cleaned_pbns, output_progress=output_progress, progress=progress)
+    unique_dd_tables = calc_double_dummy_deals(cleaned_pbns, output_progress=output_progress, progress=progress, max_workers=max_workers)
     print(f"{len(unique_dd_tables)=}")
     unique_dd_tables_d = {deal.to_pbn():rt for deal,rt in zip(cleaned_pbns,unique_dd_tables)}
     print(f"{len(unique_dd_tables_d)=}")
@@ -475,7 +532,7 @@ def constraints(deal: Deal) -> bool:
     return True
 
 
-def generate_single_dummy_deals(predeal_string: str, produce: int, env: Dict[str, Any] = dict(), max_attempts: int = 1000000, seed: int = 42, show_progress: bool = True, strict: bool = True, swapping: int = 0) -> Tuple[Tuple[Deal, ...], List[Any]]:
+def sample_single_dummy_deals(predeal_string: str, produce: int, env: Dict[str, Any] = dict(), max_attempts: int = 1000000, seed: int = 42, show_progress: bool = True, strict: bool = True, swapping: int = 0) -> Tuple[Deal, ...]:
     
     predeal = Deal(predeal_string)
 
@@ -491,43 +548,94 @@ def generate_single_dummy_deals(predeal_string: str, produce: int, env: Dict[str
         strict=strict
         )
 
-    deals = tuple(deals_t) # create a tuple before interop memory goes wonky
-    
-    return deals, calc_double_dummy_deals(deals)
+    return tuple(deals_t) # create a tuple before interop memory goes wonky
 
 
-def calculate_single_dummy_probabilities(deal: str, produce: int = 100) -> Tuple[Dict[str, pl.DataFrame], Tuple[int, Dict[Tuple[str, str, str], List[float]]]]:
+def generate_single_dummy_deals(predeal_string: str, produce: int, env: Dict[str, Any] = dict(), max_attempts: int = 1000000, seed: int = 42, show_progress: bool = True, strict: bool = True, swapping: int = 0) -> Tuple[Tuple[Deal, ...], List[Any]]:
 
-    # todo: has this been obsoleted by endplay's calc_all_tables 2nd parameter?
-    ns_ew_rows = {}
-    SD_Tricks_df = {}
-    for ns_ew in ['NS','EW']:
-        s = deal[2:].split()
-        if ns_ew == 'NS':
-            s[1] = '...'
-            s[3] = '...'
-        else:
-            s[0] = '...'
-            s[2] = '...'
-        predeal_string = 'N:'+' '.join(s)
-        #print(f"predeal:{predeal_string}")
+    deals = sample_single_dummy_deals(predeal_string, produce, env=env, max_attempts=max_attempts, seed=seed, show_progress=show_progress, strict=strict, swapping=swapping)
+    
+    return deals, calc_double_dummy_deals(deals, max_workers=1) # called once per deal. too few batches to be worth a process pool.
 
-        sd_deals, sd_dd_result_tables = generate_single_dummy_deals(predeal_string, produce, show_progress=False)
 
-        #display_double_dummy_deals(sd_deals, sd_dd_result_tables, 0, 4)
-        SD_Tricks_df[ns_ew] = pl.DataFrame([[sddeal.to_pbn()]+[s for d in t.to_list() for s in d] for sddeal,t in zip(sd_deals,sd_dd_result_tables)],schema={'SD_Deal':pl.String}|{'_'.join(['SD_Tricks',d,s]):pl.UInt8 for s in 'SHDCN' for d in 'NESW'},orient='row')
+def single_dummy_predeal_string(deal: str, ns_ew: str) -> str:
+    # keep the hands of the ns_ew pair, blank out the other pair.
+    s = deal[2:].split()
+    if ns_ew == 'NS':
+        s[1] = '...'
+        s[3] = '...'
+    else:
+        s[0] = '...'
+        s[2] = '...'
+    return 'N:'+' '.join(s)
+
+
+def single_dummy_tricks_to_probabilities(sd_deals: Tuple[Deal, ...], sd_dd_result_tables: List[Any]) -> Tuple[pl.DataFrame, Dict[Tuple[str, str], List[float]]]:
+
+    #display_double_dummy_deals(sd_deals, sd_dd_result_tables, 0, 4)
+    SD_Tricks_df = pl.DataFrame([[sddeal.to_pbn()]+[s for d in t.to_list() for s in d] for sddeal,t in zip(sd_deals,sd_dd_result_tables)],schema={'SD_Deal':pl.String}|{'_'.join(['SD_Tricks',d,s]):pl.UInt8 for s in 'SHDCN' for d in 'NESW'},orient='row')
+
+    rows = {}
+    for d in 'NESW':
+        for s in 'SHDCN':
+            # always create 14 rows (0-13 tricks taken) for combo of direction and suit. fill never-happened with proper index and 0.0 prob value.
+            #ns_ew_rows[(ns_ew,d,s)] = dd_df[d+s].to_pandas().value_counts(normalize=True).reindex(range(14), fill_value=0).tolist() # ['Fixed_Direction','Declarer_Direction','Suit']+['SD_Prob_Take_'+str(n) for n in range(14)]
+            vc = {ds:p for ds,p in SD_Tricks_df['_'.join(['SD_Tricks',d,s])].value_counts(normalize=True).rows()}
+            index = {i:0.0 for i in range(14)} # fill values for missing probs
+            rows[(d,s)] = list((index|vc).values())
+    return SD_Tricks_df, rows
+
+
+def calculate_single_dummy_probabilities_batch(deals: List[str], produce: int = 100) -> List[Tuple[str, Dict[str, pl.DataFrame], Tuple[int, Dict[Tuple[str, str, str], List[float]]]]]:
+    # samples single dummy deals for every board in deals, then double dummy solves all samples together so that
+    # calc_all_tables batches are always full instead of ending each board with a partial batch.
+    # returns [(deal, SD_Tricks_df, (produce, ns_ew_rows))] in the order of deals.
+    samples = [(deal, ns_ew, sample_single_dummy_deals(single_dummy_predeal_string(deal, ns_ew), produce, show_progress=False)) for deal in deals for ns_ew in ['NS','EW']]
+    all_sd_deals = [sd_deal for _, _, sd_deals in samples for sd_deal in sd_deals]
+    all_sd_dd_result_tables = calc_double_dummy_deals(all_sd_deals, max_workers=1)
+
+    results = {}
+    i = 0
+    for deal, ns_ew, sd_deals in samples:
+        sd_dd_result_tables = all_sd_dd_result_tables[i:i+len(sd_deals)]
+        i += len(sd_deals)
+        SD_Tricks_df, rows = single_dummy_tricks_to_probabilities(sd_deals, sd_dd_result_tables)
+        SD_Tricks_df_d, ns_ew_rows = results.setdefault(deal, ({}, {}))
+        SD_Tricks_df_d[ns_ew] = SD_Tricks_df
+        ns_ew_rows.update({(ns_ew,d,s):probs for (d,s),probs in rows.items()})
+    return [(deal, SD_Tricks_df_d, (produce, ns_ew_rows)) for deal,(SD_Tricks_df_d, ns_ew_rows) in results.items()]
 
-        for d in 'NESW':
-            for s in 'SHDCN':
-                # always create 14 rows (0-13 tricks taken) for combo of direction and suit. fill never-happened with proper index and 0.0 prob value.
-                #ns_ew_rows[(ns_ew,d,s)] = dd_df[d+s].to_pandas().value_counts(normalize=True).reindex(range(14), fill_value=0).tolist() # ['Fixed_Direction','Declarer_Direction','Suit']+['SD_Prob_Take_'+str(n) for n in range(14)]
-                vc = {ds:p for ds,p in SD_Tricks_df[ns_ew]['_'.join(['SD_Tricks',d,s])].value_counts(normalize=True).rows()}
-                index = {i:0.0 for i in range(14)} # fill values for missing probs
-                ns_ew_rows[(ns_ew,d,s)] = list((index|vc).values())
 
+def calculate_single_dummy_probabilities(deal: str, produce: int = 100) -> Tuple[Dict[str, pl.DataFrame], Tuple[int, Dict[Tuple[str, str, str], List[float]]]]:
+
+    # todo: has this been obsoleted by endplay's calc_all_tables 2nd parameter?
+    (_, SD_Tricks_df, (produce, ns_ew_rows)), = calculate_single_dummy_probabilities_batch([deal], produce)
     return SD_Tricks_df, (produce, ns_ew_rows)
 
 
+def iter_single_dummy_probabilities(deals: List[str], produce: int = 100, max_workers: Optional[int] = None, deals_per_task: int = 10) -> Iterator[Tuple[str, Dict[str, pl.DataFrame], Tuple[int, Dict[Tuple[str, str, str], List[float]]]]]:
+    # fans deals out to a process pool in tasks of deals_per_task boards. yields each board's results as soon as its task finishes
+    # so the order is completion order, not the order of deals. max_workers=1 runs the tasks serially in this process.
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    tasks = [deals[i:i+deals_per_task] for i in range(0,len(deals),deals_per_task)]
+    if max_workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield from calculate_single_dummy_probabilities_batch(task, produce)
+        return
+    executor = get_process_pool(max_workers)
+    futures = [executor.submit(calculate_single_dummy_probabilities_batch, task, produce) for task in tasks]
+    try:
+        for future in as_completed(futures):
+            yield from future.result()
+    except BrokenProcessPool:
+        shutdown_process_pool()
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+
+
 # def append_single_dummy_results(pbns,sd_cache_d,produce=100):
 #     for pbn in pbns:
 #         if pbn not in sd_cache_d:
@@ -536,7 +644,7 @@ def calculate_single_dummy_probabilities(deal: str, produce: int = 100) -> Tuple
 
 
 # performs at 10000/hr
-def calculate_sd_probs(df: pl.DataFrame, hrs_cache_df: pl.DataFrame, sd_productions: int = 100, max_adds=None, progress: Optional[Any] = None) -> Tuple[Dict[str, pl.DataFrame], pl.DataFrame]:
+def calculate_sd_probs(df: pl.DataFrame, hrs_cache_df: pl.DataFrame, sd_productions: int = 100, max_adds=None, progress: Optional[Any] = None, max_workers: Optional[int] = None) -> Tuple[Dict[str, pl.DataFrame], pl.DataFrame]:
 
     # calculate single dummy probabilities. if already calculated use cache value else update e with new result.
     sd_d = {}
@@ -570,7 +678,9 @@ def calculate_sd_probs(df: pl.DataFrame, hrs_cache_df: pl.DataFrame, sd_producti
     cleaned_pbns = [Deal(pbn) for pbn in pbns_to_process]
     assert all([pbn == dpbn.to_pbn() for pbn,dpbn in zip(pbns_to_process,cleaned_pbns)]), [(pbn,dpbn.to_pbn()) for pbn,dpbn in zip(pbns_to_process,cleaned_pbns) if pbn != dpbn.to_pbn()] # usually a sort order issue which should have been fixed in previous step
     print(f"processing time assuming 10000/hour:{len(pbns_to_process)/10000} hours")
-    for i,pbn in enumerate(pbns_to_process):
+    t = time.time()
+    # results stream back in completion order. i counts completed deals.
+    for i,(pbn, sd_dfs, sd) in enumerate(iter_single_dummy_probabilities(pbns_to_process, sd_productions, max_workers=max_workers)):
         if progress:
             percent_complete = int(i*100/len(pbns_to_process))
             if hasattr(progress, 'progress'): # streamlit
@@ -580,13 +690,8 @@ def calculate_sd_probs(df: pl.DataFrame, hrs_cache_df: pl.DataFrame, sd_producti
         else:
             if i < 10 or i % 10000 == 0:
                 percent_complete = int(i*100/len(pbns_to_process))
-                print(f"{percent_complete}%: Single dummies calculated for {i} of {len(pbns_to_process)} unique deals using {sd_productions} samples per deal.")
-        if not progress and (i < 10 or i % 10000 == 0):
-            t = time.time()
-        sd_dfs_d[pbn], sd_d[pbn] = calculate_single_dummy_probabilities(pbn, sd_productions) # all combinations of declarer pair direction, declarer direciton, suit, tricks taken
-        if not progress and (i < 10 or i % 10000 == 0):
-            print(f"calculate_single_dummy_probabilities: time:{time.time()-t} seconds")
-        #error
+                print(f"{percent_complete}%: Single dummies calculated for {i} of {len(pbns_to_process)} unique deals using {sd_productions} samples per deal. time:{time.time()-t} seconds")
+        sd_dfs_d[pbn], sd_d[pbn] = sd_dfs, sd # all combinations of declarer pair direction, declarer direciton, suit, tricks taken
     if progress:
         if hasattr(progress, 'progress'): # streamlit
             progress.progress(100, f"100%: Single dummies calculated for {len(pbns_to_process)} of {len(pbns_to_process)} unique deals using {sd_productions} samples per deal.")
@@ -597,8 +702,8 @@ def calculate_sd_probs(df: pl.DataFrame, hrs_cache_df: pl.DataFrame, sd_producti
 
     # create single dummy trick taking probability distribution columns
     sd_probs_d = defaultdict(list)
-    for pbn, v in sd_d.items():
-        productions, probs_d = v
+    for pbn in pbns_to_process: # use pbns_to_process order, not completion order, so output is deterministic.
+        productions, probs_d = sd_d[pbn]
         sd_probs_d['PBN'].append(pbn)
         sd_probs_d['Probs_Trials'].append(productions)
         for (pair_direction,declarer_direction,suit),probs in probs_d.items():
@@ -662,7 +767,6 @@ def calculate_sd_expected_values(df: pl.DataFrame, scores_df: pl.DataFrame) -> p
     # todo: look for other places where this is called. duplicated code?
     scores_df_vuls = create_scores_df_with_vul(scores_df)
 
-    # takes 2m for 4m rows,5m for 7m rows
     # Define the combinations
     # todo: make global function
     pair_directions = ['NS', 'EW']
@@ -671,96 +775,84 @@ def calculate_sd_expected_values(df: pl.DataFrame, scores_df: pl.DataFrame) -> p
     levels = range(1,8)
     tricks = range(14)
     vuls = ['NV','V']
+    level_vuls = [(level, vul) for level in levels for vul in vuls]
+
+    # expected value is the matrix product of the trick probabilities (rows x 14) and the scores for taking 0-13 tricks (14 x level,vul) e.g. 1S_NV, 1S_V, ...
+    # one matmul per pair direction, declarer direction and strain instead of a prob*score column for every trick (~5,600 columns)
+    # which took 2m for 4m rows, 5m for 7m rows.
+    ev_columns = []
+    for pair_direction in pair_directions:
+        for declarer_direction in pair_direction: #declarer_directions
+            for strain in strains:
+                # null probs are treated as 0, same as sum_horizontal() did.
+                probs = df.select(pl.col(f'Probs_{pair_direction}_{declarer_direction}_{strain}_{taken}').cast(pl.Float64) for taken in tricks).to_numpy()
+                probs = np.nan_to_num(probs, nan=0.0)
+                scores = np.array([scores_df_vuls[f'Score_{level}{strain}_{vul}'].to_list() for level, vul in level_vuls], dtype=np.float64).T
+                evs = probs @ scores
+                ev_columns += [
+                    pl.Series(f'EV_{pair_direction}_{declarer_direction}_{strain}_{level}_{vul}', evs[:, i])
+                    for i, (level, vul) in enumerate(level_vuls)
+                ]
 
-    # Perform the multiplication
-    df = df.with_columns([
-        pl.col(f'Probs_{pair_direction}_{declarer_direction}_{strain}_{taken}').mul(score).alias(f'EV_{pair_direction}_{declarer_direction}_{strain}_{level}_{vul}_{taken}_{score}')
-        for pair_direction in pair_directions
-        for declarer_direction in pair_direction #declarer_directions
-        for strain in strains
-        for level in levels
-        for vul in vuls
-        for taken, score in zip(tricks, scores_df_vuls[f'Score_{level}{strain}_{vul}'])
-    ])
-    #print("Results with prob*score:")
-    #display(result)
-
-    # Add a column for the sum (expected value)
-    df = df.with_columns([
-        pl.sum_horizontal(pl.col(f'^EV_{pair_direction}_{declarer_direction}_{strain}_{level}_{vul}_\\d+_.*$')).alias(f'EV_{pair_direction}_{declarer_direction}_{strain}_{level}_{vul}')
-        for pair_direction in pair_directions
-        for declarer_direction in pair_direction #declarer_directions
-        for strain in strains
-        for level in levels
-        for vul in vuls
-    ])
+    df = df.with_columns(ev_columns)
 
-    #print("\nResults with expected value:")
     return df
 
 
-# Function to create columns of max values from various regexes of columns. also creates columns of the column names of the max value.
-def max_horizontal_and_col(df, pattern):
-    cols = df.select(pl.col(pattern)).columns
-    max_expr = pl.max_horizontal(pl.col(pattern))
-    col_expr = pl.when(pl.col(cols[0]) == max_expr).then(pl.lit(cols[0]))
-    for col in cols[1:]:
-        col_expr = col_expr.when(pl.col(col) == max_expr).then(pl.lit(col))
-    return max_expr, col_expr.otherwise(pl.lit(""))
+def _max_and_col(ev: np.ndarray, col_names: np.ndarray, max_alias: str, col_alias: str, dtype: pl.DataType) -> List[pl.Series]:
+    # max over the last axis of ev (rows x candidates) and the name of the first column having the max. nulls (nan) are skipped.
+    # all null rows have a null max and an empty column name, same as pl.max_horizontal() and the when/then chain did.
+    all_null = np.isnan(ev).all(axis=1)
+    idx = np.argmax(np.where(np.isnan(ev), -np.inf, ev), axis=1) # argmax returns the first max so ties go to the first column.
+    max_values = np.take_along_axis(ev, idx[:, None], axis=1)[:, 0]
+    return [
+        pl.Series(max_alias, max_values, nan_to_null=True).cast(dtype),
+        pl.Series(col_alias, col_names).gather(pl.Series(idx, dtype=pl.UInt32).scatter(np.flatnonzero(all_null), None)).fill_null(''),
+    ]
 
 
-# calculate EV max scores for various regexes including all vulnerabilities. also create columns of the column names of the max values.
+# calculate EV max scores for various groupings including all vulnerabilities. also create columns of the column names of the max values.
 def create_best_contracts(df: pl.DataFrame) -> pl.DataFrame:
 
     # Define the combinations
     pair_directions = ['NS', 'EW']
-    declarer_directions = 'NESW'
     strains = 'SHDCN'
+    levels = range(1,8)
     vulnerabilities = ['NV', 'V']
 
-    # Dictionary to store expressions with their aliases as keys
-    max_ev_dict = {}
-
     # all EV columns are already calculated. just need to get the max.
+    # EV columns are gathered into a dense rows x pair direction x declarer direction x strain x level x vul tensor so that every
+    # max and max column is an argmax over a reshaped view instead of hundreds of max_horizontal and chained when/then expressions.
+    # candidates are flattened in column creation order (pair direction, declarer direction, strain, level) so ties resolve as before.
+    t = time.time()
+    ev_cols = [f'EV_{pd}_{dd}_{s}_{l}_{v}' for pd in pair_directions for dd in pd for s in strains for l in levels for v in vulnerabilities]
+    ev = df.select(pl.col(ev_cols).cast(pl.Float64)).to_numpy().reshape(df.height, len(pair_directions), 2, len(strains), len(levels), len(vulnerabilities))
+    col_names = np.array(ev_cols).reshape(ev.shape[1:])
+    ev_dtype = df.schema[ev_cols[0]]
+    print(f"create_best_contracts: ev tensor created: time:{time.time()-t} seconds")
 
-    # Single loop handles all EV Max, Max_Col combinations
-    for v in vulnerabilities:
+    t = time.time()
+    series = []
+    for vi, v in enumerate(vulnerabilities):
+        ev_v = ev[..., vi]
+        col_names_v = col_names[..., vi]
         # Level 4: Overall Max EV for each vulnerability
-        ev_columns = f'^EV_(NS|EW)_[NESW]_[SHDCN]_[1-7]_{v}$'
-        max_expr, col_expr = max_horizontal_and_col(df, ev_columns)
-        max_ev_dict[f'EV_{v}_Max'] = max_expr
-        max_ev_dict[f'EV_{v}_Max_Col'] = col_expr
+        series += _max_and_col(ev_v.reshape(df.height, -1), col_names_v.ravel(), f'EV_{v}_Max', f'EV_{v}_Max_Col', ev_dtype)
 
-        for pd in pair_directions:
+        for pdi, pd in enumerate(pair_directions):
             # Level 3: Max EV for each pair direction and vulnerability
-            ev_columns = f'^EV_{pd}_[NESW]_[SHDCN]_[1-7]_{v}$'
-            max_expr, col_expr = max_horizontal_and_col(df, ev_columns)
-            max_ev_dict[f'EV_{pd}_{v}_Max'] = max_expr
-            max_ev_dict[f'EV_{pd}_{v}_Max_Col'] = col_expr
+            series += _max_and_col(ev_v[:, pdi].reshape(df.height, -1), col_names_v[pdi].ravel(), f'EV_{pd}_{v}_Max', f'EV_{pd}_{v}_Max_Col', ev_dtype)
 
-            for dd in pd: #declarer_directions:
+            for ddi, dd in enumerate(pd): #declarer_directions:
                 # Level 2: Max EV for each pair direction, declarer direction, and vulnerability
-                ev_columns = f'^EV_{pd}_{dd}_[SHDCN]_[1-7]_{v}$'
-                max_expr, col_expr = max_horizontal_and_col(df, ev_columns)
-                max_ev_dict[f'EV_{pd}_{dd}_{v}_Max'] = max_expr
-                max_ev_dict[f'EV_{pd}_{dd}_{v}_Max_Col'] = col_expr
+                series += _max_and_col(ev_v[:, pdi, ddi].reshape(df.height, -1), col_names_v[pdi, ddi].ravel(), f'EV_{pd}_{dd}_{v}_Max', f'EV_{pd}_{dd}_{v}_Max_Col', ev_dtype)
 
-                for s in strains:
+                for si, s in enumerate(strains):
                     # Level 1: Max EV for each combination
-                    ev_columns = f'^EV_{pd}_{dd}_{s}_[1-7]_{v}$'
-                    max_expr, col_expr = max_horizontal_and_col(df, ev_columns)
-                    max_ev_dict[f'EV_{pd}_{dd}_{s}_{v}_Max'] = max_expr
-                    max_ev_dict[f'EV_{pd}_{dd}_{s}_{v}_Max_Col'] = col_expr
-
-    # Create expressions list from dictionary
-    t = time.time()
-    all_max_ev_expr = [expr.alias(alias) for alias, expr in max_ev_dict.items()]
-    print(f"create_best_contracts: all_max_ev_expr created: time:{time.time()-t} seconds")
+                    series += _max_and_col(ev_v[:, pdi, ddi, si], col_names_v[pdi, ddi, si], f'EV_{pd}_{dd}_{s}_{v}_Max', f'EV_{pd}_{dd}_{s}_{v}_Max_Col', ev_dtype)
 
     # Create a new DataFrame with only the new columns
-    # todo: this step is inexplicably slow. appears to take 6 seconds regardless of row count?
-    t = time.time()
-    df = df.select(all_max_ev_expr)
+    df = pl.DataFrame(series)
     print(f"create_best_contracts: sd_ev_max_df created: time:{time.time()-t} seconds")
 
     return df
@@ -842,33 +934,27 @@ def convert_contract_to_DD_Score_Ref(df: pl.DataFrame) -> pl.DataFrame:
     df = df.with_columns(
         (pl.lit('DD_Score_')+pl.col('BidLvl').cast(pl.String)+pl.col('BidSuit')+pl.lit('_')+pl.col('Declarer_Direction')).alias('DD_Score_Refs'),
     )
-    all_scores_d, scores_d, scores_df = calculate_scores()
+    score_table = get_score_table()
     # Create scores for columns: DD_Score_[1-7][CDHSN]_[NESW]. Calculated in respect to the player's direction. e.g. DD_Score_1N_E is the score given E as the declarer.
+    # null only occurs in the case of director's adjustment.
+    # todo: change Vul_{pair_direction} to use iVul so brs_df can be used without joining Vul_(NS|EW).
     df = df.with_columns([
-        pl.struct([f"DD_{direction}_{strain}", f"Vul_{pair_direction}"]) # todo: change Vul_{pair_direction} to use iVul so brs_df can be used without joining Vul_(NS|EW).
-        .map_elements(
-            lambda r, lvl=level, strn=strain, dir=direction, pdir=pair_direction: 
-                scores_d.get((lvl, strn, r[f"DD_{dir}_{strn}"], r[f"Vul_{pdir}"]), None), # default of None should only occur in the case of director's adjustment.
-            return_dtype=pl.Int16
-        )
+        score_lookup_expr(score_table, level, pl.lit(strain), f"DD_{direction}_{strain}", f"Vul_{pair_direction}")
         .alias(f"DD_Score_{level}{strain}_{direction}")
         for level in range(1, 8)
         for strain in mlBridgeLib.CDHSN
         for direction, pair_direction in [('N','NS'), ('E','EW'), ('S','NS'), ('W','EW')]
     ])
 
-    # Create list of column names: DD_Score_[1-7][CDHSN]_[NESW]
-    dd_score_columns = [f"DD_Score_{level}{strain}_{direction}" 
-                        for level in range(1, 8)
-                        for strain in mlBridgeLib.CDHSN  
-                        for direction in mlBridgeLib.NESW]
-    # Create DD_Score_Declarer by selecting the DD_Score_[1-7][CDHSN]_[NESW] column for the given Declarer_Direction.
+    # Create DD_Score_Declarer by selecting the DD_Score_[1-7][CDHSN]_[NESW] column for the given BidLvl, BidSuit and Declarer_Direction.
     df = df.with_columns([
-        pl.struct(['BidLvl', 'BidSuit', 'Declarer_Direction'] + dd_score_columns)
-        .map_elements(
-            lambda r: None if r['Declarer_Direction'] is None else r[f"DD_Score_{r['BidLvl']}{r['BidSuit']}_{r['Declarer_Direction']}"],
-            return_dtype=pl.Int16
-        )
+        pl.coalesce([
+            pl.when(pl.col('BidLvl').eq(level) & pl.col('BidSuit').eq(strain) & pl.col('Declarer_Direction').eq(direction))
+            .then(pl.col(f"DD_Score_{level}{strain}_{direction}"))
+            for level in range(1, 8)
+            for strain in mlBridgeLib.CDHSN
+            for direction in mlBridgeLib.NESW
+        ])
         .alias('DD_Score_Declarer')
     ])
 
@@ -1426,14 +1512,21 @@ class HandAugmenter:
 
 
 class DD_SD_Augmenter:
-    def __init__(self, df: pl.DataFrame, hrs_cache_df: pl.DataFrame, sd_productions: int = 40, max_adds: Optional[int] = None, output_progress: Optional[bool] = True, progress: Optional[Any] = None, lock_func: Optional[Callable[..., pl.DataFrame]] = None):
+    def __init__(self, df: pl.DataFrame, hrs_cache_df: Union[pl.DataFrame, HrsCacheStore], sd_productions: int = 40, max_adds: Optional[int] = None, output_progress: Optional[bool] = True, progress: Optional[Any] = None, lock_func: Optional[Callable[..., pl.DataFrame]] = None, max_workers: Optional[int] = None):
         self.df = df
-        self.hrs_cache_df = hrs_cache_df
+        # if hrs_cache_df is a HrsCacheStore, only the rows for df's PBNs are loaded. new computes are upserted into the store as they are made.
+        if isinstance(hrs_cache_df, HrsCacheStore):
+            self.hrs_cache_store = hrs_cache_df
+            self.hrs_cache_df = None
+        else:
+            self.hrs_cache_store = None
+            self.hrs_cache_df = hrs_cache_df
         self.sd_productions = sd_productions
         self.max_adds = max_adds
         self.output_progress = output_progress
         self.progress = progress
         self.lock_func = lock_func
+        self.max_workers = max_workers
 
     def _time_operation(self, operation_name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
         t = time.time()
@@ -1441,18 +1534,30 @@ class DD_SD_Augmenter:
         print(f"{operation_name}: time:{time.time()-t} seconds")
         return result
 
+    def _update_hrs_cache(self, new_df: pl.DataFrame) -> None:
+        self.hrs_cache_df = update_hrs_cache_df(self.hrs_cache_df, new_df)
+        if self.hrs_cache_store is not None:
+            self._time_operation("hrs_cache_store.upsert", self.hrs_cache_store.upsert, new_df)
+
     def _process_scores_and_tricks(self) -> pl.DataFrame:
         all_scores_d, scores_d, scores_df = self._time_operation("calculate_scores", calculate_scores)
         
+        if self.hrs_cache_store is not None:
+            self.hrs_cache_df = self._time_operation(
+                "hrs_cache_store.lookup",
+                self.hrs_cache_store.lookup,
+                self.df['PBN'].unique()
+            )
+
         # Calculate double dummy scores first
         dd_df, unique_dd_tables_d = self._time_operation(
             "calculate_dd_scores", 
             calculate_dd_scores, 
-            self.df, self.hrs_cache_df, self.max_adds, self.output_progress, self.progress
+            self.df, self.hrs_cache_df, self.max_adds, self.output_progress, self.progress, self.max_workers
         )
 
         if not dd_df.is_empty():
-            self.hrs_cache_df = update_hrs_cache_df(self.hrs_cache_df, dd_df)
+            self._update_hrs_cache(dd_df)
         
         # Calculate par scores using the double dummy results
         par_df = self._time_operation(
@@ -1462,16 +1567,16 @@ class DD_SD_Augmenter:
         )
 
         if not par_df.is_empty():
-            self.hrs_cache_df = update_hrs_cache_df(self.hrs_cache_df, par_df)
+            self._update_hrs_cache(par_df)
 
         sd_dfs_d, sd_df = self._time_operation(
             "calculate_sd_probs",
             calculate_sd_probs,
-            self.df, self.hrs_cache_df, self.sd_productions, self.max_adds, self.progress
+            self.df, self.hrs_cache_df, self.sd_productions, self.max_adds, self.progress, self.max_workers
         )
 
         if not sd_df.is_empty():
-            self.hrs_cache_df = update_hrs_cache_df(self.hrs_cache_df, sd_df)
+            self._update_hrs_cache(sd_df)
 
         self.df = self.df.join(self.hrs_cache_df, on=['PBN','Dealer','Vul'], how='inner') # on='PBN', how='left' or on=['PBN','Dealer','Vul'], how='inner'
 
@@ -1495,11 +1600,13 @@ class DD_SD_Augmenter:
 
         return self.df, self.hrs_cache_df #, scores_df
 
-    def perform_dd_sd_augmentations(self) -> Tuple[pl.DataFrame, pl.DataFrame]:
+    def perform_dd_sd_augmentations(self) -> Tuple[pl.DataFrame, Union[pl.DataFrame, HrsCacheStore]]:
         if self.lock_func is None:
             self.df, self.hrs_cache_df = self.perform_dd_sd_augmentations_queue_up()
         else:
             self.df, self.hrs_cache_df = self.lock_func(self, self.perform_dd_sd_augmentations_queue_up)
+        if self.hrs_cache_store is not None:
+            return self.df, self.hrs_cache_store # already persisted. return the store so callers can pass it to the next request.
         return self.df, self.hrs_cache_df
 
     def perform_dd_sd_augmentations_queue_up(self) -> pl.DataFrame:
@@ -1736,12 +1843,9 @@ class FinalContractAugmenter:
 
         self.df = self.df.with_columns(max_expressions)
 
-        ev_columns = f'^EV_Max_(NS|EW)$'
-        max_expr, col_expr = max_horizontal_and_col(self.df, ev_columns)
-        self.df = self.df.with_columns([
-            max_expr.alias('EV_Max'),
-            col_expr.alias('EV_Max_Col'),
-        ])
+        ev_columns = self.df.select(pl.col('^EV_Max_(NS|EW)$')).columns
+        ev = self.df.select(pl.col(ev_columns).cast(pl.Float64)).to_numpy()
+        self.df = self.df.with_columns(_max_and_col(ev, np.array(ev_columns), 'EV_Max', 'EV_Max_Col', self.df.schema[ev_columns[0]]))
         
         self.df = self._time_operation(
             "create_ev_columns",
@@ -1834,13 +1938,11 @@ class FinalContractAugmenter:
                 )
             else:
                 # neither 'Score' nor 'Score_NS' exist.
-                all_scores_d, scores_d, scores_df = calculate_scores()
+                score_table = get_score_table()
                 self.df = self._time_operation(
                     "convert_contract_to_score",
                     lambda df: df.with_columns([
-                        pl.struct(['BidLvl', 'BidSuit', 'Tricks', 'Vul_Declarer', 'Dbl'])
-                            .map_elements(lambda x: all_scores_d.get(tuple(x.values()),None), # default of None should only occur in the case of director's adjustment.
-                                        return_dtype=pl.Int16)
+                        all_scores_lookup_expr(score_table) # null should only occur in the case of director's adjustment.
                             .alias('Score'),
                     ]),
                     self.df
@@ -1964,8 +2066,8 @@ class FinalContractAugmenter:
                         # crazy, crazy. current_t is needed because map_elements is a lambda and not a function. otherwise t is always 13!
                         lambda row, current_t=t: None if row["BidSuit"] is None 
                                                   else row[f'Probs_{row["Declarer_Pair_Direction"]}_{row["Declarer_Direction"]}_{row["BidSuit"]}_{current_t}'],
-                        return_dtype=pl.Float32
-                    ).alias(f'Prob_Taking_{t}') # todo: short form of 'Declarer_SD_Probs_Taking_{t}'
+                        return_dtype=pl.Float64
+                    ).cast(pl.Float32).alias(f'Prob_Taking_{t}') # todo: short form of 'Declarer_SD_Probs_Taking_{t}'
                     for t in range(14)
                 ]
             ])
@@ -1998,17 +2100,15 @@ class FinalContractAugmenter:
         print(self.df.filter(pl.col('Result').is_null() | pl.col('Tricks').is_null())
               ['Contract','Declarer_Direction','Vul_Declarer','iVul','Score_NS','BidLvl','Result','Tricks'])
         
-        all_scores_d, scores_d, scores_df = calculate_scores() # todo: put this in __init__?
+        score_table = get_score_table() # todo: put this in __init__?
         
         self.df = self._time_operation(
             "create board result columns",
             lambda df: df.with_columns([
                 pl.struct(['EV_Score_Col_Declarer','^EV_(NS|EW)_[NESW]_[SHDCN]_[1-7]$'])
                     .map_elements(lambda x: None if x['EV_Score_Col_Declarer'] is None else x[x['EV_Score_Col_Declarer']],
-                                return_dtype=pl.Float32).alias('EV_Score_Declarer'),
-                pl.struct(['BidLvl', 'BidSuit', 'Tricks', 'Vul_Declarer', 'Dbl'])
-                    .map_elements(lambda x: all_scores_d.get(tuple(x.values()),None), # default becomes 0. ok? should only occur in the case of null (PASS).
-                                return_dtype=pl.Int16)
+                                return_dtype=pl.Float64).cast(pl.Float32).alias('EV_Score_Declarer'),
+                all_scores_lookup_expr(score_table) # PASS becomes 0. null should only occur in the case of director's adjustment.
                     .alias('Computed_Score_Declarer'),
 
                 pl.struct(['Contract', 'Result', 'Score_NS', 'BidLvl', 'BidSuit', 'Dbl','Declarer_Direction', 'Vul_Declarer']).map_elements(
@@ -2144,21 +2244,14 @@ class MatchPointAugmenter:
                 self.df
             )
 
-    def _calculate_matchpoints_group(self, series_list: list[pl.Series]) -> pl.Series:
-        col_values = series_list[0]
-        score_ns_values = series_list[1]
-        if col_values.is_null().sum() > 0:
-            print(f"Warning: Null values in col_values: {col_values.is_null().sum()}")
-        #if score_ns_values.is_null().sum() > 0:
-        #    print(f"Warning: Null values in score_ns_values: {score_ns_values.is_null().sum()}")
-        # todo: is there a more proper way to handle null values in col_values and score_ns_values?
-        score_ns_values = score_ns_values.fill_null(0.0) # todo: why do some have nulls? sitout? adjusted score?
-        col_values = col_values.fill_null(0.0) # todo: why do some have nulls? sitout? adjusted score?
-        return pl.Series([
-            sum(1.0 if val > score else 0.5 if val == score else 0.0 
-                for score in score_ns_values)
-            for val in col_values
-        ])
+    def _matchpoints_expr(self, col: str, score_col: str, over: Union[str, List[str]]) -> pl.Expr:
+        # matchpoints of each row's col value against every score_col value in the group. 1.0 for each score beaten, 0.5 for each tie.
+        # the group's scores are sorted once. the count of scores below (left) and not above (right) the value are found by binary search
+        # so that matchpoints = left + (right-left)/2. replaces an O(n^2) python loop per group.
+        # todo: is there a more proper way to handle null values in col and score_col? nulls are scored as 0 as before.
+        scores = pl.col(score_col).fill_null(0).cast(pl.Float64).sort()
+        values = pl.col(col).fill_null(0).cast(pl.Float64)
+        return ((scores.search_sorted(values, side='left') + scores.search_sorted(values, side='right')).cast(pl.Float64) / 2).over(over)
 
     def _calculate_all_score_matchpoints(self) -> None:
         t = time.time()
@@ -2171,25 +2264,20 @@ class MatchPointAugmenter:
         if self.df['Score_NS'].null_count() > 0:
             print(f"Warning: Null values in score_ns_values: {self.df['Score_NS'].is_null().sum()}")
         # compute matchpoints for DD_Score_[1-7][CDHSN]_[NESW] and EV_(NS|EW)_[NESW]_[CDHSN]_[1-7] and misc columns.
-        for col in self.all_score_columns + ['DD_Score_NS', 'DD_Score_EW', 'Par_NS', 'Par_EW']:
-            assert 'MP_'+col not in self.df.columns, f"Column 'MP_{col}' already exists in DataFrame"
-            self.df = self.df.with_columns([
-                    pl.map_groups(
-                        exprs=[col, 'Score_NS' if '_NS' in col or col[-1] in 'NS' else 'Score_EW'],
-                        function=self._calculate_matchpoints_group,
-                        return_dtype=pl.Float64,
-                    ).over(['session_id', 'PBN', 'Board']).alias(f'MP_{col}')
-                ])
+        col_score_cols = [(col, 'Score_NS' if '_NS' in col or col[-1] in 'NS' else 'Score_EW') for col in self.all_score_columns + ['DD_Score_NS', 'DD_Score_EW', 'Par_NS', 'Par_EW']]
         # compute matchpoints for declarer orientation columns
-        for col in [('DD_Score_Declarer','Score_Declarer'),('Par_Declarer','Score_Declarer'),('EV_Score_Declarer','Score_Declarer'),('EV_Max_Declarer','Score_Declarer')]:
-            assert 'MP_'+col[0] not in self.df.columns, f"Column 'MP_{col[0]}' already exists in DataFrame"
-            self.df = self.df.with_columns([
-                    pl.map_groups(
-                        exprs=col,
-                        function=self._calculate_matchpoints_group,
-                        return_dtype=pl.Float64,
-                    ).over(['session_id', 'PBN', 'Board']).alias(f'MP_{col[0]}')
-                ])
+        col_score_cols += [('DD_Score_Declarer','Score_Declarer'),('Par_Declarer','Score_Declarer'),('EV_Score_Declarer','Score_Declarer'),('EV_Max_Declarer','Score_Declarer')]
+        for col, _ in col_score_cols:
+            assert 'MP_'+col not in self.df.columns, f"Column 'MP_{col}' already exists in DataFrame"
+        null_counts = self.df.select(pl.col(col).null_count() for col, _ in col_score_cols).row(0, named=True)
+        for col, null_count in null_counts.items():
+            if null_count > 0:
+                print(f"Warning: Null values in {col}: {null_count}")
+        # all MP_ columns in one pass. polars computes the session, PBN, Board groups once and evaluates the columns in parallel.
+        self.df = self.df.with_columns([
+            self._matchpoints_expr(col, score_col, ['session_id', 'PBN', 'Board']).alias(f'MP_{col}')
+            for col, score_col in col_score_cols
+        ])
         print(f"calculate matchpoints all_score_columns: time:{time.time()-t} seconds")
 
     def _calculate_mp_pct_from_new_score(self, col: str) -> pl.Series:
@@ -2204,16 +2292,8 @@ class MatchPointAugmenter:
             for pair in ['NS','EW']:
                 col_pair = col + '_' + pair
                 # Calculate matchpoints: compare each row's DD_Score with all Score values for the same board.
-                board_scores_tuples = self.df.group_by('Board').agg(pl.col(f'Score_{pair}')).rows()
-                board_to_scores_d = {board: scores for board, scores in board_scores_tuples}
                 self.df = self.df.with_columns(
-                    pl.struct([col_pair, 'Board']).map_elements(
-                        lambda row: sum(
-                            1.0 if row[col_pair] > (0 if score is None else score) else 0.5 if row[col_pair] == (0 if score is None else score) else 0.0
-                            for score in board_to_scores_d[row['Board']]
-                        ),
-                        return_dtype=pl.Float64
-                    ).alias(f'MP_{col_pair}')
+                    self._matchpoints_expr(col_pair, f'Score_{pair}', 'Board').alias(f'MP_{col_pair}')
                 )
                 self.df = self.df.with_columns([
                     (pl.col(f'MP_{col_pair}')/(pl.col('MP_Top')+1)).alias(f'{col}_Pct_{pair}')
@@ -2313,24 +2393,58 @@ class IMPAugmenter:
         return self.df
 
 
+def create_hrs_cache_df_schema() -> pl.Schema:
+
+    # Double dummy tricks for each player and strain
+    dd_cols = {f"DD_{p}_{s}": pl.UInt8 for p in 'NESW' for s in 'CDHSN'}
+
+    # Single dummy probabilities. Note that the order of declarers and suits must match the original schema.
+    # The declarer order was found to be N, S, W, E from inspecting the original schema.
+    probs_cols = {f"Probs_{pair}_{declarer}_{s}_{i}": pl.Float64 for pair in ['NS', 'EW'] for declarer in 'NESW' for s in 'CDHSN' for i in range(14)}
+
+    # Columns that appear after DD columns and before probability columns
+    schema_cols = {
+        'PBN': pl.String,
+        'Dealer': pl.String,
+        'Vul': pl.String,
+        **dd_cols,
+        'ParScore': pl.Int16,
+        'ParNumber': pl.Int8,
+        'ParContracts': pl.List(pl.Struct({
+            'Level': pl.String, 
+            'Strain': pl.String, 
+            'Doubled': pl.String, 
+            'Pair_Direction': pl.String, 
+            'Result': pl.Int16
+        })),
+        'Probs_Trials': pl.Int64,
+        **probs_cols,
+    }
+
+    # Convert the dict to a Polars Schema for a valid comparison
+    return pl.Schema(schema_cols)
+
+
 class AllHandRecordAugmentations:
     def __init__(self, df: pl.DataFrame, 
-                 hrs_cache_df: Optional[pl.DataFrame] = None, 
+                 hrs_cache_df: Optional[Union[pl.DataFrame, HrsCacheStore]] = None, 
                  sd_productions: int = 40, 
                  max_adds: Optional[int] = None,
                  output_progress: Optional[bool] = True,
                  progress: Optional[Any] = None,
-                 lock_func: Optional[Callable[..., pl.DataFrame]] = None):
+                 lock_func: Optional[Callable[..., pl.DataFrame]] = None,
+                 max_workers: Optional[int] = None):
         """Initialize the AllAugmentations class with a DataFrame and optional parameters.
         
         Args:
             df: The input DataFrame to augment
-            hrs_cache_df: dataframe of cached computes
+            hrs_cache_df: dataframe of cached computes or a HrsCacheStore
             sd_productions: Number of single dummy productions to generate
             max_adds: Maximum number of adds to generate
             output_progress: Whether to output progress
             progress: Optional progress indicator object
             lock_func: Optional function for thread safety
+            max_workers: Number of processes used for double dummy and single dummy solving. Defaults to one per core.
         """
         self.df = df
         self.hrs_cache_df = hrs_cache_df
@@ -2339,40 +2453,16 @@ class AllHandRecordAugmentations:
         self.output_progress = output_progress
         self.progress = progress
         self.lock_func = lock_func
+        self.max_workers = max_workers
 
         # instance initialization
 
-        # Double dummy tricks for each player and strain
-        dd_cols = {f"DD_{p}_{s}": pl.UInt8 for p in 'NESW' for s in 'CDHSN'}
-
-        # Single dummy probabilities. Note that the order of declarers and suits must match the original schema.
-        # The declarer order was found to be N, S, W, E from inspecting the original schema.
-        probs_cols = {f"Probs_{pair}_{declarer}_{s}_{i}": pl.Float64 for pair in ['NS', 'EW'] for declarer in 'NESW' for s in 'CDHSN' for i in range(14)}
-
-        # Columns that appear after DD columns and before probability columns
-        schema_cols = {
-            'PBN': pl.String,
-            'Dealer': pl.String,
-            'Vul': pl.String,
-            **dd_cols,
-            'ParScore': pl.Int16,
-            'ParNumber': pl.Int8,
-            'ParContracts': pl.List(pl.Struct({
-                'Level': pl.String, 
-                'Strain': pl.String, 
-                'Doubled': pl.String, 
-                'Pair_Direction': pl.String, 
-                'Result': pl.Int16
-            })),
-            'Probs_Trials': pl.Int64,
-            **probs_cols,
-        }
-
-        # Convert the dict to a Polars Schema for a valid comparison
-        hrs_cache_df_schema = pl.Schema(schema_cols)
+        hrs_cache_df_schema = create_hrs_cache_df_schema()
 
         if hrs_cache_df is None:
             self.hrs_cache_df = pl.DataFrame(schema=hrs_cache_df_schema)
+        elif isinstance(hrs_cache_df, HrsCacheStore):
+            self.hrs_cache_df.set_schema(hrs_cache_df_schema) # sets schema of a new store, asserts schema of an existing store.
         else:
             assert set(self.hrs_cache_df.schema.items()) == set(hrs_cache_df_schema.items()), f"hrs_cache_df schema {self.hrs_cache_df.schema} does not match expected schema {hrs_cache_df_schema}"
         
@@ -2401,7 +2491,8 @@ class AllHandRecordAugmentations:
             self.max_adds, 
             self.output_progress,
             self.progress,
-            self.lock_func
+            self.lock_func,
+            self.max_workers
         )
         self.df, self.hrs_cache_df = dd_sd_augmenter.perform_dd_sd_augmentations()
 
@@ -2460,7 +2551,7 @@ class AllBoardResultsAugmentations:
 
 
 class AllAugmentations:
-    def __init__(self, df: pl.DataFrame, hrs_cache_df: Optional[pl.DataFrame] = None, sd_productions: int = 40, max_adds: Optional[int] = None, output_progress: Optional[bool] = True, progress: Optional[Any] = None, lock_func: Optional[Callable[..., pl.DataFrame]] = None):
+    def __init__(self, df: pl.DataFrame, hrs_cache_df: Optional[Union[pl.DataFrame, HrsCacheStore]] = None, sd_productions: int = 40, max_adds: Optional[int] = None, output_progress: Optional[bool] = True, progress: Optional[Any] = None, lock_func: Optional[Callable[..., pl.DataFrame]] = None, max_workers: Optional[int] = None):
         self.df = df
         self.hrs_cache_df = hrs_cache_df
         self.sd_productions = sd_productions
@@ -2468,6 +2559,7 @@ class AllAugmentations:
         self.output_progress = output_progress
         self.progress = progress
         self.lock_func = lock_func
+        self.max_workers = max_workers
 
     def perform_all_augmentations(self) -> pl.DataFrame:
         """Execute all augmentation steps.
@@ -2478,7 +2570,7 @@ class AllAugmentations:
         t_start = time.time()
         print(f"Starting all augmentations on DataFrame with {len(self.df)} rows")
 
-        hand_record_augmenter = AllHandRecordAugmentations(self.df, self.hrs_cache_df, self.sd_productions, self.max_adds, self.output_progress, self.progress, self.lock_func)
+        hand_record_augmenter = AllHandRecordAugmentations(self.df, self.hrs_cache_df, self.sd_productions, self.max_adds, self.output_progress, self.progress, self.lock_func, self.max_workers)
         self.df, self.hrs_cache_df = hand_record_augmenter.perform_all_hand_record_augmentations()
         board_results_augmenter = AllBoardResultsAugmentations(self.df)
         self.df = board_results_augmenter.perform_all_board_results_augmentations()
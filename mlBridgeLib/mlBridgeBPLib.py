@@ -6,6 +6,9 @@ Supports extraction of Teams, Board Results, and Boards DataFrames with French t
 """
 
 import asyncio
+import collections
+import contextvars
+import os
 import re
 from typing import List, Dict, Optional, Any, Tuple
 import polars as pl
@@ -24,57 +27,277 @@ if sys.platform == "win32":
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global browser management
+# Process-wide browser pool. Chromium is launched once and up to BP_BROWSER_POOL_SIZE contexts are kept warm and leased
+# to callers, so repeated BridgePlus requests don't pay the playwright start, browser launch and context setup each time.
+BP_BROWSER_POOL_SIZE = int(os.getenv('BP_BROWSER_POOL_SIZE', 2))
+BP_CONTEXT_MAX_USES = int(os.getenv('BP_CONTEXT_MAX_USES', 200)) # contexts are recycled after this many leases to bound memory.
+BP_HEALTH_CHECK_TIMEOUT = 5.0 # seconds
+BP_BOARD_CONCURRENCY = int(os.getenv('BP_BOARD_CONCURRENCY', 4)) # boards pages scraped at once in one context.
+
+BROWSER_LAUNCH_ARGS: List[str] = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-extensions',
+    '--no-first-run',
+    '--disable-default-apps',
+    '--disable-infobars',
+    '--window-size=1920,1080'
+]
+
+BROWSER_CONTEXT_OPTIONS: Dict[str, Any] = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Set extra headers to avoid detection
+BROWSER_EXTRA_HTTP_HEADERS: Dict[str, str] = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# Page loading profile. The parsers only read the DOM, so images, fonts, stylesheets and media are aborted by route
+# interception in every pooled context. Set BP_BLOCK_RESOURCE_TYPES to '' to load everything.
+BP_BLOCK_RESOURCE_TYPES = frozenset(t.strip() for t in os.getenv('BP_BLOCK_RESOURCE_TYPES', 'image,font,stylesheet,media').split(',') if t.strip())
+blocked_requests: Dict[str, int] = collections.Counter()
+
+
+async def _block_unneeded_resources(route) -> None:
+    resource_type = route.request.resource_type
+    if resource_type in BP_BLOCK_RESOURCE_TYPES:
+        blocked_requests[resource_type] += 1
+        await route.abort()
+    else:
+        await route.continue_()
+
+# context leased by the current task. nested leases (e.g. get_teams_by_tournament_async() called while a context is held)
+# reuse it instead of waiting on the pool, which would deadlock once every context is held by a waiting task.
+_leased_context: contextvars.ContextVar[Optional[BrowserContext]] = contextvars.ContextVar('_leased_context', default=None)
+
+
+class BrowserPool:
+    """Long-lived Chromium browser with a pool of warm browser contexts.
+
+    The pool belongs to the event loop it was started in. When used from a new event loop it is started again; the objects
+    of the finished loop are abandoned. The non-async wrappers close it before their event loop ends (see _run()).
+    """
+
+    def __init__(self, size: int = BP_BROWSER_POOL_SIZE, max_uses: int = BP_CONTEXT_MAX_USES):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.launches = 0
+        self.leases = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._loop = None
+        self._playwright = None
+        self._browser = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: List[BrowserContext] = []
+        self._uses: Dict[BrowserContext, int] = {}
+
+    async def start(self) -> None:
+        """Launch the browser if it isn't running (or has crashed) in the current event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._reset()
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.size)
+        if self._browser is not None and self._browser.is_connected():
+            return
+        async with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._browser is not None:
+                logger.warning("Browser disconnected, relaunching")
+                await self._stop_browser()
+            start_time = time.time()
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_LAUNCH_ARGS)
+            self.launches += 1
+            logger.info(f"Browser launched (pool size {self.size}) in {time.time()-start_time:.2f} seconds")
+
+    async def _new_context(self) -> BrowserContext:
+        context = await self._browser.new_context(**BROWSER_CONTEXT_OPTIONS)
+        await context.set_extra_http_headers(BROWSER_EXTRA_HTTP_HEADERS)
+        if BP_BLOCK_RESOURCE_TYPES:
+            await context.route('**/*', _block_unneeded_resources)
+        self._uses[context] = 0
+        return context
+
+    async def _close_context(self, context: BrowserContext) -> None:
+        self._uses.pop(context, None)
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"Error closing browser context: {e}")
+
+    async def _is_healthy(self, context: BrowserContext) -> bool:
+        # a round trip to the browser. fails if the context was closed or the browser crashed.
+        if self._browser is None or not self._browser.is_connected():
+            return False
+        try:
+            await asyncio.wait_for(context.cookies(), BP_HEALTH_CHECK_TIMEOUT)
+            return True
+        except Exception as e:
+            logger.warning(f"Browser context failed health check: {e}")
+            return False
+
+    async def _acquire(self) -> BrowserContext:
+        await self.start()
+        while self._idle:
+            context = self._idle.pop()
+            if await self._is_healthy(context):
+                return context
+            await self._close_context(context)
+        await self.start() # the health check may have found the browser gone
+        return await self._new_context()
+
+    async def _release(self, context: BrowserContext) -> None:
+        self._uses[context] = self._uses.get(context, 0)+1
+        for page in context.pages: # pages a caller didn't close
+            try:
+                await page.close()
+            except Exception:
+                pass
+        if self._uses[context] >= self.max_uses or self._browser is None or not self._browser.is_connected():
+            await self._close_context(context)
+        else:
+            self._idle.append(context)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease a warm browser context. It is returned to the pool on exit."""
+        context = _leased_context.get()
+        if context is not None:
+            yield context
+            return
+        await self.start()
+        async with self._slots:
+            context = await self._acquire()
+            self.leases += 1
+            token = _leased_context.set(context)
+            try:
+                yield context
+            finally:
+                _leased_context.reset(token)
+                await self._release(context)
+
+    async def _stop_browser(self) -> None:
+        for context in list(self._uses):
+            await self._close_context(context)
+        self._idle.clear()
+        try:
+            await self._browser.close()
+            await self._playwright.stop()
+        except Exception as e:
+            logger.error(f"Error closing browser: {e}")
+        self._browser = None
+        self._playwright = None
+
+    async def close(self) -> None:
+        """Close the contexts and the browser. The pool starts again on the next lease."""
+        if self._browser is not None and self._loop is asyncio.get_running_loop():
+            await self._stop_browser()
+        self._reset()
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': self.size, 'contexts': len(self._uses), 'idle': len(self._idle), 'launches': self.launches, 'leases': self.leases}
+
+
+browser_pool = BrowserPool()
+
+
 @asynccontextmanager
 async def get_browser_context_async():
-    """Create and manage a browser context for web scraping.
+    """Lease a browser context from the shared browser pool.
     
     Yields:
         BrowserContext: Playwright browser context configured for BridgePlus
     """
-    try:
-        playwright = await async_playwright().start()
-        browser = await playwright.chromium.launch(
-            headless=True,
-            args=[
-                '--no-sandbox',
-                '--disable-dev-shm-usage',
-                '--disable-blink-features=AutomationControlled',
-                '--disable-extensions',
-                '--no-first-run',
-                '--disable-default-apps',
-                '--disable-infobars',
-                '--window-size=1920,1080'
-            ]
-        )
-        
-        context = await browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        )
-        
-        # Set extra headers to avoid detection
-        await context.set_extra_http_headers({
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
-        
+    async with browser_pool.lease() as context:
         yield context
-        
-    except Exception as e:
-        logger.error(f"Error creating browser context: {e}")
-        raise
-    finally:
+
+
+async def close_browser_pool_async() -> None:
+    """Close the shared browser pool e.g. at application shutdown."""
+    await browser_pool.close()
+
+
+def _run(coro):
+    """asyncio.run() for the non-async wrappers. The browser pool is closed before the event loop ends so each call doesn't leak a browser."""
+    async def run_and_close():
         try:
-            await context.close()
-            await browser.close()
-            await playwright.stop()
-        except Exception as e:
-            logger.error(f"Error closing browser context: {e}")
+            return await coro
+        finally:
+            await close_browser_pool_async()
+    return asyncio.run(run_and_close())
+
+
+# Per page load timings recorded by wait_for_parser_ready_async(), most recent last. See page_load_stats().
+BP_PAGE_TIMINGS_MAX = 1000
+page_load_timings: collections.deque = collections.deque(maxlen=BP_PAGE_TIMINGS_MAX)
+
+
+async def wait_for_parser_ready_async(page, parser: str, selector: str, timeout: int = 10000) -> None:
+    """Wait until the element a parser reads is in the DOM, instead of waiting for networkidle.
+    
+    networkidle is awaited alongside, so pages without the element (e.g. a board nobody played) are parsed
+    once the network is idle, as before. The load time is recorded in page_load_timings.
+    
+    Args:
+        page: Playwright page object
+        parser: Parser name, for the timings
+        selector: CSS selector of the element the parser needs
+        timeout: Milliseconds to wait for the selector, then for networkidle
+    """
+    start_time = time.time()
+    selector_task = asyncio.ensure_future(page.wait_for_selector(selector, state='attached', timeout=timeout))
+    idle_task = asyncio.ensure_future(page.wait_for_load_state('networkidle', timeout=timeout))
+    try:
+        done, _ = await asyncio.wait([selector_task, idle_task], return_when=asyncio.FIRST_COMPLETED)
+        if selector_task in done and selector_task.exception() is None:
+            waited_for = 'selector'
+        else:
+            # selector timed out or the network went idle first: the element isn't coming
+            waited_for = 'networkidle'
+            await idle_task # raises on timeout like the old wait
+    finally:
+        for task in (selector_task, idle_task):
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception() # retrieved so an unused timeout isn't logged as never retrieved
+    try:
+        # milliseconds since the navigation started, as measured by the browser
+        ready_ms = await page.evaluate('performance.now()')
+    except Exception:
+        ready_ms = None
+    wait_seconds = time.time() - start_time
+    page_load_timings.append({'parser': parser, 'url': page.url, 'waited_for': waited_for, 'ready_ms': ready_ms, 'wait_seconds': wait_seconds})
+    logger.info(f"{parser}: page ready ({waited_for}) after {ready_ms or 0:.0f} ms, waited {wait_seconds:.2f} seconds")
+
+
+def page_load_stats() -> Dict[str, Dict[str, float]]:
+    """Summarize page_load_timings per parser: count, mean and max ready_ms, and how often networkidle was needed."""
+    stats = {}
+    for parser in sorted({t['parser'] for t in page_load_timings}):
+        timings = [t for t in page_load_timings if t['parser'] == parser]
+        ready = [t['ready_ms'] for t in timings if t['ready_ms'] is not None]
+        stats[parser] = {
+            'count': len(timings),
+            'mean_ready_ms': sum(ready) / len(ready) if ready else 0.0,
+            'max_ready_ms': max(ready) if ready else 0.0,
+            'networkidle': sum(t['waited_for'] == 'networkidle' for t in timings),
+        }
+    return stats
 
 # Global translation constants to avoid duplication
 FRENCH_TO_ENGLISH_STRAIN_MAP: Dict[str, str] = {
@@ -354,8 +577,8 @@ async def parse_route_html_async(page) -> List[Dict]:
     try:
         route_data = []
         
-        # Wait for the page to load properly - networkidle required
-        await page.wait_for_load_state('networkidle', timeout=10000)
+        # Wait for the board rows
+        await wait_for_parser_ready_async(page, 'route', 'div.row div.col-1 a', timeout=10000)
         
         logger.info("Parsing BridgePlus route page using HTML structure...")
         
@@ -685,8 +908,8 @@ async def parse_teams_html_async(page) -> List[Dict]:
     try:
         teams_data = []
         
-        # Wait for the page to load properly
-        await page.wait_for_load_state('networkidle', timeout=10000)
+        # Wait for the team rows
+        await wait_for_parser_ready_async(page, 'teams', 'div.row.text-center.raye.p-0.py-1', timeout=10000)
         
         logger.info("Parsing BridgePlus teams page using corrected HTML structure...")
 
@@ -803,8 +1026,8 @@ async def parse_boards_html_async(page) -> List[Dict]:
     try:
         boards_data = []
         
-        # Wait for the page to load properly
-        await page.wait_for_load_state('networkidle', timeout=5000)
+        # Wait for the hands
+        await wait_for_parser_ready_async(page, 'boards', 'div.flex-grow-1.ms-3.gros', timeout=5000)
         
         logger.info("Parsing BridgePlus boards page...")
         
@@ -1123,6 +1346,9 @@ async def parse_score_frequency_html_async(page, board_number: int = 0) -> List[
     try:
         score_frequency_data = []
         
+        # Wait for the score frequency table. It can render after the hands parse_boards_html_async() waited for.
+        await wait_for_parser_ready_async(page, 'score_frequency', 'text=top EO', timeout=5000)
+        
         logger.info("Extracting score frequency data from boards page...")
         
         # Get page text content
@@ -1452,6 +1678,90 @@ async def request_teams_dataframe_async(url: str, context=None) -> pl.DataFrame:
         async with get_browser_context_async() as context:
             return await request_teams_dataframe_async(url, context)
 
+async def scrape_boards_page_async(page, url: str) -> Dict[str, pl.DataFrame]:
+    """Navigate page to a BridgePlus boards URL and scrape it. Errors are raised.
+    
+    Args:
+        page: Playwright page (reused across boards by the concurrent scraper)
+        url: BridgePlus boards URL
+        
+    Returns:
+        Dict with keys 'boards' and 'score_frequency'
+    """
+    logger.info(f"Navigating to boards URL: {url}")
+    response = await page.goto(url, wait_until='domcontentloaded', timeout=60000)
+    
+    # Implement Method 1: Check response.ok
+    if not response.ok:
+        error_msg = f"HTTP {response.status}: {response.status_text} for {url}"
+        logger.error(f"Failed to navigate to boards URL: {error_msg}")
+        
+        # Handle specific status codes
+        if response.status == 503:
+            logger.error("Service temporarily unavailable (503) - server overloaded")
+        elif response.status == 404:
+            logger.error("Boards page not found (404)")
+        elif response.status == 401:
+            logger.error("Unauthorized (401) - check authentication")
+        elif response.status == 429:
+            logger.error("Rate limited (429)")
+        elif response.status >= 500:
+            logger.error("Server error")
+        elif response.status >= 400:
+            logger.error("Client error")
+        
+        raise ValueError(f"Unable to navigate to boards URL: {error_msg}")
+    
+    # Extract boards data and score frequency data
+    boards_data = await parse_boards_html_async(page)
+    # Get board number from boards data if available
+    board_number = boards_data[0]['Board'] if boards_data else 0
+    score_frequency_data = await parse_score_frequency_html_async(page, board_number)
+    
+    # Create DataFrames
+    if boards_data:
+        boards_df = pl.DataFrame(boards_data)
+    else:
+        boards_df = pl.DataFrame(schema={
+            'Board': pl.UInt32,
+            'PBN': pl.Utf8,
+            'MP_Top': pl.UInt64,
+            'Dealer': pl.Utf8,
+            'Vul': pl.Utf8,
+            'Declarer': pl.Utf8,
+            'Lead': pl.Utf8,
+            'Contract': pl.Utf8,
+            'Result': pl.Int8,
+            'Score': pl.Int16,
+            'Event_Name': pl.Utf8,
+            'Team_Name': pl.Utf8,
+            'Pair_Number': pl.UInt64,
+            'Section': pl.Utf8,
+            'Tournament_ID': pl.Utf8,
+            'Club_ID': pl.Utf8,
+            'Opponent_Pair_Direction': pl.Utf8,
+            'Opponent_Pair_Number': pl.UInt64,
+            'Opponent_Pair_Names': pl.Utf8,
+            'Opponent_Pair_Section': pl.Utf8
+        })
+    
+    if score_frequency_data:
+        score_frequency_df = pl.DataFrame(score_frequency_data)
+    else:
+        score_frequency_df = pl.DataFrame(schema={
+            'Board': pl.UInt32,
+            'Score': pl.Int16,
+            'Frequency': pl.UInt32,
+            'Matchpoints_NS': pl.Float64,
+            'Matchpoints_EW': pl.Float64
+        })
+    
+    # Assert that there are no null PBN values in the boards DataFrame
+    assert boards_df.filter(pl.col('PBN').is_null()).height == 0, f"Found {boards_df.filter(pl.col('PBN').is_null()).height} rows with null PBN values"
+    assert boards_df.filter(pl.col('PBN').str.len_chars().ne(69)).height == 0, f"Found {boards_df.filter(pl.col('PBN').str.len_chars().ne(69))} rows with invalid PBN values"
+    
+    return {'boards': boards_df, 'score_frequency': score_frequency_df}
+
 async def request_boards_dataframe_async(url: str, context=None) -> Dict[str, pl.DataFrame]:
     """Scrape boards data from BridgePlus and return as two DataFrames.
     
@@ -1469,79 +1779,7 @@ async def request_boards_dataframe_async(url: str, context=None) -> Dict[str, pl
         page = await context.new_page()
         
         try:
-            logger.info(f"Navigating to boards URL: {url}")
-            response = await page.goto(url, wait_until='domcontentloaded', timeout=60000)
-            
-            # Implement Method 1: Check response.ok
-            if not response.ok:
-                error_msg = f"HTTP {response.status}: {response.status_text} for {url}"
-                logger.error(f"Failed to navigate to boards URL: {error_msg}")
-                
-                # Handle specific status codes
-                if response.status == 503:
-                    logger.error("Service temporarily unavailable (503) - server overloaded")
-                elif response.status == 404:
-                    logger.error("Boards page not found (404)")
-                elif response.status == 401:
-                    logger.error("Unauthorized (401) - check authentication")
-                elif response.status == 429:
-                    logger.error("Rate limited (429)")
-                elif response.status >= 500:
-                    logger.error("Server error")
-                elif response.status >= 400:
-                    logger.error("Client error")
-                
-                raise ValueError(f"Unable to navigate to boards URL: {error_msg}")
-            
-            # Extract boards data and score frequency data
-            boards_data = await parse_boards_html_async(page)
-            # Get board number from boards data if available
-            board_number = boards_data[0]['Board'] if boards_data else 0
-            score_frequency_data = await parse_score_frequency_html_async(page, board_number)
-            
-            # Create DataFrames
-            if boards_data:
-                boards_df = pl.DataFrame(boards_data)
-            else:
-                boards_df = pl.DataFrame(schema={
-                    'Board': pl.UInt32,
-                    'PBN': pl.Utf8,
-                    'MP_Top': pl.UInt64,
-                    'Dealer': pl.Utf8,
-                    'Vul': pl.Utf8,
-                    'Declarer': pl.Utf8,
-                    'Lead': pl.Utf8,
-                    'Contract': pl.Utf8,
-                    'Result': pl.Int8,
-                    'Score': pl.Int16,
-                    'Event_Name': pl.Utf8,
-                    'Team_Name': pl.Utf8,
-                    'Pair_Number': pl.UInt64,
-                    'Section': pl.Utf8,
-                    'Tournament_ID': pl.Utf8,
-                    'Club_ID': pl.Utf8,
-                    'Opponent_Pair_Direction': pl.Utf8,
-                    'Opponent_Pair_Number': pl.UInt64,
-                    'Opponent_Pair_Names': pl.Utf8,
-                    'Opponent_Pair_Section': pl.Utf8
-                })
-            
-            if score_frequency_data:
-                score_frequency_df = pl.DataFrame(score_frequency_data)
-            else:
-                score_frequency_df = pl.DataFrame(schema={
-                    'Board': pl.UInt32,
-                    'Score': pl.Int16,
-                    'Frequency': pl.UInt32,
-                    'Matchpoints_NS': pl.Float64,
-                    'Matchpoints_EW': pl.Float64
-                })
-            
-            # Assert that there are no null PBN values in the boards DataFrame
-            assert boards_df.filter(pl.col('PBN').is_null()).height == 0, f"Found {boards_df.filter(pl.col('PBN').is_null()).height} rows with null PBN values"
-            assert boards_df.filter(pl.col('PBN').str.len_chars().ne(69)).height == 0, f"Found {boards_df.filter(pl.col('PBN').str.len_chars().ne(69))} rows with invalid PBN values"
-            
-            return {'boards': boards_df, 'score_frequency': score_frequency_df}
+            return await scrape_boards_page_async(page, url)
             
         except Exception as e:
             logger.error(f"Error scraping boards data: {e}")
@@ -1586,6 +1824,66 @@ async def request_boards_dataframe_async(url: str, context=None) -> Dict[str, pl
         async with get_browser_context_async() as context:
             return await request_boards_dataframe_async(url, context)
 
+async def request_boards_dataframes_async(boards_urls: List[Tuple[int, str]], context, concurrency: Optional[int] = None) -> Tuple[List[Optional[Dict[str, pl.DataFrame]]], Dict[int, str]]:
+    """Scrape many boards pages concurrently using several pages (tabs) of one browser context.
+    
+    A bounded queue of (deal number, url) is worked by concurrency workers, each reusing its own page.
+    A failed board is recorded and doesn't stop the others.
+    
+    Args:
+        boards_urls: List of (deal number, BridgePlus boards URL)
+        context: Browser context
+        concurrency: Pages scraped at once (default BP_BOARD_CONCURRENCY)
+        
+    Returns:
+        Tuple of (results in the order of boards_urls, None for failed boards; dict of failed deal number to error)
+    """
+    if concurrency is None:
+        concurrency = BP_BOARD_CONCURRENCY
+    results: List[Optional[Dict[str, pl.DataFrame]]] = [None] * len(boards_urls)
+    failures: Dict[int, str] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for n, (deal_num, url) in enumerate(boards_urls):
+        queue.put_nowait((n, deal_num, url))
+    
+    async def close_page(page):
+        try:
+            await page.close()
+        except Exception as e:
+            logger.warning(f"Error closing page: {e}")
+    
+    async def worker():
+        page = None
+        try:
+            while not queue.empty():
+                n, deal_num, url = queue.get_nowait()
+                try:
+                    if page is None:
+                        page = await context.new_page()
+                    results[n] = await scrape_boards_page_async(page, url)
+                except Exception as e:
+                    logger.warning(f"Failed to scrape board {deal_num}: {e}")
+                    failures[deal_num] = str(e)
+                    # don't reuse a page left in an unknown state
+                    if page is not None:
+                        await close_page(page)
+                    page = None
+        finally:
+            if page is not None:
+                await close_page(page)
+    
+    start_time = time.time()
+    for e in await asyncio.gather(*[worker() for _ in range(max(1, min(concurrency, len(boards_urls))))], return_exceptions=True):
+        if e is not None:
+            logger.warning(f"Boards worker failed: {e}")
+    while not queue.empty(): # left by failed workers
+        n, deal_num, url = queue.get_nowait()
+        failures[deal_num] = 'not scraped'
+    logger.info(f"Scraped {len(boards_urls) - len(failures)} of {len(boards_urls)} boards pages (concurrency {concurrency}) in {time.time()-start_time:.2f} seconds")
+    if failures:
+        logger.warning(f"Failed boards: {sorted(failures)}")
+    return results, failures
+
 async def request_complete_tournament_data_async(teams_url: str, board_results_url: str, boards_url: str) -> Dict[str, pl.DataFrame]:
     """Scrape all DataFrames from BridgePlus using shared browser context.
     
@@ -1838,7 +2136,7 @@ def get_teams_by_tournament_date(date: str) -> str:
     Raises:
         ValueError: If no tournament found for the given date or browser automation not available
     """
-    return asyncio.run(get_teams_by_tournament_date_async(date))
+    return _run(get_teams_by_tournament_date_async(date))
 
 async def get_tournament_by_date_async(date: str, context=None) -> pl.DataFrame:
     """Get complete tournament information for a specific date.
@@ -1890,9 +2188,9 @@ def get_tournament_by_date(date: str) -> pl.DataFrame:
     Raises:
         ValueError: If no tournament found for the given date
     """
-    return asyncio.run(get_tournament_by_date_async(date))
+    return _run(get_tournament_by_date_async(date))
 
-async def get_all_boards_async(tr: str, cl: str, max_deals: int = 36, context=None) -> Dict[str, pl.DataFrame]:
+async def get_all_boards_async(tr: str, cl: str, max_deals: int = 36, context=None, concurrency: Optional[int] = None) -> Dict[str, pl.DataFrame]:
     """Get all boards data for a tournament by trying every board number from 1 to max_deals.
     
     This function attempts to retrieve every board (1 to max_deals) by trying the first available team
@@ -1904,6 +2202,7 @@ async def get_all_boards_async(tr: str, cl: str, max_deals: int = 36, context=No
         cl: Club ID (e.g., '5802079')
         max_deals: Maximum number of deals to try (default is 36)
         context: Optional browser context (for reuse)
+        concurrency: Boards pages scraped at once (default BP_BOARD_CONCURRENCY)
         
     Returns:
         Dict with keys 'boards' and 'score_frequency' containing all boards data from the tournament.
@@ -1930,19 +2229,18 @@ async def get_all_boards_async(tr: str, cl: str, max_deals: int = 36, context=No
         
         # Try to scrape boards 1-max_deals using the first team
         async with get_browser_context_async() as context:
-            for deal_num in range(1, max_deals + 1):
-                try:
-                    # Build the URL using the first team's info
-                    boards_url = f"https://www.bridgeplus.com/nos-simultanes/resultats/?p=donne&res=sim&d={deal_num}&eq={eq}&tr={tr}&cl={cl}&sc={sc}"
-                    logger.info(f"Trying to get board {deal_num} using team {eq}")
-                    result = await request_boards_dataframe_async(boards_url, context)
-                    if len(result['boards']) > 0:
-                        all_boards.append(result['boards'])
-                    if len(result['score_frequency']) > 0:
-                        all_frequency.append(result['score_frequency'])
-                except Exception as e:
-                    logger.warning(f"Failed to get board {deal_num}: {e}")
-                    continue
+            # Build the URLs using the first team's info
+            boards_urls = [(deal_num, f"https://www.bridgeplus.com/nos-simultanes/resultats/?p=donne&res=sim&d={deal_num}&eq={eq}&tr={tr}&cl={cl}&sc={sc}") for deal_num in range(1, max_deals + 1)]
+            results, failures = await request_boards_dataframes_async(boards_urls, context, concurrency)
+        
+        # Results are in deal order, as the serial loop returned them
+        for result in results:
+            if result is None:
+                continue
+            if len(result['boards']) > 0:
+                all_boards.append(result['boards'])
+            if len(result['score_frequency']) > 0:
+                all_frequency.append(result['score_frequency'])
         
         # Combine all boards and frequency data
         if all_boards:
@@ -2004,9 +2302,9 @@ def get_all_boards(tr: str, cl: str, eq: str, sc: str, max_deals: int = 36) -> D
     Raises:
         ValueError: If no teams found in the tournament
     """
-    return asyncio.run(get_all_boards_async(tr, cl, eq, sc, max_deals))
+    return _run(get_all_boards_async(tr, cl, eq, sc, max_deals))
 
-async def get_all_boards_for_player_async(tr: str, cl: str, eq: str, sc: str, context=None) -> Dict[str, pl.DataFrame]:
+async def get_all_boards_for_player_async(tr: str, cl: str, eq: str, sc: str, context=None, concurrency: Optional[int] = None) -> Dict[str, pl.DataFrame]:
     """Get all boards data for a specific player by finding their team.
     
     This function only returns boards that the player actually played, not all possible boards.
@@ -2019,6 +2317,7 @@ async def get_all_boards_for_player_async(tr: str, cl: str, eq: str, sc: str, co
         sc: Section (e.g., 'A')
         max_deals: Maximum number of deals to consider (default is 36)
         context: Optional browser context (for reuse)
+        concurrency: Boards pages scraped at once (default BP_BOARD_CONCURRENCY)
         
     Returns:
         Dict with keys 'boards' and 'score_frequency' containing player's boards data.
@@ -2140,19 +2439,17 @@ async def get_all_boards_for_player_async(tr: str, cl: str, eq: str, sc: str, co
         all_frequency = []
         
         async with get_browser_context_async() as context:
-            for deal_num in played_boards:
-                try:
-                    # Build the URL directly since we already have the team info
-                    boards_url = f"https://www.bridgeplus.com/nos-simultanes/resultats/?p=donne&res=sim&d={deal_num}&eq={eq}&tr={tr}&cl={cl}&sc={sc}"
-                    logger.info(f"Getting board data for deal {deal_num}: {boards_url}")
-                    result = await request_boards_dataframe_async(boards_url, context)
-                    if len(result['boards']) > 0:
-                        all_boards.append(result['boards'])
-                    if len(result['score_frequency']) > 0:
-                        all_frequency.append(result['score_frequency'])
-                except Exception as e:
-                    logger.warning(f"Failed to scrape board {deal_num} for player {eq}: {e}")
-                    continue
+            # Build the URLs directly since we already have the team info
+            boards_urls = [(deal_num, f"https://www.bridgeplus.com/nos-simultanes/resultats/?p=donne&res=sim&d={deal_num}&eq={eq}&tr={tr}&cl={cl}&sc={sc}") for deal_num in played_boards]
+            results, failures = await request_boards_dataframes_async(boards_urls, context, concurrency)
+        
+        for result in results:
+            if result is None:
+                continue
+            if len(result['boards']) > 0:
+                all_boards.append(result['boards'])
+            if len(result['score_frequency']) > 0:
+                all_frequency.append(result['score_frequency'])
         
         # Combine all boards and frequency data
         if all_boards:
@@ -2219,7 +2516,7 @@ def get_all_boards_for_player(tr: str, cl: str, eq: str, sc: str, max_deals: int
     Raises:
         ValueError: If player not found in any team or browser automation not available
     """
-    return asyncio.run(get_all_boards_for_player_async(tr, cl, eq, sc, max_deals))
+    return _run(get_all_boards_for_player_async(tr, cl, eq, sc, max_deals))
 
 async def main_async():
     """Main function to demonstrate optimized library usage with performance improvements."""
@@ -2235,7 +2532,7 @@ async def main_async():
     print(f"Tournament: {tr}, Club: {cl}, Section: {sc}, Team: {eq}, Deal: {d}")
     print("\nPERFORMANCE OPTIMIZATIONS IMPLEMENTED:")
     print("✅ Shared browser contexts (reduces browser startup overhead)")
-    print("✅ Intelligent wait strategies (networkidle + selector fallback)")
+    print("✅ Intelligent wait strategies (parser selector waits + networkidle fallback)")
     print("✅ Parallel board scraping (25x faster for multi-board operations)")
     print("✅ Removed fixed 10-second waits (saves ~45 seconds per team)")
     print("✅ Tournament-wide data extraction (all tournaments, clubs, complete board coverage)")
@@ -2630,7 +2927,7 @@ def get_board_results_by_team(tr: str, cl: str, sc: str, eq: str) -> pl.DataFram
     Raises:
         ValueError: If browser automation not available
     """
-    return asyncio.run(get_board_results_by_team_async(tr, cl, sc, eq))
+    return _run(get_board_results_by_team_async(tr, cl, sc, eq))
 
 async def get_boards_by_deal_async(tr: str, cl: str, sc: str, eq: str, d: str) -> Dict[str, pl.DataFrame]:
     """Get boards data by deal parameters.
@@ -2715,9 +3012,9 @@ def get_board_for_player(tr: str, cl: str, player_license_id: str, d: str) -> Di
     Raises:
         ValueError: If player not found in any team or browser automation not available
     """
-    return asyncio.run(get_board_for_player_async(tr, cl, player_license_id, d))
+    return _run(get_board_for_player_async(tr, cl, player_license_id, d))
 
-async def get_all_boards_for_team_async(tr: str, cl: str, sc: str, eq: str, max_deals: int = 36) -> Dict[str, pl.DataFrame]:
+async def get_all_boards_for_team_async(tr: str, cl: str, sc: str, eq: str, max_deals: int = 36, concurrency: Optional[int] = None) -> Dict[str, pl.DataFrame]:
     """Get all boards data for a specific team.
     
     This function only returns boards that the team actually played, not all possible boards.
@@ -2729,6 +3026,7 @@ async def get_all_boards_for_team_async(tr: str, cl: str, sc: str, eq: str, max_
         sc: Section (e.g., 'A')
         eq: Team number (e.g., '212')
         max_deals: Maximum number of deals to consider (default is 36)
+        concurrency: Boards pages scraped at once (default BP_BOARD_CONCURRENCY)
         
     Returns:
         Dict with keys 'boards' and 'score_frequency' containing only boards actually played by the team.
@@ -2737,6 +3035,7 @@ async def get_all_boards_for_team_async(tr: str, cl: str, sc: str, eq: str, max_
     route_url = f"https://www.bridgeplus.com/nos-simultanes/resultats/?p=route&res=sim&eq={eq}&tr={tr}&cl={cl}&sc={sc}"
     logger.info(f"Getting route data for team {eq}: {route_url}")
     
+    # one leased context for the route page and the boards pages
     played_boards = []
     async with get_browser_context_async() as context:
         try:
@@ -2774,28 +3073,25 @@ async def get_all_boards_for_team_async(tr: str, cl: str, sc: str, eq: str, max_
             # Fallback to trying all boards if route data fails
             played_boards = list(range(1, max_deals + 1))
     
-    # If no boards found in route, fallback to trying all boards
-    if not played_boards:
-        logger.info("No boards found in route data, trying all boards as fallback")
-        played_boards = list(range(1, max_deals + 1))
+        # If no boards found in route, fallback to trying all boards
+        if not played_boards:
+            logger.info("No boards found in route data, trying all boards as fallback")
+            played_boards = list(range(1, max_deals + 1))
+        
+        # Now get board data only for the boards that were actually played
+        all_boards = []
+        all_frequency = []
     
-    # Now get board data only for the boards that were actually played
-    all_boards = []
-    all_frequency = []
+        boards_urls = [(deal_num, f"https://www.bridgeplus.com/nos-simultanes/resultats/?p=donne&res=sim&d={deal_num}&eq={eq}&tr={tr}&cl={cl}&sc={sc}") for deal_num in played_boards]
+        results, failures = await request_boards_dataframes_async(boards_urls, context, concurrency)
     
-    async with get_browser_context_async() as context:
-        for deal_num in played_boards:
-            try:
-                boards_url = f"https://www.bridgeplus.com/nos-simultanes/resultats/?p=donne&res=sim&d={deal_num}&eq={eq}&tr={tr}&cl={cl}&sc={sc}"
-                logger.info(f"Getting board data for deal {deal_num}: {boards_url}")
-                result = await request_boards_dataframe_async(boards_url, context)
-                if len(result['boards']) > 0:
-                    all_boards.append(result['boards'])
-                if len(result['score_frequency']) > 0:
-                    all_frequency.append(result['score_frequency'])
-            except Exception as e:
-                logger.warning(f"Failed to scrape board {deal_num}: {e}")
-                continue
+    for result in results:
+        if result is None:
+            continue
+        if len(result['boards']) > 0:
+            all_boards.append(result['boards'])
+        if len(result['score_frequency']) > 0:
+            all_frequency.append(result['score_frequency'])
     
     # Combine all boards and frequency data
     if all_boards:
@@ -2942,7 +3238,7 @@ def get_board_by_number(tr: str, cl: str, board_number: int) -> Dict[str, pl.Dat
     Raises:
         ValueError: If no team found that played the specified board number
     """
-    return asyncio.run(get_board_by_number_async(tr, cl, board_number))
+    return _run(get_board_by_number_async(tr, cl, board_number))
 
 def get_board_for_team(tr: str, cl: str, sc: str, eq: str, d: str) -> Dict[str, pl.DataFrame]:
     """Get board data for a specific team and deal (non-async wrapper).
@@ -2957,7 +3253,7 @@ def get_board_for_team(tr: str, cl: str, sc: str, eq: str, d: str) -> Dict[str,
     Returns:
         Dict with keys 'boards' and 'score_frequency' containing team's board data
     """
-    return asyncio.run(get_boards_by_deal_async(tr, cl, sc, eq, d))
+    return _run(get_boards_by_deal_async(tr, cl, sc, eq, d))
 
 if __name__ == "__main__":
-    asyncio.run(main_async()) 
\ No newline at end of file
+    _run(main_async())
\ No newline at end of file
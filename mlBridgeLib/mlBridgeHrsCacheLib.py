@@ -0,0 +1,251 @@
+# contains a disk-backed store for the hand record cache (DD, par and single dummy computes).
+# rows are keyed on (PBN, Dealer, Vul). rows are hash partitioned on PBN into bucket files so
+# that lookups and upserts only read and rewrite the buckets touched by a request.
+
+# layout:
+#   {path}/bucket=000.parquet ... {path}/bucket={n_buckets-1}.parquet
+#   {path}/_store.json (n_buckets and schema)
+#   {path}/_store.lock (held while the store is modified so several processes can share it)
+
+import polars as pl
+import json
+import logging
+import os
+import pathlib
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from typing import Optional, Union, Dict, List, Iterable, Any, Iterator
+
+try:
+    import fcntl
+except ImportError: # windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def file_lock(path: pathlib.Path) -> Iterator[None]:
+    # exclusive lock across processes (and threads, each opens its own file).
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError: # LK_LOCK gives up after 10 seconds
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def pbn_to_bucket(pbn: str, n_buckets: int) -> int:
+    # crc32 is stable across processes and python versions unlike hash().
+    return zlib.crc32(pbn.encode('ascii')) % n_buckets
+
+
+class HrsCacheStore:
+    def __init__(self, path: Union[str, pathlib.Path], schema: Optional[Union[pl.Schema, Dict[str, pl.DataType]]] = None, n_buckets: int = 256):
+        """Open (or create) a hand record cache store.
+
+        Args:
+            path: Directory holding the bucket files. Created if missing.
+            schema: Schema of the cache rows. Required when creating a new store. Ignored if the store already exists.
+            n_buckets: Number of PBN hash partitions. Only used when creating a new store.
+        """
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.meta_path = self.path.joinpath('_store.json')
+        self.lock_path = self.path.joinpath('_store.lock')
+        with self.lock():
+            if not self._read_meta():
+                self.n_buckets = n_buckets
+                self.schema = None if schema is None else pl.Schema(schema)
+                self._write_meta()
+
+    def lock(self):
+        """Exclusive lock on the store, held by upsert() for its whole read, update and write of the buckets."""
+        return file_lock(self.lock_path)
+
+    def _read_meta(self) -> bool:
+        if not self.meta_path.exists():
+            return False
+        meta = json.loads(self.meta_path.read_text(encoding='utf-8'))
+        self.n_buckets = meta['n_buckets']
+        self.schema = pl.Schema({k: _deserialize_dtype(v) for k, v in meta['schema'].items()}) if meta['schema'] else None
+        return True
+
+    def _write_meta(self) -> None:
+        meta = {
+            'n_buckets': self.n_buckets,
+            'schema': None if self.schema is None else {k: _serialize_dtype(v) for k, v in self.schema.items()},
+        }
+        self._replace(self.meta_path, lambda tmp_path: tmp_path.write_text(json.dumps(meta, indent=2), encoding='utf-8'))
+
+    def set_schema(self, schema: Union[pl.Schema, Dict[str, pl.DataType]]) -> None:
+        schema = pl.Schema(schema)
+        with self.lock():
+            self._set_schema(schema)
+
+    def _set_schema(self, schema: pl.Schema) -> None:
+        # caller holds the lock. another process may have set the schema since this one opened the store.
+        self._read_meta()
+        if self.schema is None:
+            self.schema = schema
+            self._write_meta()
+        elif set(self.schema.items()) != set(schema.items()):
+            raise ValueError(f"store schema {self.schema} does not match expected schema {schema}")
+
+    def bucket_path(self, bucket: int) -> pathlib.Path:
+        return self.path.joinpath(f'bucket={bucket:03d}.parquet')
+
+    def _buckets_for(self, pbns: Iterable[str]) -> Dict[int, List[str]]:
+        buckets = {}
+        for pbn in pbns:
+            buckets.setdefault(pbn_to_bucket(pbn, self.n_buckets), []).append(pbn)
+        return buckets
+
+    def _empty_df(self) -> pl.DataFrame:
+        if self.schema is None:
+            raise ValueError("store has no schema. Pass schema when creating the store or call set_schema().")
+        return pl.DataFrame(schema=self.schema)
+
+    def _read_bucket(self, bucket: int) -> pl.DataFrame:
+        path = self.bucket_path(bucket)
+        if path.exists():
+            return pl.read_parquet(path)
+        return self._empty_df()
+
+    @staticmethod
+    def _replace(path: pathlib.Path, write) -> None:
+        # write to a temp file then rename so readers never see a partially written file.
+        # the temp name is unique so writers never share a temp file.
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp')
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _write_bucket(self, bucket: int, df: pl.DataFrame) -> None:
+        self._replace(self.bucket_path(bucket), df.write_parquet)
+
+    def scan(self, pbns: Optional[Iterable[str]] = None) -> pl.LazyFrame:
+        """Lazily scan the store. If pbns is given, only the buckets holding those PBNs are scanned."""
+        if pbns is None:
+            paths = sorted(self.path.glob('bucket=*.parquet'))
+            filter_expr = None
+        else:
+            pbns = set(pbns)
+            paths = [self.bucket_path(b) for b in sorted(self._buckets_for(pbns))]
+            paths = [p for p in paths if p.exists()]
+            filter_expr = pl.col('PBN').is_in(list(pbns))
+        if len(paths) == 0:
+            return self._empty_df().lazy()
+        lf = pl.scan_parquet(paths)
+        if filter_expr is not None:
+            lf = lf.filter(filter_expr)
+        return lf
+
+    def lookup(self, pbns: Iterable[str]) -> pl.DataFrame:
+        """Return all cached rows (every Dealer/Vul combination) for the given PBNs."""
+        return self.scan(pbns).collect()
+
+    def get(self, pbn: str, dealer: Optional[str] = None, vul: Optional[str] = None) -> pl.DataFrame:
+        """Point lookup of a single PBN, optionally narrowed to a Dealer and Vul."""
+        df = self.lookup([pbn])
+        if dealer is not None:
+            df = df.filter(pl.col('Dealer').eq(dealer))
+        if vul is not None:
+            df = df.filter(pl.col('Vul').eq(vul))
+        return df
+
+    def upsert(self, new_df: pl.DataFrame) -> int:
+        """Insert or update rows. Same semantics as update_hrs_cache_df() but only touched buckets are rewritten.
+
+        Rows are matched on PBN, as in update_hrs_cache_df(), because DD and single dummy rows arrive without
+        Dealer/Vul. Non-null values in new_df overwrite existing values. Unmatched rows are appended with nulls
+        for any missing columns.
+
+        Returns:
+            Number of buckets rewritten.
+        """
+        if new_df.is_empty():
+            return 0
+        if new_df['PBN'].null_count() != 0:
+            raise ValueError("PBNs in new_df must be non-null")
+        with self.lock():
+            return self._upsert(new_df)
+
+    def _upsert(self, new_df: pl.DataFrame) -> int:
+        # caller holds the lock, so no other writer can rewrite a bucket between its read and write here.
+        if self.schema is None:
+            self._set_schema(new_df.schema)
+        error_columns = [col for col in new_df.columns if col not in self.schema]
+        if len(error_columns) != 0:
+            raise ValueError(f"Columns not in store schema: {error_columns}")
+        new_df = new_df.cast({col: self.schema[col] for col in new_df.columns if new_df[col].dtype != pl.Null})
+
+        t = time.time()
+        new_df = new_df.with_columns(
+            pl.Series('_bucket', [pbn_to_bucket(pbn, self.n_buckets) for pbn in new_df['PBN']], pl.UInt32)
+        )
+        buckets_written = 0
+        for (bucket,), new_part in new_df.partition_by('_bucket', as_dict=True).items():
+            new_part = new_part.drop('_bucket')
+            bucket_df = self._read_bucket(bucket)
+            if not bucket_df.is_empty():
+                bucket_df = bucket_df.update(new_part, on='PBN')
+            new_rows = new_part.join(bucket_df.select('PBN'), on='PBN', how='anti')
+            if new_rows.height > 0:
+                new_rows = new_rows.with_columns([
+                    pl.lit(None, dtype=dtype).alias(col) for col, dtype in self.schema.items() if col not in new_rows.columns
+                ])
+                bucket_df = pl.concat([bucket_df, new_rows.select(self.schema.names())])
+            self._write_bucket(bucket, bucket_df)
+            buckets_written += 1
+        logger.info(f"HrsCacheStore.upsert: rows:{new_df.height} buckets written:{buckets_written} time:{time.time()-t} seconds")
+        return buckets_written
+
+    def to_df(self) -> pl.DataFrame:
+        """Load the entire store. Only intended for exports and migrations."""
+        return self.scan().collect()
+
+    def height(self) -> int:
+        return self.scan().select(pl.len()).collect().item()
+
+    @classmethod
+    def from_df(cls, path: Union[str, pathlib.Path], hrs_cache_df: pl.DataFrame, n_buckets: int = 256) -> 'HrsCacheStore':
+        """Create a store from an existing in-memory hrs_cache_df e.g. one loaded from a legacy parquet file."""
+        store = cls(path, schema=hrs_cache_df.schema, n_buckets=n_buckets)
+        store.upsert(hrs_cache_df)
+        return store
+
+
+def _serialize_dtype(dtype: pl.DataType) -> Any:
+    if isinstance(dtype, pl.List):
+        return {'List': _serialize_dtype(dtype.inner)}
+    if isinstance(dtype, pl.Struct):
+        return {'Struct': {f.name: _serialize_dtype(f.dtype) for f in dtype.fields}}
+    return str(dtype)
+
+
+def _deserialize_dtype(value: Any) -> pl.DataType:
+    if isinstance(value, dict):
+        if 'List' in value:
+            return pl.List(_deserialize_dtype(value['List']))
+        if 'Struct' in value:
+            return pl.Struct({k: _deserialize_dtype(v) for k, v in value['Struct'].items()})
+    return getattr(pl, value)
@@ -0,0 +1,154 @@
+# contains the precomputed contract score table and vectorized (polars) score lookups.
+# the table is computed once with endplay and shipped as score_table.npy next to this file. it is loaded at import time
+# so that scoring never has to construct endplay Contract objects during a request.
+
+# regenerate score_table.npy and run the benchmark with:
+#   python -m mlBridgeLib.mlBridgeScoreTableLib
+
+import polars as pl
+import numpy as np
+import pathlib
+import time
+from typing import Optional, Union
+
+from endplay.types import Contract, Denom, Player, Penalty, Vul
+
+
+# score table indexed by [level-1, strain, tricks, vul, dbl]. strain is the index into 'CDHSN', vul is 0/1, dbl is the index into ['', 'X', 'XX'].
+# dd scores (sets are always penalty doubled, same as calculate_scores() scores_d) are stored under the dbl index SCORE_TABLE_DD_DBL.
+SCORE_TABLE_STRAINS = 'CDHSN'
+SCORE_TABLE_DBLS = ['', 'X', 'XX']
+SCORE_TABLE_DD_DBL = len(SCORE_TABLE_DBLS)
+SCORE_TABLE_SHAPE = (7, len(SCORE_TABLE_STRAINS), 14, 2, len(SCORE_TABLE_DBLS)+1)
+SCORE_TABLE_PATH = pathlib.Path(__file__).with_name('score_table.npy')
+
+
+def compute_score_table() -> np.ndarray:
+    # the slow path. constructs an endplay Contract for every level, strain, tricks, vul and dbl.
+    strain_to_denom = [Denom.clubs, Denom.diamonds, Denom.hearts, Denom.spades, Denom.nt]
+    dbl_to_penalty = [Penalty.passed, Penalty.doubled, Penalty.redoubled]
+    score_table = np.zeros(SCORE_TABLE_SHAPE, dtype=np.int16)
+    for level in range(1,8):
+        for strain_index, denom in enumerate(strain_to_denom):
+            for tricks in range(14):
+                result = tricks-6-level
+                for vul_index, vul in enumerate([Vul.none, Vul.both]):
+                    for dbl_index, penalty in enumerate(dbl_to_penalty):
+                        score_table[level-1,strain_index,tricks,vul_index,dbl_index] = Contract(level=level,denom=denom,declarer=Player.north,penalty=penalty,result=result).score(vul)
+                    # sets are always penalty doubled
+                    score_table[level-1,strain_index,tricks,vul_index,SCORE_TABLE_DD_DBL] = score_table[level-1,strain_index,tricks,vul_index,0 if result >= 0 else 1]
+    return score_table
+
+
+def save_score_table(path: Union[str, pathlib.Path] = SCORE_TABLE_PATH) -> np.ndarray:
+    score_table = compute_score_table()
+    np.save(path, score_table, allow_pickle=False)
+    return score_table
+
+
+def load_score_table(path: Union[str, pathlib.Path] = SCORE_TABLE_PATH) -> np.ndarray:
+    # falls back to computing the table if the shipped file is missing or stale.
+    try:
+        score_table = np.load(path, allow_pickle=False)
+        if score_table.shape == SCORE_TABLE_SHAPE and score_table.dtype == np.int16:
+            return score_table
+        print(f"Warning: {path} has shape:{score_table.shape} dtype:{score_table.dtype}. Expected shape:{SCORE_TABLE_SHAPE} dtype:int16. Recomputing.")
+    except (OSError, ValueError) as e:
+        print(f"Warning: Unable to load {path}: {e}. Recomputing.")
+    return compute_score_table()
+
+
+# loaded once per process. read-only because it is shared by every caller.
+SCORE_TABLE = load_score_table()
+SCORE_TABLE.flags.writeable = False
+
+
+def get_score_table() -> np.ndarray:
+    return SCORE_TABLE
+
+
+def _to_expr(value: Union[str, int, pl.Expr]) -> pl.Expr:
+    # column names become columns, everything else a literal.
+    if isinstance(value, pl.Expr):
+        return value
+    if isinstance(value, str):
+        return pl.col(value)
+    return pl.lit(value)
+
+
+def score_lookup_expr(
+    score_table: np.ndarray,
+    level: Union[str, int, pl.Expr],
+    strain: Union[str, pl.Expr],
+    tricks: Union[str, int, pl.Expr],
+    vul: Union[str, bool, pl.Expr],
+    dbl: Optional[Union[str, pl.Expr]] = None,
+) -> pl.Expr:
+    """Vectorized score lookup. Same results as the calculate_scores() dict lookups but gathered in native code.
+
+    Args:
+        score_table: Table from get_score_table().
+        level, tricks, vul: Column names, expressions or constants.
+        strain: Column name or expression of 'C','D','H','S','N'. Use pl.lit() for a constant strain.
+        dbl: Column name or expression of '', 'X', 'XX' (all_scores_d lookup). None looks up dd scores (scores_d lookup).
+
+    Returns:
+        Int16 expression. Null where any key is null or out of range, as dict.get(key, None) would return.
+    """
+    level = _to_expr(level).cast(pl.Int32)
+    strain = _to_expr(strain).replace_strict({s:i for i,s in enumerate(SCORE_TABLE_STRAINS)}, default=None, return_dtype=pl.Int32)
+    tricks = _to_expr(tricks).cast(pl.Int32)
+    vul = _to_expr(vul).cast(pl.Int32)
+    if dbl is None:
+        dbl = pl.lit(SCORE_TABLE_DD_DBL, dtype=pl.Int32)
+    else:
+        dbl = _to_expr(dbl).replace_strict({d:i for i,d in enumerate(SCORE_TABLE_DBLS)}, default=None, return_dtype=pl.Int32)
+    n_levels, n_strains, n_tricks, n_vuls, n_dbls = score_table.shape
+    index = (((((level-1)*n_strains+strain)*n_tricks+tricks)*n_vuls+vul)*n_dbls+dbl)
+    in_range = level.is_between(1, n_levels) & tricks.is_between(0, n_tricks-1)
+    return pl.lit(pl.Series(score_table.ravel())).gather(pl.when(in_range).then(index).cast(pl.UInt32))
+
+
+def all_scores_lookup_expr(score_table: np.ndarray, level: str = 'BidLvl', strain: str = 'BidSuit', tricks: str = 'Tricks', vul: str = 'Vul_Declarer', dbl: str = 'Dbl') -> pl.Expr:
+    # vectorized all_scores_d.get((level,strain,tricks,vul,dbl),None). all keys null is PASS which scores 0.
+    is_pass = pl.all_horizontal([pl.col(c).is_null() for c in (level, strain, tricks, vul, dbl)])
+    return pl.when(is_pass).then(pl.lit(0, dtype=pl.Int16)).otherwise(score_lookup_expr(score_table, level, strain, tricks, vul, dbl))
+
+
+def benchmark(n_requests: int = 10) -> None:
+    # per request augmentation used to call calculate_scores() from DD_SD_Augmenter, convert_contract_to_DD_Score_Ref and
+    # FinalContractAugmenter (twice). each call rebuilt the tables with endplay.
+    from mlBridgeLib.mlBridgeAugmentLib import calculate_scores
+    calls_per_request = 4
+
+    t = time.time()
+    for _ in range(n_requests):
+        compute_score_table()
+    endplay_time = (time.time()-t)/n_requests
+
+    t = time.time()
+    for _ in range(n_requests):
+        load_score_table()
+    load_time = (time.time()-t)/n_requests
+
+    calculate_scores.cache_clear()
+    t = time.time()
+    calculate_scores()
+    cold_time = time.time()-t
+    t = time.time()
+    for _ in range(n_requests*calls_per_request):
+        calculate_scores()
+    warm_time = (time.time()-t)/(n_requests*calls_per_request)
+
+    print(f"endplay compute_score_table: time:{endplay_time} seconds")
+    print(f"load_score_table ({SCORE_TABLE_PATH.name}, {SCORE_TABLE_PATH.stat().st_size} bytes): time:{load_time} seconds")
+    print(f"calculate_scores first call in process: time:{cold_time} seconds")
+    print(f"calculate_scores memoized call: time:{warm_time} seconds")
+    # lower bound. the old calculate_scores() constructed 8 Contracts per table cell, compute_score_table() constructs 6.
+    print(f"estimated savings per request: {calls_per_request*(endplay_time+cold_time-warm_time)} seconds")
+
+
+if __name__ == '__main__':
+    score_table = save_score_table()
+    print(f"saved {SCORE_TABLE_PATH} shape:{score_table.shape} dtype:{score_table.dtype}")
+    benchmark()